@@ -0,0 +1,4 @@
+# STARTUP_PROFILE=1: đo thời gian import / constructor từ lúc import package app
+from app.core import startup_profile
+
+startup_profile.install()
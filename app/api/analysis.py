@@ -4,15 +4,16 @@ from app.schemas.analysis_response import AnalysisResponse
 from app.services.sentence_analyzer import SentenceAnalyzer
 from app.services.skill_evaluator import SkillEvaluator
 from app.services.sentence_analyzer import SentenceAnalysis
+from app.core import startup_profile
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
 
-analyzer = SentenceAnalyzer()
-evaluator = SkillEvaluator()
+analyzer = startup_profile.construct(SentenceAnalyzer)
+evaluator = startup_profile.construct(SkillEvaluator)
 
 @router.post("/start", response_model=SentenceAnalysis)
-def analyze_conversation(req: AnalysisRequest):
-    errors = analyzer.analyze(req.sentences)
+async def analyze_conversation(req: AnalysisRequest):
+    errors = await analyzer.aanalyze(req.sentences)
     print("Errors detected:", errors)
     result = evaluator.evaluate(req.sentences, errors)
     return result
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.services.chatbot_service import chatbot_service 
-from app.services.lightrag_service import rag_service
+from app.services.ingest_job_service import ingest_job_service
+from app.services.rag_ingestion import aiter_jsonl_stream
+from app.core.llm_governor import LLMRateLimitError
+from app.utils.sse import sse_event
 
 # Khởi tạo router (chú ý prefix)
 router = APIRouter(prefix="/chatbot", tags=["Chatbot"])
@@ -16,14 +20,48 @@ async def chat_endpoint(request: ChatRequest):
     try:
         response_text = await chatbot_service.process_question(user_message=request.message, history=[])
         return {"response": response_text}
+    except LLMRateLimitError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# API Ingest data
-@router.post("/ingest")
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    async def event_stream():
+        try:
+            async for chunk in chatbot_service.stream_question(user_message=request.message, history=[]):
+                yield sse_event("delta", {"text": chunk})
+            yield sse_event("done", {})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# API Ingest data: chỉ tạo job, việc nạp chạy nền -> theo dõi qua GET /ingest/{job_id}
+@router.post("/ingest", status_code=202)
 async def ingest_document(text: str):
     try:
-        await rag_service.insert_content(text)
-        return {"status": "success", "message": "Đã nạp dữ liệu vào RAG"}
+        job_id = await ingest_job_service.submit([("api_ingest", text)])
+        return {"status": "queued", "job_id": job_id}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Ingest hàng loạt: body là JSONL ({"text": ..., "file_path": ...} mỗi dòng), đọc dạng stream
+@router.post("/ingest/batch", status_code=202)
+async def ingest_batch(request: Request):
+    try:
+        job_id = await ingest_job_service.submit_stream(aiter_jsonl_stream(request.stream()))
+        return {"status": "queued", "job_id": job_id}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingest/{job_id}")
+async def get_ingest_job(job_id: str):
+    job = await ingest_job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,23 +1,40 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from app.schemas.request.conversation_request import ChatRequest
 from app.schemas.conversation_response import ConversationResponse
 from app.schemas.request.create_session_request import CreateSessionRequest
 from app.services.chat_service import ChatService
+from app.utils.sse import sse_event
+from app.core import startup_profile
 
 router = APIRouter(prefix="/conversation", tags=["Conversation"])
-chat_service = ChatService()
+chat_service = startup_profile.construct(ChatService)
 
 @router.post('/check-health')
 def check_health():
     return chat_service.check_health()
 
 @router.post('/message', response_model=ConversationResponse)
-def send_message(request: ChatRequest):
-    return chat_service.process_chat_message(
+async def send_message(request: ChatRequest):
+    return await chat_service.process_chat_message(
         session_id=request.session_id,
         user_message=request.message
     )
 
+@router.post('/message/stream')
+async def stream_message(request: ChatRequest):
+    async def event_stream():
+        try:
+            async for event, data in chat_service.stream_chat_message(
+                session_id=request.session_id,
+                user_message=request.message
+            ):
+                yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.post('/session/create')
-def create_new_session(request: CreateSessionRequest):
-    return chat_service.create_new_session(req=request)
\ No newline at end of file
+async def create_new_session(request: CreateSessionRequest):
+    return await chat_service.create_new_session(req=request)
\ No newline at end of file
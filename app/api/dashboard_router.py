@@ -1,17 +1,18 @@
 from fastapi import APIRouter
 from app.services.sentence_service import SentenceService
+from app.core import startup_profile
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
-service = SentenceService()
+service = startup_profile.construct(SentenceService)
 
 @router.get("/topics")
-def get_topics():
-    return service.get_topics()
+async def get_topics():
+    return await service.get_topics()
 
 @router.get("/levels")
-def get_levels():
-    return service.get_levels()
+async def get_levels():
+    return await service.get_levels()
 
 @router.get("/sets")
-def get_sets():
-    return service.get_sets()
\ No newline at end of file
+async def get_sets():
+    return await service.get_sets()
\ No newline at end of file
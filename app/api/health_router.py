@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.lightrag_service import rag_service
+from app.db.indexes import index_maintenance
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+# Liveness: process đã nhận HTTP, không phụ thuộc RAG
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+# Readiness: 200 khi LightRAG đã load xong và index Mongo đã ensure, 503 khi còn đang warm-up / Mongo chưa tới được / load lỗi
+@router.get("/ready")
+async def readiness():
+    ready = rag_service.is_ready and index_maintenance.is_ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "starting",
+            "rag": rag_service.readiness(),
+            "mongo_indexes": index_maintenance.readiness(),
+        }
+    )
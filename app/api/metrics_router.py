@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from app.core.llm_transport import connection_stats
+from app.core.llm_cache import get_llm_cache
+from app.core.single_flight import llm_single_flight
+from app.core.llm_governor import get_llm_governor
+from app.services.intent_classifier import intent_classifier
+from app.services.rag_speculation import rag_speculation
+from app.services.semantic_cache import rag_query_cache
+from app.services.ingest_job_service import ingest_job_service
+from app.services.chat_turn_writer import chat_turn_writer
+from app.services.prompt_cache import system_prompt_cache
+from app.services.conversation_summarizer import conversation_summarizer
+from app.core import startup_profile
+from app.db.indexes import index_report
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/llm")
+def get_llm_metrics():
+    return {
+        "connections": connection_stats.snapshot(),
+        "cache": get_llm_cache().stats(),
+        "coalescing": llm_single_flight.stats(),
+        "governor": get_llm_governor().stats(),
+        "intent_classifier": intent_classifier.stats(),
+        "rag_speculation": rag_speculation.stats(),
+        "rag_query_cache": rag_query_cache.stats(),
+        "ingest_jobs": ingest_job_service.stats(),
+        "chat_writes": chat_turn_writer.stats(),
+        "system_prompt_cache": system_prompt_cache.stats(),
+        "conversation_summary": conversation_summarizer.stats()
+    }
+
+# Dung lượng data / index của các collection trong index registry
+@router.get("/indexes")
+def get_index_metrics():
+    return index_report()
+
+# Chỉ có số liệu import/constructor khi chạy với STARTUP_PROFILE=1
+@router.get("/startup")
+def get_startup_metrics():
+    return startup_profile.report()
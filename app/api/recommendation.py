@@ -2,11 +2,12 @@ from fastapi import APIRouter
 from app.schemas.recommendation import RecommendationResponse
 from app.services.prompt_builder import PromptBuilder
 from app.services.llm_client import LLMClient
+from app.core import startup_profile
 
 router = APIRouter(prefix="/recommendation", tags=["Recommendation"])
 
-prompt_builder = PromptBuilder()
-llm_client = LLMClient()
+prompt_builder = startup_profile.construct(PromptBuilder)
+llm_client = startup_profile.construct(LLMClient)
 
 @router.post("/", response_model=RecommendationResponse)
 def recommend(skill_summary: dict):
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 import json
 from fastapi import APIRouter
 from app.services.suggest_word_service import SuggestWordService
+from app.core import startup_profile
 
 class WordRequest(BaseModel):
     word: str
@@ -45,11 +46,11 @@ class ScoreWritingResponse(BaseModel):
     improvements: list[str]
 
 route = APIRouter(prefix="/api", tags=["Suggest Word"])
-suggest_word_service = SuggestWordService()
+suggest_word_service = startup_profile.construct(SuggestWordService)
 
 @route.post("/suggest-words", response_model=WordResponse)
-def suggest_words(request: WordRequest):
-    raw_content = suggest_word_service.suggest_words(request.word)
+async def suggest_words(request: WordRequest):
+    raw_content = await suggest_word_service.suggest_words(request.word)
     print("Raw content from AI:", raw_content)  # Debug log
     try:
         json_content = json.loads(raw_content)
@@ -62,8 +63,8 @@ def suggest_words(request: WordRequest):
         raise ValueError("Failed to parse AI response as JSON")
     
 @route.post("/translate-word", response_model=WordTranslateResponse)
-def translate_word(request: WordTranslateRequest):
-    translated_word = suggest_word_service.translate_word(request.word)
+async def translate_word(request: WordTranslateRequest):
+    translated_word = await suggest_word_service.translate_word(request.word)
     try:
         translated_word = json.loads(translated_word)
         return WordTranslateResponse(translated_word=translated_word.get("translation", "Error"))
@@ -72,8 +73,8 @@ def translate_word(request: WordTranslateRequest):
         raise ValueError("Failed to parse AI response as JSON")
     
 @route.post("/generate-flashcards", response_model=list[FlashcardResponse])
-def generate_flashcards(request: FlashcardRequest):
-    raw_content = suggest_word_service.generate_flashcards_prompt(request.word)
+async def generate_flashcards(request: FlashcardRequest):
+    raw_content = await suggest_word_service.generate_flashcards_prompt(request.word)
     print("Raw content from AI:", raw_content)  # Debug log
     raw_content = strip_markdown_json(raw_content)
     try:
@@ -93,8 +94,8 @@ def generate_flashcards(request: FlashcardRequest):
         raise ValueError("Failed to parse AI response as JSON")
 
 @route.post("/score-writing", response_model=ScoreWritingResponse)
-def score_writing(request: ScoreWritingRequest):
-    raw_content = suggest_word_service.score_writing_prompt(
+async def score_writing(request: ScoreWritingRequest):
+    raw_content = await suggest_word_service.score_writing_prompt(
         title=request.title,
         description=request.description,
         content=request.content
@@ -6,33 +6,34 @@ from app.schemas.request.scenario_request import ScenarioModel
 from app.schemas.scenario_response import ScenarioResponse
 from app.services.scenario_service import ScenarioService
 from typing import List, Optional
+from app.core import startup_profile
 
 router = APIRouter(prefix='/variants', tags=["Variant"])
-variant_service = VariantService()
-scenario_service = ScenarioService()
+variant_service = startup_profile.construct(VariantService)
+scenario_service = startup_profile.construct(ScenarioService)
 
 @router.get('', response_model=List[VariantResponse])
-def get_all_variants():
-    return variant_service.get_all_variants()
+async def get_all_variants():
+    return await variant_service.get_all_variants()
 
 @router.post('', response_model=VariantResponse)
-def create_variant(request: VariantRequest):
-    return variant_service.save(request=request)
+async def create_variant(request: VariantRequest):
+    return await variant_service.save(request=request)
 
 @router.get('/scenarios', response_model=List[ScenarioResponse])
-def get_all_scenarios():
-    return scenario_service.get_all_scenarios()
+async def get_all_scenarios():
+    return await scenario_service.get_all_scenarios()
 
 @router.post('/scenarios', response_model=ScenarioResponse)
-def create_scenario(request: ScenarioModel):
-    return scenario_service.save(request)
+async def create_scenario(request: ScenarioModel):
+    return await scenario_service.save(request)
 
 @router.post('/scenarios', response_model=ScenarioResponse)
-def create_scenario(request: ScenarioModel):
-    return scenario_service.save(request)
+async def create_scenario(request: ScenarioModel):
+    return await scenario_service.save(request)
 
 @router.get('/scenarios', response_model=List[ScenarioResponse])
-def get_scenarios(variant_id: Optional[str] = None):
+async def get_scenarios(variant_id: Optional[str] = None):
     if variant_id:
-        return scenario_service.find_scenarios_by_variant(variant_id)
-    return scenario_service.get_all_scenarios()
\ No newline at end of file
+        return await scenario_service.find_scenarios_by_variant(variant_id)
+    return await scenario_service.get_all_scenarios()
\ No newline at end of file
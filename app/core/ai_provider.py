@@ -1,7 +1,13 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Type
+from typing import Optional, List, Dict, Tuple, Type, AsyncIterator
 from pydantic import BaseModel
-from google.genai import types
+from app.core.llm_transport import build_httpx_client, build_async_httpx_client
+from app.core.llm_cache import LLMResponseCache, get_llm_cache, make_cache_key
+from app.core.single_flight import SingleFlight, llm_single_flight
+from app.core.llm_governor import LLMGovernor, LLMRateLimitError, get_llm_governor, is_rate_limit_error
+from app.core.config import settings
+from app.enums.enum_llm_priority import LLMPriority
 
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
@@ -16,32 +22,130 @@ class AIProvider(ABC):
         self, 
         history: List[Dict[str, str]], 
         system_instruction: str,
-        response_schema: Type[BaseModel]
+        response_schema: Type[BaseModel],
+        cache_ttl: Optional[float] = None
+    ) -> BaseModel:
+        pass
+    
+    @abstractmethod
+    async def agenerate_text(
+        self,
+        prompt: str,
+        cache_ttl: Optional[float] = None,
+        priority: LLMPriority = LLMPriority.CONVERSATION,
+        **kwargs
+    ) -> str:
+        """Generate text response without blocking the event loop"""
+        pass
+
+    @abstractmethod
+    async def agenerate_chat_response(
+        self, 
+        history: List[Dict[str, str]], 
+        system_instruction: str,
+        response_schema: Type[BaseModel],
+        cache_ttl: Optional[float] = None,
+        priority: LLMPriority = LLMPriority.CONVERSATION
     ) -> BaseModel:
         pass
     
+    @abstractmethod
+    def astream_text(
+        self,
+        prompt: str,
+        priority: LLMPriority = LLMPriority.CONVERSATION
+    ) -> AsyncIterator[str]:
+        """Stream text response theo từng chunk"""
+        pass
+
+    @abstractmethod
+    def astream_chat_response(
+        self,
+        history: List[Dict[str, str]],
+        system_instruction: str,
+        response_schema: Type[BaseModel],
+        priority: LLMPriority = LLMPriority.CONVERSATION
+    ) -> AsyncIterator[str]:
+        """Stream JSON thô của structured output theo từng chunk"""
+        pass
+
     @abstractmethod
     def check_health(self) -> bool:
         """Check if API is working"""
         pass
 
+    # Cache là opt-in: call site truyền cache_ttl (giây) thì mới đọc/ghi cache
+    cache: Optional[LLMResponseCache] = None
+
+    def _cache_lookup(self, key: Optional[str]) -> Optional[str]:
+        if key is None or self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _cache_store(self, key: Optional[str], value: str, ttl: Optional[float]):
+        if key is None or self.cache is None or not ttl:
+            return
+        self.cache.set(key, value, ttl)
+
+    # Bản async: SQLite của cache chạy trong thread, không chặn event loop
+    async def _acache_lookup(self, key: Optional[str]) -> Optional[str]:
+        if key is None or self.cache is None:
+            return None
+        return await self.cache.aget(key)
+
+    async def _acache_store(self, key: Optional[str], value: str, ttl: Optional[float]):
+        if key is None or self.cache is None or not ttl:
+            return
+        await self.cache.aset(key, value, ttl)
+
 class GeminiProvider(AIProvider):
     """Google Gemini Provider"""
+
+    CHAT_TEMPERATURE = 0.7
     
-    def __init__(self, api_key: str, model: str):
-        from google import genai
-        self.client = genai.Client(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        client=None,
+        cache: Optional[LLMResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        governor: Optional[LLMGovernor] = None
+    ):
+        # Mặc định dùng genai.Client chung của process (một connection pool / API key),
+        # tạo ở lần gọi đầu tiên để import/constructor service không phải load google.genai
+        self.api_key = api_key
+        self._client = client
         self.model = model
+        self.cache = cache or get_llm_cache()
+        # Gộp các prompt giống hệt nhau đang chạy đồng thời (chỉ áp dụng cho API async)
+        self.single_flight = single_flight or llm_single_flight
+        # Rate limit + concurrency dùng chung cho mọi provider
+        self.governor = governor or get_llm_governor()
     
-    def generate_text(self, prompt: str, **kwargs) -> str:
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_shared_genai_client(self.api_key)
+        return self._client
+
+    def generate_text(self, prompt: str, cache_ttl: Optional[float] = None, **kwargs) -> str:
+        key = self._text_cache_key(prompt) if cache_ttl else None
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
         try:
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=prompt
             )
-            return response.text.strip()
+            text = response.text.strip()
         except Exception as e:
+            if is_rate_limit_error(e):
+                raise LLMRateLimitError("Gemini quota exceeded, please retry later") from e
             raise Exception(f"Gemini API Error: {str(e)}")
+        self._cache_store(key, text, cache_ttl)
+        return text
     
     def check_health(self) -> bool:
         try:
@@ -54,25 +158,19 @@ class GeminiProvider(AIProvider):
         self, 
         history: List[Dict[str, str]], 
         system_instruction: str,
-        response_schema: Type[BaseModel]
+        response_schema: Type[BaseModel],
+        cache_ttl: Optional[float] = None
     ) -> BaseModel:
+        key = self._chat_cache_key(history, system_instruction, response_schema) if cache_ttl else None
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return response_schema.model_validate_json(cached)
         try:
             # 1. Convert history format (Dict -> SDK Format)
-            # SDK mới thường nhận contents dạng list các dict hoặc object
-            formatted_contents = []
-            for msg in history:
-                formatted_contents.append({
-                    "role": msg["role"],
-                    "parts": [{"text": msg["content"]}]
-                })
+            formatted_contents = self._format_history(history)
 
             # 2. Config trả về JSON (Structured Output)
-            generate_config = types.GenerateContentConfig(
-                temperature=0.7,
-                response_mime_type="application/json",
-                response_schema=response_schema, 
-                system_instruction=system_instruction
-            )
+            generate_config = self._build_chat_config(system_instruction, response_schema)
 
             # 3. Gọi Gemini
             response = self.client.models.generate_content(
@@ -80,12 +178,194 @@ class GeminiProvider(AIProvider):
                 contents=formatted_contents,
                 config=generate_config
             )
-
-            return response.parsed 
+            parsed = response.parsed
 
         except Exception as e:
             # Log lỗi chi tiết ở đây nếu cần
+            if is_rate_limit_error(e):
+                raise LLMRateLimitError("Gemini quota exceeded, please retry later") from e
             raise Exception(f"Gemini Provider Error: {str(e)}")
+
+        if parsed is not None:
+            self._cache_store(key, parsed.model_dump_json(), cache_ttl)
+        return parsed
+
+    async def agenerate_text(
+        self,
+        prompt: str,
+        cache_ttl: Optional[float] = None,
+        priority: LLMPriority = LLMPriority.CONVERSATION,
+        **kwargs
+    ) -> str:
+        """Bản async của generate_text, dùng client.aio nên không block event loop"""
+        key = self._text_cache_key(prompt)
+        cached = await self._acache_lookup(key if cache_ttl else None)
+        if cached is not None:
+            return cached
+
+        async def call() -> str:
+            try:
+                response = await self.governor.run(
+                    lambda: self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt
+                    ),
+                    priority=priority,
+                    retries=settings.LLM_RATE_LIMIT_RETRIES,
+                )
+                text = response.text.strip()
+            except LLMRateLimitError:
+                raise
+            except Exception as e:
+                raise Exception(f"Gemini API Error: {str(e)}")
+            await self._acache_store(key, text, cache_ttl)
+            return text
+
+        return await self.single_flight.do(key, call)
+
+    async def agenerate_chat_response(
+        self, 
+        history: List[Dict[str, str]], 
+        system_instruction: str,
+        response_schema: Type[BaseModel],
+        cache_ttl: Optional[float] = None,
+        priority: LLMPriority = LLMPriority.CONVERSATION
+    ) -> BaseModel:
+        """Bản async của generate_chat_response"""
+        key = self._chat_cache_key(history, system_instruction, response_schema)
+        cached = await self._acache_lookup(key if cache_ttl else None)
+        if cached is not None:
+            return response_schema.model_validate_json(cached)
+
+        async def call() -> BaseModel:
+            try:
+                response = await self.governor.run(
+                    lambda: self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=self._format_history(history),
+                        config=self._build_chat_config(system_instruction, response_schema)
+                    ),
+                    priority=priority,
+                    retries=settings.LLM_RATE_LIMIT_RETRIES,
+                )
+                parsed = response.parsed
+
+            except LLMRateLimitError:
+                raise
+            except Exception as e:
+                raise Exception(f"Gemini Provider Error: {str(e)}")
+
+            if parsed is not None:
+                await self._acache_store(key, parsed.model_dump_json(), cache_ttl)
+            return parsed
+
+        return await self.single_flight.do(key, call)
+
+    async def astream_text(
+        self,
+        prompt: str,
+        priority: LLMPriority = LLMPriority.CONVERSATION
+    ) -> AsyncIterator[str]:
+        async for chunk in self._astream(prompt, None, priority):
+            yield chunk
+
+    async def astream_chat_response(
+        self,
+        history: List[Dict[str, str]],
+        system_instruction: str,
+        response_schema: Type[BaseModel],
+        priority: LLMPriority = LLMPriority.CONVERSATION
+    ) -> AsyncIterator[str]:
+        config = self._build_chat_config(system_instruction, response_schema)
+        async for chunk in self._astream(self._format_history(history), config, priority):
+            yield chunk
+
+    async def _astream(self, contents, config, priority: LLMPriority) -> AsyncIterator[str]:
+        # Stream giữ slot của governor đến khi chunk cuối về; không retry được
+        # vì user đã nhận một phần nội dung
+        await self.governor.acquire(priority)
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=config
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+            self.governor.on_success()
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.governor.on_rate_limited()
+                raise LLMRateLimitError("Gemini quota exceeded, please retry later") from e
+            raise Exception(f"Gemini API Error: {str(e)}")
+        finally:
+            self.governor.release()
+
+    def _text_cache_key(self, prompt: str) -> str:
+        return make_cache_key(model=self.model, contents=prompt)
+
+    def _chat_cache_key(
+        self,
+        history: List[Dict[str, str]],
+        system_instruction: str,
+        response_schema: Type[BaseModel]
+    ) -> str:
+        return make_cache_key(
+            model=self.model,
+            contents=history,
+            system_instruction=system_instruction,
+            response_schema=response_schema,
+            temperature=self.CHAT_TEMPERATURE,
+        )
+
+    def _format_history(self, history: List[Dict[str, str]]) -> List[Dict]:
+        # SDK mới thường nhận contents dạng list các dict hoặc object
+        return [
+            {"role": msg["role"], "parts": [{"text": msg["content"]}]}
+            for msg in history
+        ]
+
+    def _build_chat_config(
+        self,
+        system_instruction: str,
+        response_schema: Type[BaseModel]
+    ):
+        from google.genai import types
+        return types.GenerateContentConfig(
+            temperature=self.CHAT_TEMPERATURE,
+            response_mime_type="application/json",
+            response_schema=response_schema, 
+            system_instruction=system_instruction
+        )
         
+# Registry cấp process: mỗi API key một genai.Client, mỗi (key, model) một provider
+_registry_lock = threading.Lock()
+_genai_clients: Dict[str, object] = {}
+_providers: Dict[Tuple[str, str], GeminiProvider] = {}
+
+
+def get_shared_genai_client(api_key: str):
+    with _registry_lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            from google import genai
+            from google.genai import types
+            client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    httpx_client=build_httpx_client(),
+                    httpx_async_client=build_async_httpx_client(),
+                ),
+            )
+            _genai_clients[api_key] = client
+        return client
+
+
 def get_gemini_provider(api_key: str, model: str) -> GeminiProvider:
-    return GeminiProvider(api_key=api_key, model=model)
\ No newline at end of file
+    key = (api_key, model)
+    provider = _providers.get(key)
+    if provider is None:
+        with _registry_lock:
+            provider = _providers.setdefault(key, GeminiProvider(api_key=api_key, model=model))
+    return provider
\ No newline at end of file
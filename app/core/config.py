@@ -10,10 +10,119 @@ from pydantic import Field
 
 class Settings(BaseSettings):
     MONGO_URL: str = Field(...)
+    # Pool kết nối Mongo (client sync + async dùng chung cấu hình); timeout tính bằng ms, 0 = không giới hạn
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int = 60000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int = 20000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    # Index registry (app/db/indexes.py): ensure chạy nền lúc startup (không chặn HTTP), Mongo lỗi thì thử lại sau MONGO_INDEX_RETRY_SEC.
+    # Chạy nhiều worker/instance thì nên tắt và chạy python -m scripts.manage_indexes lúc deploy
+    MONGO_ENSURE_INDEXES_ON_STARTUP: bool = True
+    MONGO_INDEX_RETRY_SEC: float = 30.0
+    # Bật verify: có query đăng ký bị COLLSCAN thì /health/ready trả 503
+    MONGO_VERIFY_QUERY_PLANS_ON_STARTUP: bool = False
 
     GEMINI_API_KEY: str = Field(...)
     GEMINI_MODEL: str = Field(...)
 
+    # Connection pool dùng chung cho mọi LLM client
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 60.0
+
+    # Cache response LLM (LRU trong RAM + SQLite trên đĩa, để trống path để tắt tầng đĩa)
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+    LLM_CACHE_PATH: str = "./.cache/llm_cache.sqlite3"
+    # Tầng đĩa: tối đa bao nhiêu entry, bao lâu (giây) dọn entry hết hạn một lần
+    LLM_CACHE_MAX_DISK_ENTRIES: int = 50000
+    LLM_CACHE_SWEEP_INTERVAL: float = 600.0
+
+    # Governor cho lời gọi Gemini: token bucket (AIMD) + giới hạn số request đồng thời
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_RATE_PER_SEC: float = 10.0
+    LLM_MIN_RATE_PER_SEC: float = 0.5
+    LLM_MAX_RATE_PER_SEC: float = 50.0
+    LLM_RATE_BURST: int = 20
+    LLM_QUEUE_MAX_WAIT: float = 30.0
+    LLM_RATE_LIMIT_RETRIES: int = 2
+
+    # Số tin nhắn gần nhất của session gửi kèm làm context cho AI (conversation)
+    CHAT_HISTORY_WINDOW: int = 10
+
+    # Rolling summary cho tin nhắn đã ra khỏi cửa sổ: tóm tắt lại mỗi K lượt; budget token cho summary + lịch sử.
+    # Tin nhắn trong cửa sổ bị cắt vì vượt budget được tóm tắt ngay (nền); lượt hiện tại chưa thấy chúng cho tới khi summary xong
+    CHAT_SUMMARY_ENABLED: bool = True
+    CHAT_SUMMARY_EVERY_TURNS: int = 5
+    CHAT_SUMMARY_MAX_WORDS: int = 150
+    CHAT_PROMPT_TOKEN_BUDGET: int = 1500
+
+    # Bucket trong chat_messages nhận thêm lượt khi còn ít hơn số tin nhắn này (một lượt luôn nằm trọn trong một bucket)
+    CHAT_MESSAGE_BUCKET_SIZE: int = 50
+
+    # Ghi lượt chat vào Mongo sau khi đã trả lời user (write-behind), thử lại CHAT_WRITE_RETRIES lần trước khi bỏ
+    CHAT_BACKGROUND_WRITES: bool = False
+    CHAT_WRITE_RETRIES: int = 3
+    CHAT_WRITE_RETRY_BACKOFF: float = 0.5
+
+    # Cache system prompt conversation theo (variant, scenario, context); TTL là lưới an toàn giữa các process
+    PROMPT_CACHE_MAX_ENTRIES: int = 1024
+    PROMPT_CACHE_TTL: float = 300.0
+    PROMPT_CACHE_WATCH_CHANGES: bool = False  # invalidate qua Mongo change stream (cần replica set)
+
+    # Intent classifier local của chatbot: dưới ngưỡng confidence thì hỏi LLM
+    INTENT_CONFIDENCE_THRESHOLD: float = 0.6
+    INTENT_SHADOW_SAMPLE_RATE: float = 0.05
+    INTENT_LOG_PATH: str = "./.cache/intent_log.jsonl"
+
+    # Chạy trước RAG retrieval song song với bước phân loại (khi phải hỏi LLM)
+    CHATBOT_SPECULATIVE_RAG: bool = True
+    CHATBOT_SPECULATIVE_RAG_MAX_IN_FLIGHT: int = 4
+
+    # Số LightRAG query chạy đồng thời tối đa trên mỗi worker
+    RAG_MAX_CONCURRENT_QUERIES: int = 4
+
+    # Semantic cache cho kết quả RAG query
+    RAG_SEMANTIC_CACHE_ENABLED: bool = True
+    RAG_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    RAG_SEMANTIC_CACHE_MAX_ENTRIES: int = 512
+
+    # LightRAG load nền khi start app; RAG query chờ warm-up tối đa RAG_READY_TIMEOUT giây rồi bỏ qua context RAG
+    RAG_WARMUP_ON_STARTUP: bool = True
+    RAG_READY_TIMEOUT: float = 5.0
+
+    # Vector storage của LightRAG: MemmapVectorDBStorage (file .npy dùng chung giữa worker) | NanoVectorDBStorage
+    RAG_VECTOR_STORAGE: str = "MemmapVectorDBStorage"
+
+    # ANN index (IVF-flat) cho MemmapVectorDBStorage; dưới RAG_ANN_MIN_ROWS vector thì tìm vét cạn
+    RAG_ANN_ENABLED: bool = True
+    RAG_ANN_MIN_ROWS: int = 2000
+    RAG_ANN_NLIST: int = 0  # 0 = tự chọn ~sqrt(số vector)
+    RAG_ANN_TARGET_RECALL: float = 0.95
+    RAG_ANN_RECALL_K: int = 10
+
+    # Ingestion hàng loạt: số tài liệu mỗi lần ainsert, batch/concurrency embedding và LLM của LightRAG
+    RAG_INGEST_BATCH_SIZE: int = 8
+    RAG_INGEST_CHECKPOINT_PATH: str = "./.cache/rag_ingest_checkpoint.json"
+    RAG_MAX_PARALLEL_INSERT: int = 2
+    RAG_EMBEDDING_BATCH_NUM: int = 32
+    RAG_EMBEDDING_MAX_ASYNC: int = 8
+    RAG_LLM_MAX_ASYNC: int = 4
+
+    # Job ingest chạy nền: số worker mỗi process, chu kỳ poll Mongo, job mất heartbeat bao lâu thì chạy lại
+    RAG_INGEST_WORKERS: int = 1
+    RAG_INGEST_POLL_INTERVAL: float = 5.0
+    RAG_INGEST_HEARTBEAT_INTERVAL: float = 30.0
+    RAG_INGEST_JOB_STALE_SEC: float = 600.0
+    RAG_INGEST_LLM_MAX_WAIT: float = 600.0
+
+    # LLM response cache của LightRAG: sqlite (ghi theo delta, giới hạn dung lượng) | json (file gốc của LightRAG)
+    RAG_LLM_CACHE_BACKEND: str = "sqlite"
+    RAG_LLM_CACHE_MAX_MB: int = 256
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
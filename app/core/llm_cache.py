@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Type
+from pydantic import BaseModel
+from app.core.config import settings
+
+
+def make_cache_key(
+    model: str,
+    contents: Any,
+    system_instruction: Optional[str] = None,
+    response_schema: Optional[Type[BaseModel]] = None,
+    temperature: Optional[float] = None,
+) -> str:
+    """Hash nội dung của một lời gọi LLM, cùng input thì cùng key"""
+    payload = {
+        "model": model,
+        "system_instruction": system_instruction,
+        "contents": contents,
+        "schema": response_schema.model_json_schema() if response_schema else None,
+        "temperature": temperature,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Cache 2 tầng cho response của LLM:
+    1. In-memory LRU (nhanh, mất khi restart)
+    2. SQLite trên đĩa (WAL, giữ qua các lần restart, dùng chung giữa các worker)
+    Mỗi entry có TTL riêng do call site quyết định.
+    Tầng đĩa có giới hạn max_disk_entries; mỗi sweep_interval giây xoá entry hết hạn
+    rồi bỏ các entry sắp hết hạn nhất nếu vượt giới hạn.
+    Code async dùng aget/aset: truy cập SQLite chạy trong thread, không chặn event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 50000,
+        sweep_interval: float = 600.0,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.sweep_interval = sweep_interval
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Lock riêng cho SQLite: đọc/ghi đĩa không giữ lock của tầng RAM
+        self._db_lock = threading.Lock()
+        self._last_sweep = time.time()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.swept = 0
+
+        self._conn = None
+        if db_path:
+            folder = os.path.dirname(db_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires_at ON llm_cache (expires_at)")
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Tầng RAM
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._memory[key]
+            return None
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Tầng SQLite (blocking)
+    # ------------------------------------------------------------------
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if self._conn is not None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+            if row:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        if self._conn is None:
+            return
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._conn.commit()
+            if time.time() - self._last_sweep >= self.sweep_interval:
+                self._sweep()
+
+    def _sweep(self):
+        """Gọi khi đang giữ _db_lock"""
+        now = time.time()
+        self._last_sweep = now
+        removed = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_disk_entries:
+            removed += self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY expires_at LIMIT ?)",
+                (count - self.max_disk_entries,),
+            ).rowcount
+        self._conn.commit()
+        self.swept += removed
+
+    def sweep(self):
+        if self._conn is None:
+            return
+        with self._db_lock:
+            self._sweep()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        return self._disk_get(key, now)
+
+    def set(self, key: str, value: str, ttl: float):
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        self._disk_set(key, value, expires_at)
+
+    async def aget(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None or self._conn is None:
+            if value is None:
+                self.misses += 1
+            return value
+        return await asyncio.to_thread(self._disk_get, key, now)
+
+    async def aset(self, key: str, value: str, ttl: float):
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_swept": self.swept,
+            }
+
+
+_cache_instance: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = LLMResponseCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                db_path=settings.LLM_CACHE_PATH or None,
+                max_disk_entries=settings.LLM_CACHE_MAX_DISK_ENTRIES,
+                sweep_interval=settings.LLM_CACHE_SWEEP_INTERVAL,
+            )
+        return _cache_instance
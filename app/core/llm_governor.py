@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+from app.enums.enum_llm_priority import LLMPriority
+
+
+class LLMRateLimitError(Exception):
+    """Gemini trả 429 liên tục hoặc request chờ trong hàng đợi quá lâu"""
+    pass
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    from google.genai import errors
+    return isinstance(error, errors.APIError) and error.code == 429
+
+
+class LLMGovernor:
+    """
+    Điều phối mọi lời gọi Gemini trong process:
+    - Token bucket giới hạn số request/giây, rate tự điều chỉnh theo AIMD
+      (tăng cộng khi thành công, giảm nhân khi gặp 429)
+    - Giới hạn số request đang chạy đồng thời
+    - Hàng đợi ưu tiên theo LLMPriority, mỗi request chờ tối đa max_wait giây
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: int,
+        max_wait: float,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    # ------------------------------------------------------------------
+    # Slot management
+    # ------------------------------------------------------------------
+
+    async def acquire(self, priority: LLMPriority = LLMPriority.CONVERSATION, max_wait: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        started = time.monotonic()
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(future, timeout=max_wait if max_wait is not None else self.max_wait)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Slot đã cấp nhưng caller không dùng nữa -> trả lại
+                self.release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise LLMRateLimitError("LLM is overloaded, please retry later") from None
+            raise
+
+        waited = time.monotonic() - started
+        self.granted += 1
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _dispatch(self):
+        self._refill()
+        while self._waiters and self._in_flight < self.max_concurrency and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            self._in_flight += 1
+            future.set_result(None)
+
+        # Còn người chờ nhưng hết token -> hẹn giờ gọi lại khi bucket đầy thêm 1 token
+        if self._waiters and self._in_flight < self.max_concurrency and self._timer is None:
+            delay = max((1 - self._tokens) / self.rate, 0.001)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    # ------------------------------------------------------------------
+    # AIMD
+    # ------------------------------------------------------------------
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_rate_limited(self):
+        self.rate_limited += 1
+        now = time.monotonic()
+        # Một loạt 429 cùng lúc chỉ tính là một lần giảm
+        if now - self._last_decrease >= self.decrease_cooldown:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0.0
+            self._last_refill = now
+            self._last_decrease = now
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        priority: LLMPriority = LLMPriority.CONVERSATION,
+        retries: int = 0,
+        max_wait: Optional[float] = None,
+    ) -> Any:
+        """Chạy fn khi được cấp slot; gặp 429 thì giảm rate rồi xếp hàng lại"""
+        for attempt in range(retries + 1):
+            await self.acquire(priority, max_wait)
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.on_rate_limited()
+                if attempt == retries:
+                    raise LLMRateLimitError("Gemini quota exceeded, please retry later") from e
+            else:
+                self.on_success()
+                return result
+            finally:
+                self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        pending = [w for w in self._waiters if not w[2].done()]
+        depth_by_priority = {p.name: 0 for p in LLMPriority}
+        for priority, _, _ in pending:
+            depth_by_priority[LLMPriority(priority).name] += 1
+        return {
+            "rate_per_sec": round(self.rate, 3),
+            "in_flight": self._in_flight,
+            "queue_depth": len(pending),
+            "queue_depth_by_priority": depth_by_priority,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "avg_wait_sec": round(self.total_wait / self.granted, 4) if self.granted else 0.0,
+            "max_wait_sec": round(self.max_wait_seen, 4),
+        }
+
+
+_governor: Optional[LLMGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_llm_governor() -> LLMGovernor:
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = LLMGovernor(
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                rate=settings.LLM_RATE_PER_SEC,
+                min_rate=settings.LLM_MIN_RATE_PER_SEC,
+                max_rate=settings.LLM_MAX_RATE_PER_SEC,
+                burst=settings.LLM_RATE_BURST,
+                max_wait=settings.LLM_QUEUE_MAX_WAIT,
+            )
+        return _governor
@@ -0,0 +1,95 @@
+import threading
+from typing import Dict, Any
+import httpx
+from app.core.config import settings
+
+
+class ConnectionStats:
+    """Đếm request và số kết nối mới để biết pool có được tái sử dụng không"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def record_tls(self):
+        with self._lock:
+            self.tls_handshakes += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            }
+
+
+connection_stats = ConnectionStats()
+
+
+def _on_trace_event(event_name: str):
+    # Tên event do httpcore phát ra qua extension "trace"
+    if event_name == "connection.connect_tcp.started":
+        connection_stats.record_connect()
+    elif event_name == "connection.start_tls.started":
+        connection_stats.record_tls()
+
+
+def _sync_trace(event_name, info):
+    _on_trace_event(event_name)
+
+
+async def _async_trace(event_name, info):
+    _on_trace_event(event_name)
+
+
+def _sync_request_hook(request: httpx.Request):
+    connection_stats.record_request()
+    request.extensions["trace"] = _sync_trace
+
+
+async def _async_request_hook(request: httpx.Request):
+    connection_stats.record_request()
+    request.extensions["trace"] = _async_trace
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def build_httpx_client() -> httpx.Client:
+    """httpx.Client dùng chung cho các lời gọi sync của genai.Client"""
+    return httpx.Client(
+        http2=settings.LLM_HTTP2,
+        limits=_pool_limits(),
+        event_hooks={"request": [_sync_request_hook]},
+    )
+
+
+def build_async_httpx_client() -> httpx.AsyncClient:
+    """
+    httpx.AsyncClient dùng chung cho client.aio.
+    Truyền client tường minh để SDK không tự chuyển sang aiohttp (không có HTTP/2)
+    """
+    return httpx.AsyncClient(
+        http2=settings.LLM_HTTP2,
+        limits=_pool_limits(),
+        event_hooks={"request": [_async_request_hook]},
+    )
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from pydantic import BaseModel
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        # Số lời gọi trùng đã "ăn ké" kết quả của request này
+        self.absorbed = 0
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi async giống hệt nhau đang chạy đồng thời:
+    caller đầu tiên thực sự gọi upstream, các caller sau cùng await một future.
+    Upstream chạy trong task riêng nên caller đầu bị huỷ (client ngắt kết nối)
+    cũng không làm hỏng các caller còn lại.
+    Kết quả là Pydantic model thì mỗi caller nhận một bản deep copy riêng (kể cả caller đầu,
+    vì nó có thể chạy tiếp và sửa object trước khi các caller khác kịp đọc);
+    str và kiểu bất biến khác được trả thẳng.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.flights = 0
+        self.absorbed = 0
+        self.max_absorbed = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            flight.absorbed += 1
+            return self._own_copy(await asyncio.shield(flight.task))
+
+        task = asyncio.ensure_future(fn())
+        flight = _Flight(task)
+        self._flights[key] = flight
+        self.flights += 1
+        task.add_done_callback(lambda _: self._finish(key, flight))
+        return self._own_copy(await asyncio.shield(task))
+
+    @staticmethod
+    def _own_copy(result: Any) -> Any:
+        if isinstance(result, BaseModel):
+            return result.model_copy(deep=True)
+        return result
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        self.absorbed += flight.absorbed
+        self.max_absorbed = max(self.max_absorbed, flight.absorbed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "in_flight_absorbed": {key[:12]: f.absorbed for key, f in self._flights.items()},
+            "flights": self.flights,
+            "absorbed": self.absorbed,
+            "max_absorbed": self.max_absorbed,
+        }
+
+
+llm_single_flight = SingleFlight()
@@ -0,0 +1,101 @@
+"""
+Profile thời gian khởi động, bật bằng biến môi trường STARTUP_PROFILE=1:
+- Thời gian import từng module (inclusive + self) qua hook builtins.__import__
+- Thời gian các constructor singleton tạo lúc import (construct(...)) và các bước trong lifespan (step(...))
+Chỉ dùng stdlib vì được cài từ app/__init__.py trước mọi import khác.
+Tắt thì construct/step chỉ gọi thẳng, không tốn gì thêm.
+"""
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+ENABLED = os.environ.get("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+_started_at = time.perf_counter()
+_original_import = builtins.__import__
+# name -> [inclusive_sec, self_sec]
+_imports: Dict[str, List[float]] = {}
+# Mỗi phần tử: [module name, thời gian của các import con]
+_stack: List[list] = []
+_steps: Dict[str, float] = {}
+_ready_at: Optional[float] = None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    frame = [name, 0.0]
+    _stack.append(frame)
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - started
+        _stack.pop()
+        if _stack:
+            _stack[-1][1] += elapsed
+        _imports.setdefault(name, [elapsed, elapsed - frame[1]])
+
+
+def install():
+    if ENABLED and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+def construct(factory: Callable[..., T], *args, **kwargs) -> T:
+    """Tạo singleton lúc import, ghi lại thời gian constructor khi đang profile"""
+    if not ENABLED:
+        return factory(*args, **kwargs)
+    with step(f"{getattr(factory, '__qualname__', factory)}()"):
+        return factory(*args, **kwargs)
+
+
+@contextmanager
+def step(name: str):
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps[name] = _steps.get(name, 0.0) + time.perf_counter() - started
+
+
+def mark_ready():
+    """Gọi khi app bắt đầu nhận request (cuối phần startup của lifespan)"""
+    global _ready_at
+    if _ready_at is None:
+        _ready_at = time.perf_counter()
+
+
+def report(top: int = 25) -> Dict[str, Any]:
+    def ms(seconds: float) -> float:
+        return round(seconds * 1000, 1)
+
+    by_inclusive = sorted(_imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    by_self = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return {
+        "enabled": ENABLED,
+        "ready_ms": ms(_ready_at - _started_at) if _ready_at else None,
+        "modules_imported": len(_imports),
+        "imports_inclusive_ms": {name: ms(times[0]) for name, times in by_inclusive},
+        "imports_self_ms": {name: ms(times[1]) for name, times in by_self},
+        "steps_ms": {name: ms(seconds) for name, seconds in sorted(_steps.items(), key=lambda item: -item[1])},
+    }
+
+
+def print_report(top: int = 25):
+    data = report(top)
+    print(f"⏱️ Startup profile: ready in {data['ready_ms']} ms, {data['modules_imported']} modules imported")
+    print("   Slowest imports (inclusive / self ms):")
+    for name, inclusive in data["imports_inclusive_ms"].items():
+        print(f"   {inclusive:>9.1f} / {_imports[name][1] * 1000:>7.1f}  {name}")
+    print("   Constructors / startup steps (ms):")
+    for name, elapsed in data["steps_ms"].items():
+        print(f"   {elapsed:>9.1f}  {name}")
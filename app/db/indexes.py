@@ -0,0 +1,166 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+from app.db.mongodb import db
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.exam_repository import ExamRepository
+from app.repositories.ingest_job_repository import IngestJobRepository
+from app.repositories.scenario_repository import ScenarioRepository
+from app.repositories.sentence_repository import SentenceRepository
+
+# Repository khai báo INDEXES / QUERIES / BACKFILLS (dict: collection -> list) ngay trong class
+REPOSITORIES = [ExamRepository, SentenceRepository, ScenarioRepository, ChatRepository, IngestJobRepository]
+
+
+class CollectionScanError(Exception):
+    """Query đã đăng ký trong registry phải quét toàn bộ collection (thiếu index)"""
+    pass
+
+
+def _collect(attribute: str) -> Dict[str, List[Any]]:
+    merged: Dict[str, List[Any]] = {}
+    for repository in REPOSITORIES:
+        for collection, items in getattr(repository, attribute, {}).items():
+            merged.setdefault(collection, []).extend(items)
+    return merged
+
+
+def ensure_indexes(database: Optional[Database] = None) -> Dict[str, List[str]]:
+    """
+    Backfill field phục vụ index cho document cũ rồi tạo index còn thiếu.
+    Chạy lại nhiều lần được: create_indexes bỏ qua index đã có cùng spec.
+    """
+    database = db if database is None else database
+    for collection, backfills in _collect("BACKFILLS").items():
+        for query, update in backfills:
+            result = database[collection].update_many(query, update)
+            if result.modified_count:
+                print(f"🩹 Backfilled {result.modified_count} documents in {collection}")
+    return {
+        collection: database[collection].create_indexes(models)
+        for collection, models in _collect("INDEXES").items()
+    }
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Tên các stage trong winningPlan (cả dạng classic lẫn SBE có queryPlan lồng bên trong)"""
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def explain_queries(database: Optional[Database] = None) -> List[Dict[str, Any]]:
+    database = db if database is None else database
+    results = []
+    for collection, filters in _collect("QUERIES").items():
+        for query in filters:
+            explain = database.command(
+                "explain", {"find": collection, "filter": query}, verbosity="queryPlanner"
+            )
+            stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+            results.append({
+                "collection": collection,
+                "filter": query,
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages,
+            })
+    return results
+
+
+def verify_query_plans(database: Optional[Database] = None) -> List[Dict[str, Any]]:
+    """Raise CollectionScanError nếu có query đăng ký nào bị COLLSCAN"""
+    results = explain_queries(database)
+    scans = [r for r in results if r["collscan"]]
+    if scans:
+        detail = "; ".join(f"{r['collection']} {r['filter']}" for r in scans)
+        raise CollectionScanError(f"{len(scans)} registered queries use COLLSCAN: {detail}")
+    return results
+
+
+def index_report(database: Optional[Database] = None) -> List[Dict[str, Any]]:
+    """Số document, dung lượng data và dung lượng từng index (bytes) của các collection trong registry"""
+    database = db if database is None else database
+    report = []
+    for collection in sorted(_collect("INDEXES")):
+        try:
+            stats = next(database[collection].aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+        except (OperationFailure, StopIteration):
+            # Collection chưa tồn tại
+            stats = {}
+        report.append({
+            "collection": collection,
+            "documents": stats.get("count", 0),
+            "data_size": stats.get("size", 0),
+            "total_index_size": stats.get("totalIndexSize", 0),
+            "index_sizes": stats.get("indexSizes", {}),
+        })
+    return report
+
+
+class IndexMaintenance:
+    """
+    ensure_indexes (+ verify nếu bật) chạy nền lúc startup để HTTP lên ngay cả khi Mongo chưa sẵn sàng.
+    Lỗi kết nối thì log và thử lại sau retry_interval; trạng thái báo qua /health/ready.
+    """
+
+    def __init__(self, retry_interval: float):
+        self.retry_interval = retry_interval
+        self.status = "idle"  # idle | running | ready | failed | disabled
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status in ("ready", "disabled")
+
+    def start(self):
+        if not settings.MONGO_ENSURE_INDEXES_ON_STARTUP:
+            self.status = "disabled"
+            return
+        if self._task is None:
+            self.status = "running"
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self.attempts += 1
+            try:
+                await run_in_threadpool(ensure_indexes)
+                if settings.MONGO_VERIFY_QUERY_PLANS_ON_STARTUP:
+                    await run_in_threadpool(verify_query_plans)
+                self.status = "ready"
+                self.error = None
+                return
+            except CollectionScanError as e:
+                # Thiếu index trong registry: thử lại cũng không khác
+                self.status = "failed"
+                self.error = str(e)
+                print(f"❌ {e}")
+                return
+            except Exception as e:
+                self.error = str(e)
+                print(f"⚠️ Ensure indexes failed (attempt {self.attempts}), retry in {self.retry_interval:.0f}s: {e}")
+            await asyncio.sleep(self.retry_interval)
+
+    def readiness(self) -> Dict[str, Any]:
+        return {"status": self.status, "error": self.error, "attempts": self.attempts}
+
+
+index_maintenance = IndexMaintenance(retry_interval=settings.MONGO_INDEX_RETRY_SEC)
@@ -1,11 +1,30 @@
+from pymongo import AsyncMongoClient
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from app.core.config import Settings
+from app.core import startup_profile
 
 config = Settings()
 MONGODB_URL = config.MONGO_URL
+DATABASE_NAME = 'EnglishApp'
 
-client = MongoClient(MONGODB_URL, server_api=ServerApi('1'))
+
+def client_options() -> dict:
+    """Pool size / timeout dùng chung cho cả client sync và async"""
+    return {
+        "server_api": ServerApi('1'),
+        "maxPoolSize": config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": config.MONGO_MAX_IDLE_TIME_MS or None,
+        "connectTimeoutMS": config.MONGO_CONNECT_TIMEOUT_MS or None,
+        "serverSelectionTimeoutMS": config.MONGO_SERVER_SELECTION_TIMEOUT_MS or None,
+        "socketTimeoutMS": config.MONGO_SOCKET_TIMEOUT_MS or None,
+        "waitQueueTimeoutMS": config.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+    }
+
+
+# Client sync: script, job ingest (chạy trong threadpool / thread nền)
+client = startup_profile.construct(MongoClient, MONGODB_URL, **client_options())
 
 # try:
 #     client.admin.command('ping')
@@ -13,4 +32,9 @@ client = MongoClient(MONGODB_URL, server_api=ServerApi('1'))
 # except Exception as e:
 #     print(e)
 
-db = client['EnglishApp']
+db = client[DATABASE_NAME]
+
+# Client async dùng chung cho các repository async (endpoint async def không chiếm thread của threadpool).
+# Chưa kết nối cho tới lần query đầu tiên; đóng trong lifespan shutdown
+async_client = startup_profile.construct(AsyncMongoClient, MONGODB_URL, **client_options())
+async_db = async_client[DATABASE_NAME]
@@ -0,0 +1,8 @@
+from enum import IntEnum
+
+class LLMPriority(IntEnum):
+    # Số nhỏ hơn được phục vụ trước khi hàng đợi LLM bị nghẽn
+    CONVERSATION = 0
+    FLASHCARD = 1
+    WRITING = 2
+    BACKGROUND = 3
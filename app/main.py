@@ -1,8 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.core import startup_profile
+from app.core.llm_governor import LLMRateLimitError
 
 # Import Service
-from app.services.lightrag_service import rag_service 
+from app.services.lightrag_service import rag_service, RagNotReadyError
+from app.services.ingest_job_service import ingest_job_service
+from app.db.indexes import index_maintenance
+from app.services.chat_turn_writer import chat_turn_writer
+from app.services.prompt_cache import system_prompt_cache
+from app.db.mongodb import db, async_client
 
 # Import các Router
 from app.api.sentence_router import routes as sentence_routes
@@ -14,16 +23,34 @@ from app.api.chatbot_router import router as chatbot_router
 from app.api.analysis import router as analysis_router
 from app.api.recommendation import router as recommendation_router
 from app.api.suggest_word import route as suggest_word_router
+from app.api.metrics_router import router as metrics_router
+from app.api.health_router import router as health_router
 from fastapi.middleware.cors import CORSMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 System starting up...")
-    await rag_service.initialize() #
+    # Không chờ graph/vector DB load xong: route không dùng RAG phục vụ được ngay
+    if settings.RAG_WARMUP_ON_STARTUP:
+        rag_service.start_warmup()
+    # Index khai báo trong các repository (+ backfill field phục vụ index): chạy nền, Mongo chưa lên thì thử lại
+    index_maintenance.start()
+    if settings.PROMPT_CACHE_WATCH_CHANGES:
+        system_prompt_cache.watch_changes(db)
+    with startup_profile.step("ingest_job_service.start()"):
+        await ingest_job_service.start()
+    startup_profile.mark_ready()
+    if startup_profile.ENABLED:
+        startup_profile.print_report()
     
     yield 
     
     print("🛑 System shutting down...")
+    # Chờ các lượt chat đang ghi nền xong trước khi tắt
+    await chat_turn_writer.drain(timeout=10)
+    await ingest_job_service.stop()
+    await index_maintenance.stop()
+    await async_client.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -37,6 +64,24 @@ app.add_middleware(
     allow_headers=["*"],  # Cho phép tất cả các header
 )
 
+# Hết quota / hàng đợi LLM quá tải -> 503 kèm Retry-After thay vì 500
+@app.exception_handler(LLMRateLimitError)
+async def llm_rate_limit_handler(request: Request, exc: LLMRateLimitError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5"}
+    )
+
+# RAG còn đang warm-up -> 503 kèm Retry-After
+@app.exception_handler(RagNotReadyError)
+async def rag_not_ready_handler(request: Request, exc: RagNotReadyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "rag": rag_service.readiness()},
+        headers={"Retry-After": "5"}
+    )
+
 # --- 3. INCLUDE ROUTERS ---
 app.include_router(sentence_routes)
 app.include_router(dashboard_router)
@@ -47,6 +92,8 @@ app.include_router(chatbot_router)
 app.include_router(analysis_router)
 app.include_router(recommendation_router)
 app.include_router(suggest_word_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
 async def root():
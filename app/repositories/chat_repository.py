@@ -1,61 +1,308 @@
-from app.db.mongodb import db
-from typing import Optional
+from app.db.mongodb import async_db
+from typing import Any, Dict, List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
 from app.schemas.error_analysis import ErrorAnalysis
 from datetime import datetime
 from app.schemas.chat_session import ChatSession
+from app.core.config import settings
 
 class ChatRepository:
-    def __init__(self):
-        self.collection = db['chat_sessions']
+    """
+    Tin nhắn lưu theo bucket trong collection chat_messages thay vì một mảng messages không giới hạn:
+    - Mỗi bucket: {session_id, bucket, count, messages: [{seq, ...}], turn_ids}; bucket cuối còn nhận tin nhắn
+      khi count < bucket_size (một lượt luôn nằm trọn trong một bucket nên bucket có thể vượt bucket_size chút ít)
+    - Một lượt = một update pipeline atomic trên bucket đang mở: seq tính từ seq lớn nhất trong bucket,
+      $concatArrays cả lượt và ghi turn_id cùng lúc -> không có bước giữ chỗ seq riêng nên không thể hở seq
+    - turn_id do client sinh: thử lại cùng turn_id (sau lỗi / mất ack) không ghi trùng, nên retry an toàn
+    - Lượt đọc session trả về bucket sẽ nhận lượt kế tiếp (bucket cuối, hoặc bucket mới nếu bucket cuối đã đầy);
+      gợi ý sai (writer khác chen vào) thì mới đọc lại bucket cuối rồi ghi
+    - message_count trên session chỉ đánh dấu session đã bucket hoá; số tin nhắn thật tính từ bucket cuối khi đọc
+    - Session cũ (mảng messages nhúng, chưa có message_count) vẫn đọc/ghi được cho tới khi chạy migrate
+    - Dùng client async: lượt chat không chiếm thread của threadpool
+    """
+    INDEXES = {
+        "chat_messages": [
+            IndexModel([("session_id", ASCENDING), ("bucket", ASCENDING)], unique=True),
+        ]
+    }
+    QUERIES = {
+        "chat_messages": [
+            {"session_id": ObjectId("000000000000000000000000")},
+            {"session_id": ObjectId("000000000000000000000000"), "turn_ids": "000000000000000000000000"},
+        ]
+    }
 
-    def create_new_session(self, new_session):
-        return self.collection.insert_one(new_session)
+    def __init__(self, bucket_size: int = settings.CHAT_MESSAGE_BUCKET_SIZE):
+        self.collection = async_db['chat_sessions']
+        self.messages = async_db['chat_messages']
+        self.bucket_size = bucket_size
 
-    def get_session(self, session_id: str) -> Optional[ChatSession]:
-        """Lấy chi tiết session để làm context cho AI"""
+    async def ensure_indexes(self):
+        await self.messages.create_indexes(self.INDEXES["chat_messages"])
+
+    async def create_new_session(self, new_session):
+        return await self.collection.insert_one(new_session)
+
+    async def get_session(self, session_id: str) -> Optional[ChatSession]:
+        """Lấy chi tiết session kèm toàn bộ lịch sử"""
+        return await self._load_session(session_id, last_n=None)
+
+    async def get_session_window(self, session_id: str, last_n: int) -> Optional[ChatSession]:
+        """
+        Metadata của session + last_n tin nhắn gần nhất.
+        Chỉ đọc các bucket cuối chứa cửa sổ đó (session cũ: $slice trên mảng nhúng),
+        nên session dài không làm chậm mỗi lượt.
+        """
+        return await self._load_session(session_id, last_n=max(last_n, 0))
+
+    async def _load_session(self, session_id: str, last_n: Optional[int]) -> Optional[ChatSession]:
         try:
-            doc = self.collection.find_one({"_id": ObjectId(session_id)})
+            _id = ObjectId(session_id)
+            if last_n is None:
+                projection = None
+            else:
+                projection = {"messages": {"$slice": -last_n} if last_n > 0 else 0}
+            doc = await self.collection.find_one({"_id": _id}, projection)
             if not doc:
                 return None
+            if "message_count" in doc:
+                doc["messages"], doc["message_count"], doc["open_bucket"] = await self._read_tail(_id, last_n)
             doc["_id"] = str(doc["_id"])
             return ChatSession(**doc)
         except Exception:
             return None
 
-    def add_user_message(self, session_id: str, content: str, analysis: Optional[ErrorAnalysis]):
+    async def _read_tail(self, session_id: ObjectId, last_n: Optional[int]) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Đọc bucket từ cuối về (last_n=None: toàn bộ) cho tới khi đủ cửa sổ.
+        Trả về (messages theo seq, message_count, bucket đang mở) — bucket đang mở làm gợi ý cho lần ghi kế tiếp:
+        bucket cuối nếu còn chỗ, không thì bucket kế tiếp (chưa tồn tại, seq bắt đầu từ message_count).
+        """
+        cursor = self.messages.find(
+            {"session_id": session_id}, {"bucket": 1, "count": 1, "messages": 1}
+        ).sort("bucket", DESCENDING)
+        if last_n is not None:
+            cursor = cursor.batch_size(last_n // self.bucket_size + 2)
+        messages: List[Dict[str, Any]] = []
+        message_count = 0
+        open_bucket = 0
+        first_seq = 0
+        latest = True
+        try:
+            async for bucket in cursor:
+                seqs = [m["seq"] for m in bucket["messages"]]
+                if latest:
+                    latest = False
+                    open_bucket = bucket["bucket"] + (bucket.get("count", 0) >= self.bucket_size)
+                    message_count = max(seqs, default=-1) + 1
+                    if last_n is not None:
+                        first_seq = max(message_count - last_n, 0)
+                    if last_n == 0:
+                        break
+                messages.extend(m for m in bucket["messages"] if m["seq"] >= first_seq)
+                if min(seqs, default=first_seq) <= first_seq:
+                    break
+        finally:
+            await cursor.close()
+        messages.sort(key=lambda m: m["seq"])
+        return messages, message_count, open_bucket
+
+    async def get_messages_range(self, session_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Tin nhắn có seq trong [start, end) của session đã bucket hoá"""
+        if end <= start:
+            return []
+        cursor = self.messages.find({"session_id": ObjectId(session_id)}, {"messages": 1}).sort("bucket", DESCENDING)
+        messages: List[Dict[str, Any]] = []
+        try:
+            async for bucket in cursor:
+                messages.extend(m for m in bucket["messages"] if start <= m["seq"] < end)
+                if min((m["seq"] for m in bucket["messages"]), default=start) <= start:
+                    break
+        finally:
+            await cursor.close()
+        return sorted(messages, key=lambda m: m["seq"])
+
+    async def update_summary(self, session_id: str, summary: str, upto: int, source_tokens: int, expected_upto: int) -> bool:
+        """
+        Lưu summary mới (bao phủ các tin nhắn seq < upto).
+        Chỉ ghi khi summary_upto vẫn là expected_upto để hai lần tóm tắt song song không ghi đè nhau.
+        """
+        current = expected_upto if expected_upto else {"$in": [0, None]}
+        result = await self.collection.update_one(
+            {"_id": ObjectId(session_id), "summary_upto": current},
+            {"$set": {"summary": summary, "summary_upto": upto, "summary_source_tokens": source_tokens}}
+        )
+        return result.modified_count > 0
+
+    def new_turn_id(self) -> str:
+        return str(ObjectId())
+
+    async def add_messages(self, session_id: str, messages: List[Dict[str, Any]], turn_id: Optional[str] = None,
+                           bucket: Optional[int] = None, next_seq: int = 0):
+        """
+        Ghi một loạt tin nhắn (theo thứ tự) vào cuối session.
+        bucket / next_seq: ChatSession.open_bucket / message_count lúc đọc session; đúng thì cả lượt chỉ tốn một lần ghi.
+        Idempotent theo turn_id: gọi lại với cùng turn_id thì không ghi thêm.
+        """
+        if not messages:
+            return
+        _id = ObjectId(session_id)
+        turn_id = turn_id or self.new_turn_id()
+        if bucket is not None and await self._append(_id, bucket, next_seq, messages, turn_id):
+            return
+        await self._append_slow(_id, messages, turn_id)
+
+    def _append_pipeline(self, start: int, messages: List[Dict[str, Any]], turn_id: str) -> List[Dict[str, Any]]:
+        # seq tiếp theo = seq lớn nhất trong bucket + 1 (bucket vừa tạo: start), tính cùng lúc với $concatArrays
+        # nên writer đồng thời không trùng seq. Nội dung tin nhắn bọc $literal để chuỗi bắt đầu bằng '$' không bị hiểu là field path
+        next_seq = {"$add": [{"$ifNull": [{"$max": "$messages.seq"}, start - 1]}, 1]}
+        return [{"$set": {
+            "messages": {"$concatArrays": [
+                {"$ifNull": ["$messages", []]},
+                [
+                    {"$mergeObjects": [{"$literal": message}, {"seq": {"$add": [next_seq, offset]}}]}
+                    for offset, message in enumerate(messages)
+                ],
+            ]},
+            "count": {"$add": [{"$ifNull": ["$count", 0]}, len(messages)]},
+            "turn_ids": {"$concatArrays": [{"$ifNull": ["$turn_ids", []]}, [turn_id]]},
+        }}]
+
+    async def _append(self, session_id: ObjectId, bucket: int, start: int, messages: List[Dict[str, Any]], turn_id: str) -> bool:
+        """
+        Nối cả lượt vào bucket nếu bucket còn mở và chưa có turn_id này; bucket chưa có thì tạo (upsert), seq bắt đầu từ start.
+        False nếu không ghi (bucket đã đầy hoặc đã có lượt này).
+        Tạo bucket b+1 chỉ đúng khi bucket b đã đầy: bucket đầy không nhận thêm tin nhắn nên start không đổi nữa.
+        """
+        query = {
+            "session_id": session_id,
+            "bucket": bucket,
+            "count": {"$lt": self.bucket_size},
+            "turn_ids": {"$ne": turn_id},
+        }
+        try:
+            result = await self.messages.update_one(
+                query, self._append_pipeline(start, messages, turn_id), upsert=True
+            )
+        except DuplicateKeyError:
+            # Bucket đã có nhưng không khớp filter (đầy hoặc đã có lượt này), hoặc writer khác vừa tạo
+            return False
+        return bool(result.matched_count or result.upserted_id)
+
+    async def _append_slow(self, session_id: ObjectId, messages: List[Dict[str, Any]], turn_id: str):
+        """Gợi ý bucket sai / thiếu: xem lượt đã ghi chưa, session đã bucket hoá chưa, rồi ghi vào bucket cuối hoặc bucket mới"""
+        while True:
+            if await self.messages.count_documents({"session_id": session_id, "turn_ids": turn_id}, limit=1):
+                # Lần thử trước đã ghi (có thể đã mất ack)
+                return
+            session = await self.collection.find_one({"_id": session_id}, {"message_count": 1})
+            if session is None:
+                return
+            if "message_count" not in session:
+                # Session cũ chưa migrate: vẫn $push vào mảng nhúng, turn_id chặn ghi trùng khi retry.
+                # Không khớp mà session vẫn là dạng cũ -> lượt đã được ghi; đã migrate -> thử lại nhánh bucket
+                result = await self.collection.update_one(
+                    {"_id": session_id, "message_count": {"$exists": False}, "messages.turn_id": {"$ne": turn_id}},
+                    {
+                        "$push": {"messages": {"$each": [{**message, "turn_id": turn_id} for message in messages]}},
+                        "$set": {"updated_at": datetime.now()}
+                    }
+                )
+                if result.matched_count or await self.collection.count_documents(
+                    {"_id": session_id, "message_count": {"$exists": False}}, limit=1
+                ):
+                    return
+                continue
+
+            last = await self.messages.find_one(
+                {"session_id": session_id},
+                {"bucket": 1, "count": 1, "messages.seq": 1},
+                sort=[("bucket", DESCENDING)]
+            )
+            if last is None:
+                bucket, start = 0, 0
+            elif last.get("count", 0) < self.bucket_size:
+                bucket, start = last["bucket"], 0
+            else:
+                # Bucket cuối đã đầy -> mở bucket mới, seq nối tiếp seq lớn nhất của bucket cuối
+                bucket = last["bucket"] + 1
+                start = max((m["seq"] for m in last["messages"]), default=-1) + 1
+            if await self._append(session_id, bucket, start, messages, turn_id):
+                return
+
+    async def add_turn(self, session_id: str, user_content: str, analysis: Optional[ErrorAnalysis], ai_content: str,
+                       turn_id: Optional[str] = None, bucket: Optional[int] = None, next_seq: int = 0):
         """
-        Lưu tin nhắn của User kèm kết quả phân tích lỗi từ AI.
-        Dùng $push để atomic update.
+        Lưu cả lượt chat (tin nhắn User + câu trả lời AI) bằng một lần ghi atomic vào bucket đang mở.
+        Truyền cùng turn_id khi thử lại để không ghi trùng; bucket / next_seq lấy từ ChatSession đọc ở đầu lượt.
         """
-        message_data = {
+        now = datetime.now()
+        await self.add_messages(session_id, [
+            {
+                "role": "user",
+                "content": user_content,
+                "timestamp": now,
+                "analysis": analysis.model_dump() if analysis else None
+            },
+            {
+                "role": "model",
+                "content": ai_content,
+                "timestamp": now
+            }
+        ], turn_id=turn_id, bucket=bucket, next_seq=next_seq)
+
+    async def add_user_message(self, session_id: str, content: str, analysis: Optional[ErrorAnalysis]):
+        """Lưu tin nhắn của User kèm kết quả phân tích lỗi từ AI."""
+        await self.add_messages(session_id, [{
             "role": "user",
             "content": content,
             "timestamp": datetime.now(),
             # Convert Pydantic object sang dict nếu có
             "analysis": analysis.model_dump() if analysis else None
-        }
+        }])
 
-        self.collection.update_one(
-            {"_id": ObjectId(session_id)},
-            {
-                "$push": {"messages": message_data},
-                "$set": {"updated_at": datetime.now()}
-            }
-        )
-
-    def add_ai_message(self, session_id: str, content: str):
+    async def add_ai_message(self, session_id: str, content: str):
         """Lưu câu trả lời của AI"""
-        message_data = {
+        await self.add_messages(session_id, [{
             "role": "model",
             "content": content,
             "timestamp": datetime.now()
-        }
+        }])
 
-        self.collection.update_one(
-            {"_id": ObjectId(session_id)},
-            {
-                "$push": {"messages": message_data},
-                "$set": {"updated_at": datetime.now()}
-            }
-        )
\ No newline at end of file
+    async def migrate_session(self, session_id: ObjectId) -> Optional[int]:
+        """
+        Chuyển mảng messages nhúng của một session cũ sang chat_messages.
+        Trả về số tin nhắn đã chuyển, None nếu session không cần migrate.
+        Nếu có tin nhắn mới được $push vào giữa chừng thì làm lại từ đầu.
+        """
+        while True:
+            doc = await self.collection.find_one(
+                {"_id": session_id, "message_count": {"$exists": False}},
+                {"messages": 1}
+            )
+            if doc is None:
+                return None
+            messages = doc.get("messages") or []
+            await self.messages.delete_many({"session_id": session_id})
+            buckets: Dict[int, List[Dict[str, Any]]] = {}
+            for seq, message in enumerate(messages):
+                buckets.setdefault(seq // self.bucket_size, []).append({**message, "seq": seq})
+            if buckets:
+                await self.messages.insert_many([
+                    {"session_id": session_id, "bucket": bucket, "count": len(items), "messages": items}
+                    for bucket, items in buckets.items()
+                ])
+            # Chỉ chốt khi mảng nhúng không đổi kể từ lúc đọc
+            unchanged = {"$size": len(messages)} if "messages" in doc else {"$exists": False}
+            result = await self.collection.update_one(
+                {"_id": session_id, "message_count": {"$exists": False}, "messages": unchanged},
+                {"$set": {"message_count": len(messages)}, "$unset": {"messages": ""}}
+            )
+            if result.modified_count:
+                return len(messages)
+
+    async def find_legacy_session_ids(self) -> List[ObjectId]:
+        docs = await self.collection.find({"message_count": {"$exists": False}}, {"_id": 1}).to_list(None)
+        return [doc["_id"] for doc in docs]
@@ -1,27 +1,82 @@
-from app.db.mongodb import db
+from app.db.mongodb import async_db
 from bson import ObjectId
 from bson.errors import InvalidId
+from pymongo import ASCENDING, IndexModel
+
+EXAM_PARTS = ("Part1", "Part2", "Part3", "Part4", "Part5", "Part6", "Part7")
+
+# Projection cho màn danh sách: không kéo 200 câu hỏi / transcript / explanation về
+SUMMARY_PROJECTION = {"exam_title": 1}
+
+# Danh sách part của exam ("Part1".."Part7"), tính từ key của object parts
+PART_NAMES_EXPR = {"$map": {"input": {"$objectToArray": "$parts"}, "as": "part", "in": "$$part.k"}}
 
 class ExamRepository:
+    COLLECTION = 'toeic_exams'
+    # Index registry (app/db/indexes.py): ensure lúc startup hoặc python -m scripts.manage_indexes
+    # parts.<PartN> là object lớn, không index được hiệu quả -> lọc theo part qua field part_names
+    INDEXES = {
+        COLLECTION: [
+            IndexModel([("exam_title", ASCENDING)]),
+            IndexModel([("part_names", ASCENDING)]),
+        ]
+    }
+    # Query mẫu cho explain check: không được COLLSCAN
+    QUERIES = {
+        COLLECTION: [
+            {"exam_title": "ETS 2024 Test 1"},
+            {"part_names": "Part1"},
+        ]
+    }
+    # Backfill field phục vụ index cho document cũ / được import thẳng vào Mongo: (filter, update pipeline)
+    BACKFILLS = {
+        COLLECTION: [
+            ({"part_names": {"$exists": False}}, [{"$set": {"part_names": PART_NAMES_EXPR}}]),
+        ]
+    }
+
     def __init__(self):
-        self.collection = db['toeic_exams']
+        self.collection = async_db[self.COLLECTION]
+
+    async def find_all(self):
+        return await self.collection.find().to_list(None)
 
-    def find_all(self):
-        return list(self.collection.find())
+    async def find_summaries(self):
+        """Chỉ _id + exam_title của mọi exam"""
+        return await self.collection.find({}, SUMMARY_PROJECTION).to_list(None)
     
-    def find_by_title(self, title: str):
-        return self.collection.find_one({'exam_title': title})
+    async def find_by_title(self, title: str):
+        return await self.collection.find_one({'exam_title': title})
     
-    def find_by_id(self, exam_id: str):
+    async def find_by_id(self, exam_id: str):
         try:
             obj_id = ObjectId(exam_id)
         except InvalidId:
             return None
-        return self.collection.find_one({'_id': obj_id})
+        return await self.collection.find_one({'_id': obj_id})
     
-    def find_by_part(self, part_name: str):
-        return list(self.collection.find({f'parts.{part_name}': {'$exists': True}}))
+    async def find_by_part(self, part_name: str):
+        """Các exam có part_name, mỗi exam chỉ kèm exam_title và nội dung của part đó"""
+        if part_name not in EXAM_PARTS:
+            return []
+        return await self.collection.find(
+            {'part_names': part_name},
+            {**SUMMARY_PROJECTION, f'parts.{part_name}': 1}
+        ).to_list(None)
+
+    async def find_questions(self, exam_id: str, part_names):
+        """
+        Chỉ mảng questions của các part cần chấm (bỏ group_content: audio, ảnh, đoạn văn).
+        Document trả về giữ nguyên cấu trúc parts -> groups -> questions.
+        """
+        try:
+            obj_id = ObjectId(exam_id)
+        except InvalidId:
+            return None
+        projection = {f'parts.{part}.questions': 1 for part in part_names if part in EXAM_PARTS}
+        return await self.collection.find_one({'_id': obj_id}, projection or {'_id': 1})
     
-    def save(self, exam_data: dict):
-        result = self.collection.insert_one(exam_data)
-        return str(result.inserted_id)
\ No newline at end of file
+    async def save(self, exam_data: dict):
+        exam_data['part_names'] = list((exam_data.get('parts') or {}).keys())
+        result = await self.collection.insert_one(exam_data)
+        return str(result.inserted_id)
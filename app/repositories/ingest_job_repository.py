@@ -0,0 +1,125 @@
+from app.db.mongodb import db
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from app.enums.enum_job_status import JobStatus
+from app.schemas.ingest_job import IngestJob
+
+class IngestJobRepository:
+    INDEXES = {
+        "ingest_jobs": [
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+        ],
+        "ingest_job_documents": [
+            IndexModel([("job_id", ASCENDING), ("seq", ASCENDING)]),
+        ],
+    }
+    QUERIES = {
+        "ingest_jobs": [
+            {"status": JobStatus.QUEUED.value},
+        ],
+        "ingest_job_documents": [
+            {"job_id": ObjectId("000000000000000000000000"), "seq": {"$gte": 0}},
+        ],
+    }
+
+    def __init__(self):
+        self.collection = db['ingest_jobs']
+        # Nội dung tài liệu tách riêng để job lớn không vượt giới hạn 16MB của một document
+        self.documents = db['ingest_job_documents']
+
+    def new_job_id(self) -> ObjectId:
+        return ObjectId()
+
+    def add_documents(self, job_id: ObjectId, start: int, documents: List[Tuple[str, str]]):
+        if not documents:
+            return
+        self.documents.insert_many([
+            {"job_id": job_id, "seq": start + i, "file_path": file_path, "text": text}
+            for i, (file_path, text) in enumerate(documents)
+        ])
+
+    def create_job(self, job_id: ObjectId, total_documents: int):
+        now = datetime.now()
+        self.collection.insert_one({
+            "_id": job_id,
+            "status": JobStatus.QUEUED.value,
+            "total_documents": total_documents,
+            "position": 0,
+            "attempts": 0,
+            "failed_files": [],
+            "report": None,
+            "error": None,
+            "created_at": now,
+            "heartbeat_at": now,
+        })
+
+    def delete_job(self, job_id: ObjectId):
+        self.collection.delete_one({"_id": job_id})
+        self.documents.delete_many({"job_id": job_id})
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        try:
+            doc = self.collection.find_one({"_id": ObjectId(job_id)})
+        except Exception:
+            return None
+        if not doc:
+            return None
+        doc["_id"] = str(doc["_id"])
+        return IngestJob(**doc)
+
+    def claim_next_job(self, worker_id: str, stale_after: float) -> Optional[dict]:
+        """
+        Lấy job cũ nhất đang chờ (hoặc job 'running' mất heartbeat do worker chết) một cách atomic,
+        nên nhiều process chạy worker cùng lúc cũng không xử lý trùng một job.
+        """
+        now = datetime.now()
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": JobStatus.QUEUED.value},
+                {"status": JobStatus.RUNNING.value, "heartbeat_at": {"$lt": now - timedelta(seconds=stale_after)}},
+            ]},
+            {
+                "$set": {"status": JobStatus.RUNNING.value, "worker_id": worker_id, "started_at": now, "heartbeat_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def read_documents(self, job_id: ObjectId, start: int, limit: int) -> List[Tuple[str, str]]:
+        """Một trang tài liệu của job theo seq (từ start), để đọc dần thay vì nạp cả job vào RAM"""
+        cursor = (
+            self.documents.find({"job_id": job_id, "seq": {"$gte": start}}, {"file_path": 1, "text": 1})
+            .sort("seq", ASCENDING)
+            .limit(limit)
+        )
+        return [(doc["file_path"], doc["text"]) for doc in cursor]
+
+    def heartbeat(self, job_id: ObjectId, worker_id: str):
+        self.collection.update_one(
+            {"_id": job_id, "worker_id": worker_id},
+            {"$set": {"heartbeat_at": datetime.now()}}
+        )
+
+    def save_progress(self, job_id: ObjectId, worker_id: str, position: int, failed_files: List[str], report: dict):
+        self.collection.update_one(
+            {"_id": job_id, "worker_id": worker_id},
+            {"$set": {
+                "position": position,
+                "failed_files": failed_files,
+                "report": report,
+                "heartbeat_at": datetime.now(),
+            }}
+        )
+
+    def finish_job(self, job_id: ObjectId, worker_id: str, status: JobStatus, report: Optional[dict] = None, error: Optional[str] = None):
+        fields = {"status": status.value, "finished_at": datetime.now(), "error": error}
+        if report is not None:
+            fields["report"] = report
+        result = self.collection.update_one({"_id": job_id, "worker_id": worker_id}, {"$set": fields})
+        # Job đã kết thúc: nội dung tài liệu không còn dùng nữa.
+        # Chỉ xoá khi worker này vẫn giữ job (job bị claim lại thì worker mới còn cần đọc)
+        if result.matched_count:
+            self.documents.delete_many({"job_id": job_id})
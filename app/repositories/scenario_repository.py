@@ -1,33 +1,46 @@
-from app.db.mongodb import db
+from app.db.mongodb import async_db
 from app.schemas.request.scenario_request import ScenarioModel
+from pymongo import ASCENDING, IndexModel
 
 class ScenarioRepository:
+    COLLECTION = 'scenarios'
+    INDEXES = {
+        COLLECTION: [
+            IndexModel([("available_variants", ASCENDING)]),
+        ]
+    }
+    QUERIES = {
+        COLLECTION: [
+            {"$or": [{"available_variants": []}, {"available_variants": "v_us"}]},
+        ]
+    }
+
     def __init__(self):
-        self.collection = db['scenarios']
+        self.collection = async_db[self.COLLECTION]
 
-    def find_all(self):
-        return self.collection.find()
+    async def find_all(self):
+        return await self.collection.find().to_list(None)
     
-    def save(self, request: ScenarioModel):
+    async def save(self, request: ScenarioModel):
         scenario = request.model_dump(by_alias=True)
-        self.collection.insert_one(scenario)
+        await self.collection.insert_one(scenario)
         return scenario
     
-    def find_all_by_variant(self, variant_id: str):
+    async def find_all_by_variant(self, variant_id: str):
         query = {
             "$or": [
                 {"available_variants": []}, 
                 {"available_variants": "v_us"}
             ]
         }
-        return self.collection.find(query).to_list()
+        return await self.collection.find(query).to_list(None)
     
-    def get_scenario_context_details(self, scenario_id: str, context_id: str):
+    async def get_scenario_context_details(self, scenario_id: str, context_id: str):
         """
         Lấy tên Scenario và mô tả chi tiết của Context
         Vì Context nhúng trong Scenario nên phải query Scenario trước
         """
-        doc = self.collection.find_one({"_id": scenario_id})
+        doc = await self.collection.find_one({"_id": scenario_id})
         if not doc:
             return "Unknown Scenario", "General Conversation"
         
@@ -1,32 +1,51 @@
-from app.db.mongodb import db
+from app.db.mongodb import async_db
+from pymongo import ASCENDING, IndexModel
 
 class SentenceRepository:
+    COLLECTION = 'Sentences'
+    # (topic, level) phục vụ lọc theo topic (prefix) và topic + level; (level, topic) cho lọc theo level
+    INDEXES = {
+        COLLECTION: [
+            IndexModel([("topic", ASCENDING), ("level", ASCENDING)]),
+            IndexModel([("level", ASCENDING), ("topic", ASCENDING)]),
+            IndexModel([("id", ASCENDING)]),
+        ]
+    }
+    QUERIES = {
+        COLLECTION: [
+            {"topic": "Travel"},
+            {"level": "Beginner"},
+            {"topic": "Travel", "level": "Beginner"},
+            {"id": "1"},
+        ]
+    }
+
     def __init__(self):
-        self.collection = db['Sentences']
+        self.collection = async_db[self.COLLECTION]
 
-    def find_all(self):
-        return list(self.collection.find())
+    async def find_all(self):
+        return await self.collection.find().to_list(None)
     
-    def find_by_level(self, level: str):
-        return list(self.collection.find({'level': level.capitalize()}))
+    async def find_by_level(self, level: str):
+        return await self.collection.find({'level': level.capitalize()}).to_list(None)
     
-    def find_by_id(self, sentence_id: str):
-        return self.collection.find_one({'id': sentence_id})
+    async def find_by_id(self, sentence_id: str):
+        return await self.collection.find_one({'id': sentence_id})
     
-    def find_by_topic(self, topic: str):
-        return list(self.collection.find({'topic': topic.capitalize()}))
+    async def find_by_topic(self, topic: str):
+        return await self.collection.find({'topic': topic.capitalize()}).to_list(None)
     
-    def find_sentences_by_topic_and_level(self, topic: str, level: str):
-        return list(self.collection.find({'topic': topic.capitalize(), 'level': level.capitalize()}))
+    async def find_sentences_by_topic_and_level(self, topic: str, level: str):
+        return await self.collection.find({'topic': topic.capitalize(), 'level': level.capitalize()}).to_list(None)
     
-    def find_topics(self):
-        return self.collection.distinct('topic')
+    async def find_topics(self):
+        return await self.collection.distinct('topic')
     
-    def find_levels(self):
-        return self.collection.distinct('level')
+    async def find_levels(self):
+        return await self.collection.distinct('level')
     
-    def find_sets(self):
-        return list(self.collection.aggregate([
+    async def find_sets(self):
+        cursor = await self.collection.aggregate([
             {
                 "$group": {
                     "_id": {
@@ -38,14 +57,15 @@ class SentenceRepository:
                     }
                 }
             }
-        ]))
+        ])
+        return await cursor.to_list(None)
     
-    def get_topics_by_level(self, level: str):
-        return self.collection.distinct('topic', {'level': level.capitalize()})
+    async def get_topics_by_level(self, level: str):
+        return await self.collection.distinct('topic', {'level': level.capitalize()})
     
-    def get_levels_by_topic(self, topic: str):
-        return self.collection.distinct('level', {'topic': topic.capitalize()})
+    async def get_levels_by_topic(self, topic: str):
+        return await self.collection.distinct('level', {'topic': topic.capitalize()})
     
-    def save(self, sentence_data: dict):
-        result = self.collection.insert_one(sentence_data)
-        return str(result.inserted_id)
\ No newline at end of file
+    async def save(self, sentence_data: dict):
+        result = await self.collection.insert_one(sentence_data)
+        return str(result.inserted_id)
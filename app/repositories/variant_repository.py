@@ -1,22 +1,22 @@
-from app.db.mongodb import db
+from app.db.mongodb import async_db
 from app.schemas.request.variant_request import VariantRequest
 
 class VariantRepository:
     def __init__(self):
-        self.collection = db["variants"]
+        self.collection = async_db["variants"]
 
-    def find_all(self):
-        return list(self.collection.find())
+    async def find_all(self):
+        return await self.collection.find().to_list(None)
     
-    def save(self, request: VariantRequest):
+    async def save(self, request: VariantRequest):
         variant = request.model_dump(by_alias=True)
-        self.collection.insert_one(variant)
+        await self.collection.insert_one(variant)
         return variant
     
-    def get_variant_instruction(self, variant_id: str) -> str:
+    async def get_variant_instruction(self, variant_id: str) -> str:
         """Lấy hướng dẫn system instruction của giọng (VD: Anh Mỹ)"""
         # Giả sử variant_id lưu trong DB là string "v_us" hoặc ObjectId
-        doc = self.collection.find_one({"_id": variant_id})
+        doc = await self.collection.find_one({"_id": variant_id})
         if doc:
             return doc.get("system_instruction", "Speak standard English.")
         return "Speak standard English."
\ No newline at end of file
@@ -12,6 +12,14 @@ class ChatSession(BaseModel):
     created_at: datetime 
     updated_at: datetime
     messages: List[MessageItem] = []
+    # Tổng số tin nhắn (session lưu theo bucket); None với session cũ chưa migrate
+    message_count: Optional[int] = None
+    # Bucket nhận lượt kế tiếp lúc đọc (gợi ý để lượt đó chỉ tốn một lần ghi); None với session cũ chưa migrate
+    open_bucket: Optional[int] = None
+    # Rolling summary của các tin nhắn seq < summary_upto (đã ra khỏi cửa sổ lịch sử)
+    summary: Optional[str] = None
+    summary_upto: int = 0
+    summary_source_tokens: int = 0
 
     class Config:
         populate_by_name = True
\ No newline at end of file
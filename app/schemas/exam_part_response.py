@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import List
+from app.schemas.group_response import GroupResponse
+
+class ExamPartResponse(BaseModel):
+    exam_id: str
+    exam_title: str
+    part_name: str
+    groups: List[GroupResponse]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from app.enums.enum_job_status import JobStatus
+
+class IngestJob(BaseModel):
+    id: str = Field(alias="_id")
+    status: JobStatus
+    total_documents: int
+    position: int = 0
+    attempts: int = 0
+    failed_files: List[str] = []
+    report: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
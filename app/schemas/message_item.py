@@ -7,4 +7,6 @@ class MessageItem(BaseModel):
     role: str 
     content: str
     timestamp: datetime
-    analysis: Optional[ErrorAnalysis] = None 
\ No newline at end of file
+    analysis: Optional[ErrorAnalysis] = None
+    # Thứ tự trong session (chỉ có với session lưu theo bucket)
+    seq: Optional[int] = None 
\ No newline at end of file
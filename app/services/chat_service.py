@@ -2,24 +2,31 @@ from app.repositories.chat_repository import ChatRepository
 from app.schemas.request.create_session_request import CreateSessionRequest
 from datetime import datetime
 from app.core.ai_provider import get_gemini_provider
-import os
-from dotenv import load_dotenv
+from app.core.config import settings
 from app.schemas.conversation_response import ConversationResponse
 from app.repositories.scenario_repository import ScenarioRepository
 from app.repositories.variant_repository import VariantRepository
+from app.utils.json_stream import JsonStringFieldStreamer
+from app.services.chat_turn_writer import chat_turn_writer
+from app.services.prompt_cache import system_prompt_cache
+from app.services.conversation_summarizer import conversation_summarizer
+from app.schemas.chat_session import ChatSession
+from app.utils.token_budget import estimate_tokens, message_tokens, trim_history
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL', '')
+GEMINI_API_KEY = settings.GEMINI_API_KEY
+GEMINI_MODEL = settings.GEMINI_MODEL
 
 class ChatService:
     def __init__(self):
         self.chatRepository = ChatRepository()
         self.scenarioRepository = ScenarioRepository()
         self.variantRepository = VariantRepository()
+        self.turn_writer = chat_turn_writer
+        self.prompt_cache = system_prompt_cache
+        self.summarizer = conversation_summarizer
         self.client = get_gemini_provider(GEMINI_API_KEY, GEMINI_MODEL)
 
-    def create_new_session(self, req: CreateSessionRequest):
+    async def create_new_session(self, req: CreateSessionRequest):
         new_session = {
             "user_id": req.user_id,
             "variant_id": req.variant_id,
@@ -27,10 +34,11 @@ class ChatService:
             "context_id": req.context_id,
             "created_at": datetime.now(),
             "updated_at": datetime.now(),
-            "messages": [] # Bắt đầu với mảng rỗng
+            # Tin nhắn nằm trong chat_messages (bucket), session chỉ giữ bộ đếm
+            "message_count": 0
         }
 
-        result = self.chatRepository.create_new_session(new_session=new_session)
+        result = await self.chatRepository.create_new_session(new_session=new_session)
 
         return {
             "status": "success",
@@ -40,54 +48,122 @@ class ChatService:
     def check_health(self):
         return self.client.check_health()
     
-    def process_chat_message(self, session_id: str, user_message: str):
+    async def process_chat_message(self, session_id: str, user_message: str):
+        history_context, system_instruction, session = await self._prepare_turn(session_id, user_message)
+
+        # 5. Gọi AI Provider (Trả về Pydantic Object)
+        ai_response_model = await self.client.agenerate_chat_response(
+            history=history_context,
+            system_instruction=system_instruction,
+            response_schema=ConversationResponse 
+        )
+
+        # 6. Lưu xuống DB (Repo)
+        await self._save_turn(session, user_message, ai_response_model)
+
+        return ai_response_model
+
+    async def stream_chat_message(self, session_id: str, user_message: str):
+        """
+        Bản streaming của process_chat_message, yield từng cặp (event, data):
+        - ("delta", {"text": ...}): phần text của field `response` ngay khi model sinh ra
+        - ("final", ConversationResponse): analysis/alternatives/translation khi JSON hoàn tất
+        """
+        history_context, system_instruction, session = await self._prepare_turn(session_id, user_message)
+
+        # Field `response` đứng đầu schema nên được model sinh ra trước
+        streamer = JsonStringFieldStreamer("response")
+        async for chunk in self.client.astream_chat_response(
+            history=history_context,
+            system_instruction=system_instruction,
+            response_schema=ConversationResponse
+        ):
+            delta = streamer.feed(chunk)
+            if delta:
+                yield "delta", {"text": delta}
+
+        ai_response_model = ConversationResponse.model_validate_json(streamer.text)
+        await self._save_turn(session, user_message, ai_response_model)
+
+        yield "final", ai_response_model.model_dump()
+
+    async def _prepare_turn(self, session_id: str, user_message: str):
+        """Trả về (history_context, system_instruction, session) cho lượt chat mới"""
         # 1. Lấy Session & Lịch sử từ Repo
-        session = self.chatRepository.get_session(session_id)
+        # Lượt trước có thể còn đang ghi nền -> chờ để không đọc thiếu lịch sử
+        await self.turn_writer.wait_session(session_id)
+        # Chỉ lấy CHAT_HISTORY_WINDOW tin nhắn cuối ($slice), session dài không làm chậm mỗi lượt
+        session = await self.chatRepository.get_session_window(session_id, settings.CHAT_HISTORY_WINDOW)
         if not session:
             raise ValueError("Session not found")
 
-        # 2. Lấy 10 tin nhắn gần nhất để làm context
+        # 2. Lịch sử gần nhất làm context, bỏ các tin nhắn đã nằm trong summary
         # Convert model DB sang format {'role': '...', 'content': '...'}
-        history_context = self._format_history(session.messages[-10:])
+        recent = [m for m in session.messages if m.seq is None or m.seq >= session.summary_upto]
+        history_context = self._format_history(recent)
 
-        variant_instruction = self.variantRepository.get_variant_instruction(session.variant_id)
-        scenario_name, context_desc = self.scenarioRepository.get_scenario_context_details(
-            session.scenario_id, 
-            session.context_id
-        )
-        
         # 3. Thêm tin nhắn mới của user vào context gửi đi
         history_context.append({"role": "user", "content": user_message})
 
-        # 4. Xây dựng System Prompt (Dynamic theo Scenario của session)
-        system_instruction = self._build_enhanced_prompt(
-            scenario_name=scenario_name,
-            context_desc=context_desc,
-            variant_instruction=variant_instruction
+        # Giới hạn summary + lịch sử trong CHAT_PROMPT_TOKEN_BUDGET (bỏ tin nhắn cũ nhất trước)
+        summary_tokens = estimate_tokens(session.summary or "")
+        history_context, dropped_tokens = trim_history(
+            history_context, settings.CHAT_PROMPT_TOKEN_BUDGET - summary_tokens
         )
-
-        # 5. Gọi AI Provider (Trả về Pydantic Object)
-        ai_response_model = self.client.generate_chat_response(
-            history=history_context,
-            system_instruction=system_instruction,
-            response_schema=ConversationResponse 
+        # Tin nhắn bị cắt theo budget không được gửi và chưa nằm trong summary -> tóm tắt ngay trong nền
+        dropped_count = len(recent) - (len(history_context) - 1)
+        if dropped_count > 0 and recent[dropped_count - 1].seq is not None:
+            self.summarizer.maybe_schedule(session, upto=recent[dropped_count - 1].seq + 1)
+
+        # 4. System Prompt (Dynamic theo Scenario của session): lấy từ cache, chỉ query catalog khi miss
+        system_instruction = await self.prompt_cache.get_or_build(
+            (session.variant_id, session.scenario_id, session.context_id),
+            lambda: self._compile_system_prompt(session.variant_id, session.scenario_id, session.context_id)
         )
-
-        # 6. Lưu xuống DB (Repo)
-        # Lưu tin nhắn User (kèm analysis từ AI)
-        self.chatRepository.add_user_message(
-            session_id, 
-            content=user_message, 
-            analysis=ai_response_model.analysis
+        if session.summary:
+            system_instruction += f"\n**CONVERSATION SO FAR (summary of earlier turns):**\n{session.summary}\n"
+
+        # Tiết kiệm so với gửi nguyên văn toàn bộ lịch sử: phần đã tóm tắt + phần bị cắt theo budget
+        prompt_tokens = estimate_tokens(system_instruction) + sum(message_tokens(m) for m in history_context)
+        self.summarizer.record_turn(prompt_tokens, session.summary_source_tokens - summary_tokens + dropped_tokens)
+        return history_context, system_instruction, session
+
+    async def _compile_system_prompt(self, variant_id: str, scenario_id: str, context_id: str) -> str:
+        # Catalog đọc qua client async, không chiếm thread của threadpool
+        variant_instruction = await self.variantRepository.get_variant_instruction(variant_id)
+        scenario_name, context_desc = await self.scenarioRepository.get_scenario_context_details(
+            scenario_id,
+            context_id
         )
-        
-        # Lưu tin nhắn AI
-        self.chatRepository.add_ai_message(
-            session_id, 
-            content=ai_response_model.response
+        return self._build_enhanced_prompt(
+            scenario_name=scenario_name,
+            context_desc=context_desc,
+            variant_instruction=variant_instruction
         )
 
-        return ai_response_model
+    async def _save_turn(self, session: ChatSession, user_message: str, ai_response_model: ConversationResponse):
+        session_id = session.id
+        # Cả lượt (tin nhắn User kèm analysis + câu trả lời AI) là một lần ghi vào bucket đang mở lúc đọc session.
+        # turn_id sinh một lần ở đây: ChatTurnWriter thử lại write() không ghi trùng
+        turn_id = self.chatRepository.new_turn_id()
+        async def write():
+            await self.chatRepository.add_turn(
+                session_id,
+                user_content=user_message,
+                analysis=ai_response_model.analysis,
+                ai_content=ai_response_model.response,
+                turn_id=turn_id,
+                bucket=session.open_bucket,
+                next_seq=session.message_count or 0
+            )
+
+        if settings.CHAT_BACKGROUND_WRITES:
+            # Trả lời user ngay, ghi Mongo chạy nền (có retry, lost write được đếm trong metrics)
+            self.turn_writer.submit(session_id, write)
+        else:
+            await self.turn_writer.write(session_id, write)
+        # Đủ K lượt ngoài cửa sổ lịch sử -> cập nhật rolling summary trong nền
+        self.summarizer.maybe_schedule(session)
 
     def _format_history(self, db_messages):
         return [{"role": m.role, "content": m.content} for m in db_messages]
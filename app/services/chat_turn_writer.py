@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+
+
+class ChatTurnWriter:
+    """
+    Ghi lượt chat xuống Mongo ngoài đường trả lời (write-behind):
+    - Mỗi session ghi tuần tự theo thứ tự lượt; lượt sau đọc lịch sử thì chờ lần ghi đang dở của session đó
+    - Lỗi thì thử lại với backoff lũy thừa (write phải idempotent, VD ChatRepository.add_turn với turn_id cố định),
+      hết lượt thử thì đếm là lost write
+    - Lượt còn đang ghi lúc shutdown được chờ xong (drain); process chết giữa chừng thì mất -> 'pending' cho biết rủi ro
+    - write() dùng cùng cơ chế retry cho chế độ ghi đồng bộ (chờ ghi xong rồi mới trả lời), hết lượt thử thì raise
+    """
+
+    def __init__(self, retries: int, backoff: float):
+        self.retries = retries
+        self.backoff = backoff
+        self._tails: Dict[str, asyncio.Task] = {}
+        self.submitted = 0
+        self.written = 0
+        self.retried = 0
+        self.lost = 0
+        self.write_ms_total = 0.0
+        self.last_error: Optional[str] = None
+
+    def submit(self, session_id: str, write: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """write: coroutine function (repository async), gọi lại được khi retry"""
+        return self._enqueue(session_id, write, raise_on_failure=False)
+
+    async def write(self, session_id: str, write: Callable[[], Awaitable[Any]]):
+        """Ghi ngay trong request (CHAT_BACKGROUND_WRITES tắt): vẫn xếp sau lần ghi đang dở của session và thử lại như submit"""
+        await self._enqueue(session_id, write, raise_on_failure=True)
+
+    def _enqueue(self, session_id: str, write: Callable[[], Awaitable[Any]], raise_on_failure: bool) -> asyncio.Task:
+        self.submitted += 1
+        previous = self._tails.get(session_id)
+        task = asyncio.create_task(self._run(previous, write, raise_on_failure))
+        self._tails[session_id] = task
+        task.add_done_callback(lambda t: self._forget(session_id, t))
+        return task
+
+    def _forget(self, session_id: str, task: asyncio.Task):
+        if self._tails.get(session_id) is task:
+            del self._tails[session_id]
+
+    async def _run(self, previous: Optional[asyncio.Task], write: Callable[[], Awaitable[Any]],
+                   raise_on_failure: bool = False):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                await write()
+                self.written += 1
+                self.write_ms_total += (time.perf_counter() - started) * 1000
+                return
+            except Exception as e:
+                self.last_error = str(e)
+                if attempt == self.retries:
+                    self.lost += 1
+                    print(f"❌ Chat turn write lost after {attempt + 1} attempts: {e}")
+                    if raise_on_failure:
+                        raise
+                    return
+                self.retried += 1
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def wait_session(self, session_id: str):
+        """Chờ các lượt đang ghi của session (read-your-writes cho lượt kế tiếp)"""
+        task = self._tails.get(session_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def drain(self, timeout: Optional[float] = None):
+        tasks = list(self._tails.values())
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.CHAT_BACKGROUND_WRITES,
+            "submitted": self.submitted,
+            "written": self.written,
+            "pending": self.submitted - self.written - self.lost,
+            "retried": self.retried,
+            "lost": self.lost,
+            "write_ms_avg": round(self.write_ms_total / self.written, 1) if self.written else 0.0,
+            "last_error": self.last_error,
+        }
+
+
+chat_turn_writer = ChatTurnWriter(retries=settings.CHAT_WRITE_RETRIES, backoff=settings.CHAT_WRITE_RETRY_BACKOFF)
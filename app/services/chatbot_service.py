@@ -1,15 +1,23 @@
-import os
 import asyncio
-from typing import List, Dict, Optional
+import random
+import time
+from typing import List, Dict, Optional, AsyncIterator, Tuple
 from pydantic import BaseModel
 from app.core.ai_provider import get_gemini_provider
-# Note: we will use the provider's plain text `generate_text` for main responses
-from app.services.lightrag_service import rag_service
-from dotenv import load_dotenv
+# Note: we will use the provider's plain text `agenerate_text` for main responses
+from app.services.lightrag_service import rag_service, RagNotReadyError
+from app.services.intent_classifier import IntentClassifier, intent_classifier
+from app.services.rag_speculation import rag_speculation
+from app.core.config import settings
+from app.enums.enum_llm_priority import LLMPriority
+from app.utils.token_budget import trim_history
+from app.core import startup_profile
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL', '')
+GEMINI_API_KEY = settings.GEMINI_API_KEY
+GEMINI_MODEL = settings.GEMINI_MODEL
+
+# Kết quả phân loại chỉ phụ thuộc vào câu hỏi nên cache được lâu
+CLASSIFY_CACHE_TTL = 24 * 3600
 
 
 class ClassifyResponse(BaseModel):
@@ -19,7 +27,8 @@ class ClassifyResponse(BaseModel):
 
 class ChatbotService:
     """Simple routing pipeline:
-    - Classify question as 'chat'|'grammar'|'vocab' via Gemini
+    - Classify question as 'chat'|'grammar'|'vocab' locally, falling back
+      to Gemini when the local classifier is not confident
     - For 'vocab': call `rag_service.query(...)` then pass its text to Gemini
     - For others: call Gemini directly
     All public calls return a plain `str` (the assistant reply).
@@ -29,8 +38,40 @@ class ChatbotService:
         if not api_key:
             raise ValueError("GEMINI_API_KEY is not set.")
         self.client = get_gemini_provider(api_key, model)
-
-    def _classify_question(self, question: str) -> str:
+        self.intent_classifier: IntentClassifier = intent_classifier
+        # Keep references to shadow classification tasks so they are not GC'd
+        self._shadow_tasks = set()
+
+    async def _classify_question(self, question: str, prediction: Optional[Tuple[str, float]] = None) -> str:
+        category, confidence = prediction or self.intent_classifier.predict(question)
+
+        if confidence >= settings.INTENT_CONFIDENCE_THRESHOLD:
+            self.intent_classifier.record_decision(used_llm=False)
+            # Sample a few confident decisions against the LLM in the background
+            # so the agreement rate stays measurable above the threshold too.
+            if random.random() < settings.INTENT_SHADOW_SAMPLE_RATE:
+                task = asyncio.create_task(self._shadow_classify(question, category, confidence))
+                self._shadow_tasks.add(task)
+                task.add_done_callback(self._shadow_tasks.discard)
+            return category
+
+        self.intent_classifier.record_decision(used_llm=True)
+        llm_category = await self._classify_with_llm(question)
+        await self.intent_classifier.record_comparison(question, category, confidence, llm_category)
+        return llm_category
+
+    async def _shadow_classify(self, question: str, category: str, confidence: float):
+        try:
+            llm_category = await self._classify_with_llm(question, priority=LLMPriority.BACKGROUND)
+            await self.intent_classifier.record_comparison(question, category, confidence, llm_category)
+        except Exception as e:
+            print("Shadow classification failed:", e)
+
+    async def _classify_with_llm(
+        self,
+        question: str,
+        priority: LLMPriority = LLMPriority.CONVERSATION
+    ) -> str:
         system_instruction = (
             "You are a classifier. Classify the user's single question into one of:"
             " 'chat', 'grammar', 'vocab'. Return strict JSON with field 'category'."
@@ -38,10 +79,12 @@ class ChatbotService:
 
         history = [{"role": "user", "content": question}]
 
-        parsed = self.client.generate_chat_response(
+        parsed = await self.client.agenerate_chat_response(
             history=history,
             system_instruction=system_instruction,
             response_schema=ClassifyResponse,
+            cache_ttl=CLASSIFY_CACHE_TTL,
+            priority=priority,
         )
         return parsed.category.lower().strip()
 
@@ -62,49 +105,92 @@ class ChatbotService:
 
         return base
 
-    def _call_gemini(self, history: List[Dict[str, str]], system_instruction: str) -> str:
+    def _build_prompt(self, history: List[Dict[str, str]], system_instruction: str) -> str:
         # Compose a single text prompt from the system instruction and history,
-        # then call provider.generate_text and return the raw text.
+        # keeping only the newest messages that fit in the token budget.
+        history, _ = trim_history(history, settings.CHAT_PROMPT_TOKEN_BUDGET)
         parts = [system_instruction, "\nConversation history:"]
         for m in history:
             role = m.get("role", "user")
             content = m.get("content", "")
             parts.append(f"{role.upper()}: {content}")
 
-        prompt = "\n".join(parts)
-        return self.client.generate_text(prompt)
+        return "\n".join(parts)
+
+    async def _call_gemini(self, history: List[Dict[str, str]], system_instruction: str) -> str:
+        # Call provider.agenerate_text and return the raw text.
+        return await self.client.agenerate_text(self._build_prompt(history, system_instruction))
 
     def _rag_query_sync(self, question: str, mode: str = "local") -> str:
         # Deprecated: kept for compatibility but not used in async flow
         return asyncio.run(rag_service.query(question, mode=mode))
 
-    async def process_question(self, history: List[Dict[str, str]], user_message: str) -> str:
-        """Main entrypoint (async): returns assistant reply as plain string.
-
-        This function is async so it can `await` `rag_service.query` directly
-        when `category == 'vocab'`.
-        """
-        category = self._classify_question(user_message)
+    async def _prepare(self, history: List[Dict[str, str]], user_message: str):
+        """Classify the question and build (history_payload, system_instruction)."""
+        prediction = self.intent_classifier.predict(user_message)
+
+        # Speculation only pays off when classification needs an LLM round-trip:
+        # start the local-mode retrieval now and drop it if the answer is not 'vocab'.
+        speculative = None
+        if (
+            settings.CHATBOT_SPECULATIVE_RAG
+            and rag_service.is_ready
+            and prediction[1] < settings.INTENT_CONFIDENCE_THRESHOLD
+        ):
+            speculative = rag_speculation.start(rag_service.query(user_message, mode="local"))
+
+        try:
+            category = await self._classify_question(user_message, prediction)
+        except BaseException:
+            if speculative is not None:
+                speculative.cancel()
+            raise
+        decided_at = time.perf_counter()
         print("Classified question as:", category)
 
+        history_payload = history + [{"role": "user", "content": user_message}]
+
         if category == "vocab":
-            # Await the LightRAG async query directly
-            rag_result = await rag_service.query(user_message, mode="local")
-            context_text = str(rag_result)
-            system_instruction = self._build_system_prompt(task="vocab", context=context_text)
-            history_payload = history + [{"role": "user", "content": user_message}]
-            return self._call_gemini(history_payload, system_instruction)
+            try:
+                if speculative is not None:
+                    rag_result = await speculative.use(decided_at)
+                else:
+                    # Await the LightRAG async query directly
+                    rag_result = await rag_service.query(user_message, mode="local")
+                context_text = str(rag_result)
+            except RagNotReadyError as e:
+                # RAG still warming up: answer without retrieved context instead of failing
+                print("RAG not ready, answering without context:", e)
+                context_text = None
+            return history_payload, self._build_system_prompt(task="vocab", context=context_text)
+
+        if speculative is not None:
+            speculative.cancel()
 
         if category == "grammar":
-            system_instruction = self._build_system_prompt(task="grammar")
-            history_payload = history + [{"role": "user", "content": user_message}]
-            return self._call_gemini(history_payload, system_instruction)
+            return history_payload, self._build_system_prompt(task="grammar")
 
         # default: chat
-        system_instruction = self._build_system_prompt(task="chat")
-        history_payload = history + [{"role": "user", "content": user_message}]
-        return self._call_gemini(history_payload, system_instruction)
+        return history_payload, self._build_system_prompt(task="chat")
+
+    async def process_question(self, history: List[Dict[str, str]], user_message: str) -> str:
+        """Main entrypoint (async): returns assistant reply as plain string.
+
+        This function is async so it can `await` `rag_service.query` directly
+        when `category == 'vocab'`.
+        """
+        history_payload, system_instruction = await self._prepare(history, user_message)
+        return await self._call_gemini(history_payload, system_instruction)
+
+    async def stream_question(self, history: List[Dict[str, str]], user_message: str) -> AsyncIterator[str]:
+        """Streaming variant of `process_question`: yields reply text chunks
+        as soon as Gemini produces them.
+        """
+        history_payload, system_instruction = await self._prepare(history, user_message)
+        prompt = self._build_prompt(history_payload, system_instruction)
+        async for chunk in self.client.astream_text(prompt):
+            yield chunk
 
 
 # singleton
-chatbot_service = ChatbotService()
+chatbot_service = startup_profile.construct(ChatbotService)
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+from app.core.ai_provider import get_gemini_provider
+from app.core.config import settings
+from app.enums.enum_llm_priority import LLMPriority
+from app.repositories.chat_repository import ChatRepository
+from app.schemas.chat_session import ChatSession
+from app.services.chat_turn_writer import chat_turn_writer
+from app.utils.token_budget import message_tokens
+
+
+class ConversationSummarizer:
+    """
+    Rolling summary cho conversation dài:
+    - Tin nhắn đã ra khỏi cửa sổ CHAT_HISTORY_WINDOW được gộp dần vào session.summary (chạy nền, priority BACKGROUND)
+    - Chỉ tóm tắt lại khi có thêm >= every_turns lượt nằm ngoài cửa sổ, mỗi lần chỉ đọc phần mới (incremental)
+    - Đếm token prompt mỗi lượt và token tiết kiệm được so với gửi nguyên văn
+    """
+
+    def __init__(self, repository: Optional[ChatRepository] = None, every_turns: int = settings.CHAT_SUMMARY_EVERY_TURNS):
+        self.repository = repository or ChatRepository()
+        self.every_turns = every_turns
+        self._client = None
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.summaries = 0
+        self.failed = 0
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.tokens_saved = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_gemini_provider(settings.GEMINI_API_KEY, settings.GEMINI_MODEL)
+        return self._client
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def record_turn(self, prompt_tokens: int, saved_tokens: int):
+        self.turns += 1
+        self.prompt_tokens += prompt_tokens
+        self.tokens_saved += max(saved_tokens, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.CHAT_SUMMARY_ENABLED,
+            "summaries": self.summaries,
+            "failed": self.failed,
+            "running": len(self._running),
+            "turns": self.turns,
+            "prompt_tokens_avg": round(self.prompt_tokens / self.turns, 1) if self.turns else 0.0,
+            "tokens_saved_total": self.tokens_saved,
+            "tokens_saved_per_turn": round(self.tokens_saved / self.turns, 1) if self.turns else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Rolling summary
+    # ------------------------------------------------------------------
+
+    def maybe_schedule(self, session: ChatSession, new_messages: int = 2, upto: Optional[int] = None):
+        """
+        Gọi sau khi lưu lượt chat; session là bản đọc ở đầu lượt.
+        upto: tóm tắt ngay tới seq này (tin nhắn trong cửa sổ bị cắt theo token budget),
+        không chờ đủ every_turns vì các tin nhắn đó không còn được gửi cho model.
+        """
+        if not settings.CHAT_SUMMARY_ENABLED or session.message_count is None or session.id in self._running:
+            return
+        if upto is None:
+            # Tin nhắn seq < end đã nằm ngoài cửa sổ lịch sử gửi kèm
+            end = session.message_count + new_messages - settings.CHAT_HISTORY_WINDOW
+            if end - session.summary_upto < self.every_turns * 2:
+                return
+        else:
+            end = upto
+            if end <= session.summary_upto:
+                return
+        self._running.add(session.id)
+        task = asyncio.create_task(self._summarize(session, end))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, session: ChatSession, end: int):
+        try:
+            # Lượt vừa rồi có thể còn đang ghi nền
+            await chat_turn_writer.wait_session(session.id)
+            messages = await self.repository.get_messages_range(session.id, session.summary_upto, end)
+            if not messages:
+                return
+            summary = await self.client.agenerate_text(
+                self._build_prompt(session.summary, messages),
+                priority=LLMPriority.BACKGROUND
+            )
+            source_tokens = session.summary_source_tokens + sum(message_tokens(m) for m in messages)
+            saved = await self.repository.update_summary(
+                session.id, summary.strip(), end, source_tokens, session.summary_upto
+            )
+            if saved:
+                self.summaries += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"⚠️ Conversation summary failed for {session.id}: {e}")
+        finally:
+            self._running.discard(session.id)
+
+    def _build_prompt(self, previous: Optional[str], messages: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+        return f"""
+        You maintain a running summary of an English-practice role-play between a learner (USER) and an AI tutor (MODEL).
+        Update the summary with the new messages. Keep facts the tutor needs to stay consistent:
+        names, preferences, decisions, what was ordered/asked/agreed, and recurring learner mistakes.
+        Write plain text, at most {settings.CHAT_SUMMARY_MAX_WORDS} words. Return only the summary.
+
+        CURRENT SUMMARY:
+        {previous or "(empty)"}
+
+        NEW MESSAGES:
+        {transcript}
+        """
+
+
+conversation_summarizer = ConversationSummarizer()
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import socket
+from typing import AsyncIterable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.enums.enum_job_status import JobStatus
+from app.enums.enum_llm_priority import LLMPriority
+from app.repositories.ingest_job_repository import IngestJobRepository
+from app.schemas.ingest_job import IngestJob
+from app.services.lightrag_service import rag_llm_priority
+from app.services.rag_ingestion import Document, RagIngestionPipeline
+from app.core import startup_profile
+
+# Số tài liệu ghi vào Mongo mỗi lần khi nhận upload
+_UPLOAD_CHUNK = 100
+# Số tài liệu đọc từ Mongo mỗi lần khi chạy job (chỉ giữ một trang trong RAM)
+_READ_CHUNK = 100
+
+
+class _JobCheckpoint:
+    """Checkpoint của pipeline lưu thẳng vào job document (position + failed files)"""
+
+    def __init__(self, repository: IngestJobRepository, job: dict, worker_id: str):
+        self.repository = repository
+        self.job_id = job["_id"]
+        self.worker_id = worker_id
+        self.position = job.get("position", 0)
+        self.failed = job.get("failed_files", [])
+
+    def save(self, position: int, failed: List[str], report: dict):
+        self.position = position
+        self.failed = failed
+        self.repository.save_progress(self.job_id, self.worker_id, position, failed, report)
+
+
+class IngestJobService:
+    """
+    Hàng đợi job ingest chạy nền, trạng thái lưu trong Mongo (ingest_jobs):
+    - Request chỉ ghi tài liệu + tạo job rồi trả job_id ngay
+    - Worker pool riêng (RAG_INGEST_WORKERS mỗi process) claim job atomic, nhiều process chạy song song vẫn an toàn
+    - Lời gọi LLM của job chạy với LLMPriority.BACKGROUND, luôn xếp sau request tương tác
+    - Job của worker chết (mất heartbeat) được claim lại và resume từ checkpoint
+    """
+
+    def __init__(self, repository: Optional[IngestJobRepository] = None, workers: int = settings.RAG_INGEST_WORKERS):
+        self.repository = repository or IngestJobRepository()
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._running_jobs: Dict[str, int] = {}
+        self.completed = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # Submit / status
+    # ------------------------------------------------------------------
+
+    async def submit(self, documents: List[Document]) -> str:
+        async def _documents():
+            for document in documents:
+                yield document
+        return await self.submit_stream(_documents())
+
+    async def submit_stream(self, documents: AsyncIterable[Document]) -> str:
+        job_id = self.repository.new_job_id()
+        total = 0
+        chunk: List[Tuple[str, str]] = []
+        try:
+            async for document in documents:
+                chunk.append(document)
+                if len(chunk) >= _UPLOAD_CHUNK:
+                    await run_in_threadpool(self.repository.add_documents, job_id, total, chunk)
+                    total += len(chunk)
+                    chunk = []
+            await run_in_threadpool(self.repository.add_documents, job_id, total, chunk)
+            total += len(chunk)
+            if total == 0:
+                raise ValueError("No documents to ingest")
+            await run_in_threadpool(self.repository.create_job, job_id, total)
+        except BaseException:
+            await run_in_threadpool(self.repository.delete_job, job_id)
+            raise
+        self._wakeup.set()
+        return str(job_id)
+
+    async def get_job(self, job_id: str) -> Optional[IngestJob]:
+        return await run_in_threadpool(self.repository.get_job, job_id)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "running_jobs": dict(self._running_jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    # ------------------------------------------------------------------
+    # Worker pool
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        if self._tasks:
+            return
+        # Index của ingest_jobs nằm trong index registry (app/db/indexes.py), không ensure lại ở đây
+        self._tasks = [asyncio.create_task(self._worker_loop()) for _ in range(self.workers)]
+        print(f"🧵 Ingest workers started ({self.workers})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker_loop(self):
+        # Mọi lời gọi LLM phát sinh từ worker này (kể cả trong task con của LightRAG) là BACKGROUND
+        rag_llm_priority.set(LLMPriority.BACKGROUND)
+        while True:
+            try:
+                job = await run_in_threadpool(
+                    self.repository.claim_next_job, self.worker_id, settings.RAG_INGEST_JOB_STALE_SEC
+                )
+            except Exception as e:
+                print(f"❌ Ingest worker cannot claim job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.RAG_INGEST_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job: dict):
+        job_id: ObjectId = job["_id"]
+        print(f"📥 Ingest job {job_id} started (attempt {job['attempts']})")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        checkpoint = _JobCheckpoint(self.repository, job, self.worker_id)
+        self._running_jobs[str(job_id)] = job["total_documents"]
+        try:
+            # Job được claim lại: đọc tiếp từ position đã checkpoint thay vì đọc lại từ đầu
+            start = checkpoint.position
+            report = await RagIngestionPipeline().ingest(self._iter_job_documents(job_id, start), checkpoint, offset=start)
+            status = JobStatus.FAILED if report["failed"] and not report["inserted"] else JobStatus.SUCCEEDED
+            await run_in_threadpool(self.repository.finish_job, job_id, self.worker_id, status, report)
+            self.completed += 1
+            print(f"✅ Ingest job {job_id}: {status.value}")
+        except asyncio.CancelledError:
+            # Shutdown: để job ở trạng thái running, process khác claim lại khi heartbeat hết hạn
+            raise
+        except Exception as e:
+            await run_in_threadpool(self.repository.finish_job, job_id, self.worker_id, JobStatus.FAILED, None, str(e))
+            self.failed += 1
+            print(f"❌ Ingest job {job_id} failed: {e}")
+        finally:
+            heartbeat.cancel()
+            self._running_jobs.pop(str(job_id), None)
+
+    async def _iter_job_documents(self, job_id: ObjectId, seq: int = 0) -> AsyncIterable[Document]:
+        while True:
+            page = await run_in_threadpool(self.repository.read_documents, job_id, seq, _READ_CHUNK)
+            for document in page:
+                yield document
+            if len(page) < _READ_CHUNK:
+                return
+            seq += len(page)
+
+    async def _heartbeat(self, job_id: ObjectId):
+        while True:
+            await asyncio.sleep(settings.RAG_INGEST_HEARTBEAT_INTERVAL)
+            try:
+                await run_in_threadpool(self.repository.heartbeat, job_id, self.worker_id)
+            except Exception as e:
+                print(f"⚠️ Ingest heartbeat failed for {job_id}: {e}")
+
+
+ingest_job_service = startup_profile.construct(IngestJobService)
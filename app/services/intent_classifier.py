@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+CATEGORIES = ("chat", "grammar", "vocab")
+
+# (pattern, weight) cho từng loại câu hỏi; hỗ trợ cả tiếng Anh lẫn tiếng Việt
+_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "grammar": [
+        (r"\bgrammar\b|ngữ pháp", 3.0),
+        (r"\btenses?\b|\bthì\b", 2.0),
+        (r"\b(present|past|future) (simple|perfect|continuous|progressive)\b", 3.0),
+        (r"\b(is|was) (it|this|that|my|the)( sentence)? (correct|right|wrong|grammatical)\b|câu (này|trên) (có )?(đúng|sai)", 3.0),
+        (r"\b(correct|check|fix)\b.*\b(sentence|grammar|mistakes?|errors?)\b|sửa (câu|lỗi)", 2.5),
+        (r"\b(prepositions?|articles?|conditionals?|passive voice|gerunds?|infinitives?|subject[- ]verb|relative clauses?|reported speech|modal verbs?)\b", 2.5),
+        (r"\bwhen (do|should) (i|we) use\b|\bdifference between\b.*\b(and)\b", 1.0),
+        (r"giới từ|mạo từ|câu bị động|câu điều kiện", 2.5),
+    ],
+    "vocab": [
+        (r"\b(vocab|vocabulary)\b|từ vựng", 3.0),
+        (r"\b(synonyms?|antonyms?|collocations?|idioms?|phrasal verbs?)\b|đồng nghĩa|trái nghĩa", 3.0),
+        (r"\bwhat (does|is) .+ mean\b|\bmeaning of\b|\bdefinition of\b|nghĩa (là gì|của)", 2.5),
+        (r"\bhow (do|can|should) (i|we|you) (say|talk about|describe|express)\b|\bwhat to say about\b|nói về", 2.0),
+        (r"\b(words?|phrases?|expressions?) (for|about|to describe|related to)\b", 2.0),
+        (r"\b(topic|topics)\b|chủ đề", 1.0),
+    ],
+    "chat": [
+        (r"\bhow are you\b|\bwhat'?s up\b|\bnice to meet you\b", 2.5),
+        (r"\b(let'?s|can we) (chat|talk|practice)\b", 2.0),
+    ],
+}
+
+# Lời chào / cảm ơn ở đầu câu: chỉ tính cho 'chat' khi không có rule grammar/vocab nào khớp,
+# để "hi, how do I say sorry politely?" không bị chốt là chat
+_GREETING_RULES: List[Tuple[str, float]] = [
+    (r"^\s*(hi|hello|hey|yo|good (morning|afternoon|evening)|thanks|thank you|bye|goodbye)\b", 3.0),
+    (r"^\s*(xin chào|chào|cảm ơn|tạm biệt)", 3.0),
+]
+
+_COMPILED = {
+    category: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in rules]
+    for category, rules in _RULES.items()
+}
+_COMPILED_GREETINGS = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in _GREETING_RULES]
+
+# Các mốc confidence để thống kê độ khớp với LLM theo từng khoảng
+_BUCKETS = (0.2, 0.4, 0.6, 0.8, 1.01)
+
+
+class IntentClassifier:
+    """
+    Phân loại câu hỏi 'chat' | 'grammar' | 'vocab' bằng regex/keyword cascade (CPU, < 1ms).
+    Confidence thấp thì ChatbotService hỏi lại LLM; mỗi lần có cả 2 kết quả sẽ được
+    ghi lại để đo tỉ lệ khớp (agreement) và làm dữ liệu train model sau này.
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self.local_decisions = 0
+        self.llm_fallbacks = 0
+        self.compared = 0
+        self.agreed = 0
+        self._bucket_counts = {b: [0, 0] for b in _BUCKETS}  # bucket -> [compared, agreed]
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        scores = {category: 0.0 for category in CATEGORIES}
+        for category, rules in _COMPILED.items():
+            for pattern, weight in rules:
+                if pattern.search(question):
+                    scores[category] += weight
+        if scores["grammar"] == 0 and scores["vocab"] == 0:
+            for pattern, weight in _COMPILED_GREETINGS:
+                if pattern.search(question):
+                    scores["chat"] += weight
+
+        total = sum(scores.values())
+        if total == 0:
+            # Không khớp rule nào: đoán 'chat' nhưng để LLM quyết định
+            return "chat", 0.0
+
+        category = max(scores, key=scores.get)
+        # Tỉ trọng của nhãn thắng, phạt thêm khi chỉ có ít bằng chứng
+        confidence = (scores[category] / total) * min(scores[category] / 3.0, 1.0)
+        return category, round(confidence, 3)
+
+    def record_decision(self, used_llm: bool):
+        with self._lock:
+            if used_llm:
+                self.llm_fallbacks += 1
+            else:
+                self.local_decisions += 1
+
+    async def record_comparison(self, question: str, local: str, confidence: float, llm: str):
+        agreed = local == llm
+        with self._lock:
+            self.compared += 1
+            self.agreed += int(agreed)
+            for bucket in _BUCKETS:
+                if confidence < bucket:
+                    self._bucket_counts[bucket][0] += 1
+                    self._bucket_counts[bucket][1] += int(agreed)
+                    break
+        if self.log_path:
+            # Ghi file trong thread để không chặn event loop
+            await asyncio.to_thread(self._append_log, {
+                "question": question,
+                "local": local,
+                "confidence": confidence,
+                "llm": llm,
+            })
+
+    def _append_log(self, entry: Dict):
+        with self._log_lock:
+            folder = os.path.dirname(self.log_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buckets = {}
+            lower = 0.0
+            for bucket in _BUCKETS:
+                compared, agreed = self._bucket_counts[bucket]
+                label = f"{lower:.1f}-{min(bucket, 1.0):.1f}"
+                buckets[label] = {
+                    "compared": compared,
+                    "agreement_rate": round(agreed / compared, 4) if compared else None,
+                }
+                lower = bucket
+            return {
+                "threshold": settings.INTENT_CONFIDENCE_THRESHOLD,
+                "local_decisions": self.local_decisions,
+                "llm_fallbacks": self.llm_fallbacks,
+                "compared": self.compared,
+                "agreement_rate": round(self.agreed / self.compared, 4) if self.compared else None,
+                "by_confidence": buckets,
+            }
+
+
+intent_classifier = IntentClassifier(log_path=settings.INTENT_LOG_PATH or None)
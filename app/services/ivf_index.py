@@ -0,0 +1,142 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class IVFFlatIndex:
+    """
+    Chỉ mục ANN kiểu IVF-flat viết bằng NumPy cho vector đã chuẩn hoá (cosine = dot):
+    - Spherical k-means chia vector thành nlist cụm, mỗi dòng được gán vào centroid gần nhất
+    - Query chỉ chấm điểm chính xác các dòng thuộc nprobe cụm gần nhất
+    - nprobe được hiệu chỉnh lúc train để đạt recall@k mục tiêu so với tìm kiếm vét cạn
+    Dòng mới chỉ cần gán vào centroid có sẵn (incremental), train lại khi dữ liệu tăng gấp đôi.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, nprobe: int, trained_rows: int):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.nprobe = int(nprobe)
+        self.trained_rows = int(trained_rows)
+        self._set_assignments(np.asarray(assignments, dtype=np.int32))
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    def _set_assignments(self, assignments: np.ndarray):
+        self.assignments = assignments
+        # Sắp dòng theo cụm để lấy danh sách của một cụm bằng một lát cắt
+        self._order = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=self.nlist)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        nlist: int = 0,
+        target_recall: float = 0.95,
+        k: int = 10,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IVFFlatIndex":
+        rows = matrix.shape[0]
+        nlist = nlist or max(1, int(np.sqrt(rows)))
+        nlist = min(nlist, rows)
+        rng = np.random.default_rng(seed)
+
+        # k-means trên mẫu (tối đa 256 điểm/cụm) rồi gán toàn bộ
+        sample_size = min(rows, nlist * 256)
+        sample = np.asarray(matrix[np.sort(rng.choice(rows, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Cụm rỗng: lấy lại một điểm ngẫu nhiên làm centroid
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        index = cls(centroids, cls._assign(centroids, matrix), nprobe=nlist, trained_rows=rows)
+        index.nprobe = index.calibrate(matrix, target_recall, k, rng)
+        return index
+
+    @staticmethod
+    def _assign(centroids: np.ndarray, vectors: np.ndarray, batch: int = 8192) -> np.ndarray:
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], batch):
+            chunk = np.asarray(vectors[start:start + batch], dtype=np.float32)
+            labels[start:start + batch] = np.argmax(chunk @ centroids.T, axis=1)
+        return labels
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        return self._assign(self.centroids, vectors)
+
+    def calibrate(self, matrix: np.ndarray, target_recall: float, k: int, rng=None, queries: int = 64) -> int:
+        """nprobe nhỏ nhất đạt recall@k >= target_recall trên các query lấy mẫu từ dữ liệu"""
+        rng = rng or np.random.default_rng(0)
+        rows = matrix.shape[0]
+        k = min(k, rows)
+        picked = np.asarray(matrix[rng.choice(rows, min(queries, rows), replace=False)], dtype=np.float32)
+        # Thêm nhiễu để query không trùng hẳn một dòng có sẵn
+        noisy = picked + rng.normal(0, 0.5 / np.sqrt(picked.shape[1]), picked.shape).astype(np.float32)
+        noisy /= np.linalg.norm(noisy, axis=1, keepdims=True)
+        exact = [set(np.argpartition(-(matrix @ q), k - 1)[:k].tolist()) for q in noisy]
+
+        nprobe = 1
+        while nprobe < self.nlist:
+            hits = sum(
+                len(truth & set(self.search(matrix, q, k, nprobe)[0].tolist()))
+                for q, truth in zip(noisy, exact)
+            )
+            if hits / (k * len(noisy)) >= target_recall:
+                break
+            nprobe = min(self.nlist, nprobe * 2)
+        return nprobe
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in probes])
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, top_k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Trả về (row indices, scores) sắp giảm dần theo cosine"""
+        rows = self.candidates(query, nprobe)
+        if rows.size == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+        rows.sort()  # đọc memmap theo thứ tự tăng dần cho thân thiện với page cache
+        scores = np.asarray(matrix[rows]) @ query
+        k = min(top_k, rows.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return rows[best], scores[best]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, file):
+        """file: đường dẫn hoặc file object mở ở chế độ 'wb'"""
+        np.savez(
+            file,
+            centroids=self.centroids,
+            assignments=self.assignments,
+            nprobe=np.int64(self.nprobe),
+            trained_rows=np.int64(self.trained_rows),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFFlatIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["assignments"], int(data["nprobe"]), int(data["trained_rows"]))
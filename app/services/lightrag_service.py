@@ -1,19 +1,49 @@
 import os
-import nest_asyncio
-from functools import partial
-from lightrag import LightRAG, QueryParam
-from lightrag.llm.gemini import gemini_model_complete, gemini_embed
-from lightrag.utils import EmbeddingFunc
-from dotenv import load_dotenv
+import time
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.llm_governor import get_llm_governor
+from app.enums.enum_llm_priority import LLMPriority
+from app.services.semantic_cache import SemanticQueryCache, rag_query_cache
+from app.core import startup_profile
 
+# lightrag (kéo theo google.genai, numpy, networkx...) chỉ được import trong các hàm bên dưới,
+# khi RAG thực sự được dùng, để import app không phải chờ
+
+# Priority cho các lời gọi LLM của LightRAG trong context hiện tại (ingest job đặt BACKGROUND).
+# LightRAG copy context của caller sang worker của nó nên giá trị đi theo từng lời gọi.
+rag_llm_priority: ContextVar[LLMPriority] = ContextVar("rag_llm_priority", default=LLMPriority.CONVERSATION)
+
+
+class RagNotReadyError(Exception):
+    """LightRAG chưa load xong (đang warm-up hoặc load lỗi)"""
+    pass
 
-# Patch asyncio để tránh lỗi conflict event loop trong môi trường server
-nest_asyncio.apply()
 
 class LightRAGService:
-    def __init__(self, working_dir: str = "./rag_storage_new", api_key: str = None):
+    def __init__(
+        self,
+        working_dir: str = "./rag_storage_new",
+        api_key: str = None,
+        query_cache: SemanticQueryCache = rag_query_cache
+    ):
         self.working_dir = working_dir
         self.rag_instance = None
+        self._init_lock = asyncio.Lock()
+        # Warm-up chạy nền: 'idle' -> 'loading' -> 'ready' | 'failed'
+        self.status = "idle"
+        self.error: Optional[str] = None
+        self.load_time_sec: Optional[float] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        # Giới hạn số RAG query chạy cùng lúc để worker vẫn phục vụ được request khác
+        self._query_semaphore = asyncio.Semaphore(settings.RAG_MAX_CONCURRENT_QUERIES)
+        # Cache kết quả theo embedding câu hỏi (None = tắt)
+        self.query_cache = query_cache if settings.RAG_SEMANTIC_CACHE_ENABLED else None
+        # Đếm số lần gọi embedding API (để tính embedding calls / doc khi ingest)
+        self.embedding_calls = 0
+        self.embedded_texts = 0
         
         # Cấu hình API Key
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
@@ -27,59 +57,190 @@ class LightRAGService:
         print(self.api_key)
 
     async def _llm_model_func(self, prompt, system_prompt=None, history_messages=[], **kwargs):
-        return await gemini_model_complete(
-            prompt,
-            system_prompt=system_prompt,
-            history_messages=history_messages,
+        from lightrag.llm.gemini import gemini_model_complete
+        priority = rag_llm_priority.get()
+        # Đi qua governor chung để ingest không tranh quota với request tương tác;
+        # job nền được phép chờ lâu hơn trong hàng đợi
+        max_wait = settings.RAG_INGEST_LLM_MAX_WAIT if priority == LLMPriority.BACKGROUND else None
+        return await get_llm_governor().run(
+            lambda: gemini_model_complete(
+                prompt,
+                system_prompt=system_prompt,
+                history_messages=history_messages,
+                api_key=self.api_key,
+                model_name="gemini-2.5-flash", # Model bạn đang dùng
+                **kwargs,
+            ),
+            priority=priority,
+            retries=settings.LLM_RATE_LIMIT_RETRIES,
+            max_wait=max_wait,
+        )
+
+    async def _embed(self, texts, max_token_size=None, **kwargs):
+        self.embedding_calls += 1
+        self.embedded_texts += len(texts)
+        from lightrag.llm.gemini import gemini_embed
+        return await gemini_embed.func(
+            texts,
             api_key=self.api_key,
-            model_name="gemini-2.5-flash", # Model bạn đang dùng
-            **kwargs,
+            model="models/text-embedding-004",
+            max_token_size=max_token_size,
+            **kwargs
         )
 
     def _get_embedding_func(self):
+        from lightrag.utils import EmbeddingFunc
         return EmbeddingFunc(
             embedding_dim=768,
             max_token_size=2048,
-            func=partial(
-                gemini_embed.func,
-                api_key=self.api_key,
-                model="models/text-embedding-004"
-            )
+            func=self._embed
+        )
+
+    @staticmethod
+    def _sqlite_llm_cache(json_cache):
+        """Thay JsonKVStorage của llm_response_cache bằng SQLite, giữ nguyên namespace/workspace/config"""
+        from app.services.sqlite_kv_storage import SqliteKVStorage
+        return SqliteKVStorage(
+            namespace=json_cache.namespace,
+            workspace=json_cache.workspace,
+            global_config=json_cache.global_config,
+            embedding_func=json_cache.embedding_func,
+            max_bytes=settings.RAG_LLM_CACHE_MAX_MB * 1024 * 1024,
         )
 
     async def initialize(self):
         """Khởi tạo LightRAG và load storage. Hàm này cần chạy khi Start App."""
-        print("⏳ Đang khởi tạo LightRAG Service...")
-        self.rag_instance = LightRAG(
-            working_dir=self.working_dir,
-            llm_model_func=self._llm_model_func,
-            embedding_func=self._get_embedding_func(),
-            llm_model_name="gemini-2.5-flash",
-        )
-        await self.rag_instance.initialize_storages()
-        print("✅ LightRAG Service đã sẵn sàng!")
+        async with self._init_lock:
+            if self.rag_instance:
+                return
+            print("⏳ Đang khởi tạo LightRAG Service...")
+            from lightrag import LightRAG
+            from app.services.memmap_vector_storage import register_memmap_vector_storage
+            register_memmap_vector_storage()
+            rag_instance = LightRAG(
+                working_dir=self.working_dir,
+                llm_model_func=self._llm_model_func,
+                embedding_func=self._get_embedding_func(),
+                llm_model_name="gemini-2.5-flash",
+                vector_storage=settings.RAG_VECTOR_STORAGE,
+                embedding_batch_num=settings.RAG_EMBEDDING_BATCH_NUM,
+                embedding_func_max_async=settings.RAG_EMBEDDING_MAX_ASYNC,
+                llm_model_max_async=settings.RAG_LLM_MAX_ASYNC,
+                max_parallel_insert=settings.RAG_MAX_PARALLEL_INSERT,
+                vector_db_storage_cls_kwargs={
+                    "ann_enabled": settings.RAG_ANN_ENABLED,
+                    "ann_min_rows": settings.RAG_ANN_MIN_ROWS,
+                    "ann_nlist": settings.RAG_ANN_NLIST,
+                    "ann_target_recall": settings.RAG_ANN_TARGET_RECALL,
+                    "ann_recall_k": settings.RAG_ANN_RECALL_K,
+                },
+            )
+            if settings.RAG_LLM_CACHE_BACKEND == "sqlite":
+                rag_instance.llm_response_cache = self._sqlite_llm_cache(rag_instance.llm_response_cache)
+            await rag_instance.initialize_storages()
+            self.rag_instance = rag_instance
+            self.status = "ready"
+            print("✅ LightRAG Service đã sẵn sàng!")
+
+    @property
+    def is_ready(self) -> bool:
+        return self.rag_instance is not None
+
+    def start_warmup(self) -> asyncio.Task:
+        """Load LightRAG trong task nền; gọi lại khi đang load thì dùng chung task, load lỗi thì thử lại"""
+        if self._warmup_task is None or (self._warmup_task.done() and not self.is_ready):
+            self._warmup_task = asyncio.create_task(self._warmup())
+        return self._warmup_task
+
+    async def _warmup(self):
+        self.status = "loading"
+        self.error = None
+        started = time.perf_counter()
+        try:
+            await self.initialize()
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            print(f"❌ LightRAG warm-up failed: {e}")
+            return
+        self.load_time_sec = round(time.perf_counter() - started, 2)
+
+    async def wait_ready(self, timeout: Optional[float] = None):
+        """Chờ warm-up xong (timeout=None: chờ đến khi xong); quá hạn hoặc load lỗi -> RagNotReadyError"""
+        if self.is_ready:
+            return
+        task = self.start_warmup()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            raise RagNotReadyError("RAG is still loading")
+        if not self.is_ready:
+            raise RagNotReadyError(f"RAG failed to load: {self.error}")
+
+    def readiness(self) -> Dict[str, Any]:
+        return {"status": self.status, "error": self.error, "load_time_sec": self.load_time_sec}
 
     async def insert_content(self, content: str):
         """Hàm nạp dữ liệu vào RAG"""
-        if not self.rag_instance:
-            await self.initialize()
-        return await self.rag_instance.insert(content)
+        await self.wait_ready()
+        result = await self.rag_instance.ainsert(content)
+        # Graph đã đổi -> kết quả query cũ không còn đúng
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+        return result
+
+    async def insert_documents(self, contents: List[str], ids: List[str], file_paths: List[str]):
+        """Nạp nhiều tài liệu trong một lần ainsert để LightRAG gom chunk/embedding theo batch"""
+        await self.wait_ready()
+        result = await self.rag_instance.ainsert(contents, ids=ids, file_paths=file_paths)
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+        return result
+
+    async def get_doc_statuses(self, ids: List[str]) -> Dict[str, str]:
+        """doc_id -> status ('processed', 'failed', ...) theo kv_store_doc_status"""
+        await self.wait_ready()
+        records = await self.rag_instance.doc_status.get_by_ids(ids)
+        return {
+            doc_id: record.get("status")
+            for doc_id, record in zip(ids, records)
+            if record
+        }
 
     async def query(self, question: str, mode: str = "local"):
         """
         Hàm gọi query từ bên ngoài.
         mode: 'naive', 'local', 'global', 'hybrid', 'mix'
         """
-        if not self.rag_instance:
-            # Nếu chưa init thì init (phòng hờ, nhưng tốt nhất nên init lúc start app)
-            await self.initialize()
-            
+        # Đang warm-up thì chờ tối đa RAG_READY_TIMEOUT giây, quá hạn -> RagNotReadyError
+        await self.wait_ready(settings.RAG_READY_TIMEOUT)
+
         print(f"🔍 Đang truy vấn RAG với mode: {mode}")
         
-        # LightRAG query có thể block, nên cẩn thận nếu nó không phải async native hoàn toàn
-        # Tuy nhiên hàm query của LightRAG thường trả về kết quả trực tiếp
-        result = self.rag_instance.query(question, param=QueryParam(mode=mode))
+        if self.query_cache is None:
+            return await self._aquery(question, mode)
+
+        cached = self.query_cache.get_exact(mode, question)
+        if cached is not None:
+            return cached
+
+        generation = self.query_cache.generation
+        embedding = (await self.rag_instance.embedding_func([question]))[0]
+        cached = self.query_cache.get_similar(mode, embedding)
+        if cached is not None:
+            print("♻️ Semantic cache hit")
+            return cached
+
+        result = await self._aquery(question, mode)
+        if isinstance(result, str):
+            self.query_cache.put(mode, question, embedding, result, generation)
         return result
 
+    async def _aquery(self, question: str, mode: str):
+        # Dùng aquery (async native) để không chặn event loop trong lúc retrieval + LLM
+        from lightrag import QueryParam
+        async with self._query_semaphore:
+            return await self.rag_instance.aquery(question, param=QueryParam(mode=mode))
+
 # Tạo một biến global instance để dùng dạng Singleton (tiết kiệm ram)
-rag_service = LightRAGService()
\ No newline at end of file
+rag_service = startup_profile.construct(LightRAGService)
\ No newline at end of file
@@ -0,0 +1,487 @@
+import base64
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, final
+
+import numpy as np
+from lightrag.base import BaseVectorStorage
+from lightrag.constants import DEFAULT_QUERY_PRIORITY
+from lightrag.file_atomic import atomic_write
+from lightrag.kg.shared_storage import get_namespace_lock, get_update_flag, set_all_update_flags
+from lightrag.utils import compute_mdhash_id, logger, validate_workspace
+from app.services.ivf_index import IVFFlatIndex
+
+STORAGE_NAME = "MemmapVectorDBStorage"
+
+# Field nội bộ của NanoVectorDB, không copy sang side index
+_NANO_INTERNAL_FIELDS = ("__id__", "__vector__", "vector", "__write_seq__")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _meta_path(folder: str, namespace: str) -> str:
+    return os.path.join(folder, f"vdb_{namespace}.meta.json")
+
+
+def _write_file(path: str, write_fn):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write_fn(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(
+    folder: str,
+    namespace: str,
+    embedding_dim: int,
+    ids: List[str],
+    rows: List[dict],
+    matrix: np.ndarray,
+    ann_index: Optional[IVFFlatIndex] = None,
+) -> str:
+    """
+    Ghi một snapshot mới: ma trận float32 (đã chuẩn hoá) và ANN index (nếu có) ra file riêng,
+    sau đó thay side index bằng atomic rename -> side index là điểm commit.
+    Trả về tên file ma trận mới.
+    """
+    stem = f"vdb_{namespace}.{uuid.uuid4().hex[:12]}"
+    matrix_file = f"{stem}.npy"
+    _write_file(
+        os.path.join(folder, matrix_file),
+        lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=np.float32).reshape(-1, embedding_dim)),
+    )
+    index_file = None
+    if ann_index is not None:
+        index_file = f"{stem}.ivf.npz"
+        _write_file(os.path.join(folder, index_file), ann_index.save)
+
+    meta = {
+        "embedding_dim": embedding_dim,
+        "matrix_file": matrix_file,
+        "index_file": index_file,
+        "ids": ids,
+        "rows": rows,
+    }
+
+    def _write(path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+
+    atomic_write(_meta_path(folder, namespace), _write)
+    return matrix_file
+
+
+def migrate_nano_json(folder: str, namespace: str, remove_source: bool = False) -> Optional[int]:
+    """
+    Chuyển vdb_<namespace>.json (NanoVectorDB, vector base64 trong JSON)
+    sang định dạng memmap. Trả về số vector đã chuyển, None nếu không có file nguồn.
+    """
+    source = os.path.join(folder, f"vdb_{namespace}.json")
+    if not os.path.exists(source):
+        return None
+    with open(source, encoding="utf-8") as f:
+        data = json.load(f)
+
+    dim = data["embedding_dim"]
+    matrix = np.frombuffer(base64.b64decode(data["matrix"]), dtype=np.float32).reshape(-1, dim)
+    ids = [dp["__id__"] for dp in data["data"]]
+    rows = [{k: v for k, v in dp.items() if k not in _NANO_INTERNAL_FIELDS} for dp in data["data"]]
+    if len(ids) != matrix.shape[0]:
+        raise ValueError(f"{source}: {len(ids)} records but matrix has {matrix.shape[0]} rows")
+
+    old_files = _current_snapshot_files(folder, namespace)
+    write_snapshot(folder, namespace, dim, ids, rows, _normalize(matrix))
+    _remove_quietly(folder, *old_files)
+    if remove_source:
+        os.remove(source)
+    return len(ids)
+
+
+def _current_snapshot_files(folder: str, namespace: str) -> tuple:
+    path = _meta_path(folder, namespace)
+    if not os.path.exists(path):
+        return ()
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta.get("matrix_file"), meta.get("index_file")
+
+
+def _remove_quietly(folder: str, *file_names: Optional[str]):
+    for file_name in file_names:
+        if not file_name:
+            continue
+        try:
+            os.remove(os.path.join(folder, file_name))
+        except FileNotFoundError:
+            pass
+
+
+class _Snapshot:
+    """Ma trận mở bằng np.memmap (read-only) + side index id -> dòng + ANN index (tuỳ chọn)"""
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        matrix: np.ndarray,
+        ids: List[str],
+        rows: List[dict],
+        matrix_file: Optional[str],
+        ann_index: Optional[IVFFlatIndex] = None,
+        index_file: Optional[str] = None,
+    ):
+        self.embedding_dim = embedding_dim
+        self.matrix = matrix
+        self.ids = ids
+        self.rows = rows
+        self.matrix_file = matrix_file
+        self.ann_index = ann_index
+        self.index_file = index_file
+        self.index = {doc_id: i for i, doc_id in enumerate(ids)}
+
+    @property
+    def files(self) -> tuple:
+        return self.matrix_file, self.index_file
+
+    @classmethod
+    def empty(cls, embedding_dim: int) -> "_Snapshot":
+        return cls(embedding_dim, np.zeros((0, embedding_dim), dtype=np.float32), [], [], None)
+
+    @classmethod
+    def load(cls, folder: str, namespace: str, embedding_dim: int) -> "_Snapshot":
+        path = _meta_path(folder, namespace)
+        if not os.path.exists(path):
+            return cls.empty(embedding_dim)
+        with open(path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["embedding_dim"] != embedding_dim:
+            raise ValueError(
+                f"Embedding dim mismatch for {namespace}: expected {embedding_dim}, found {meta['embedding_dim']}"
+            )
+        ids = meta["ids"]
+        if ids:
+            # mmap_mode='r': các worker dùng chung page cache thay vì mỗi process một bản copy
+            matrix = np.load(os.path.join(folder, meta["matrix_file"]), mmap_mode="r")
+        else:
+            matrix = np.zeros((0, embedding_dim), dtype=np.float32)
+        if matrix.shape != (len(ids), embedding_dim):
+            raise ValueError(f"{meta['matrix_file']} has shape {matrix.shape}, expected {(len(ids), embedding_dim)}")
+        ann_index = None
+        index_file = meta.get("index_file")
+        if index_file:
+            ann_index = IVFFlatIndex.load(os.path.join(folder, index_file))
+            if ann_index.assignments.shape[0] != len(ids):
+                raise ValueError(f"{index_file} covers {ann_index.assignments.shape[0]} rows, expected {len(ids)}")
+        return cls(embedding_dim, matrix, ids, meta["rows"], meta["matrix_file"], ann_index, index_file)
+
+
+@final
+@dataclass
+class MemmapVectorDBStorage(BaseVectorStorage):
+    """
+    Vector storage cho LightRAG lưu embedding trong file float32 .npy (mở bằng np.memmap)
+    và metadata trong side index JSON nhỏ gọn, thay cho vdb_*.json của NanoVectorDB.
+    - Đọc: chỉ map file, không parse vector -> khởi động nhanh, RSS dùng chung giữa các worker
+    - Ghi: upsert/delete được gom lại, index_done_callback ghi snapshot mới (copy-on-write)
+      rồi đổi side index bằng atomic rename
+    - Tìm kiếm: vét cạn khi ít dữ liệu, từ ann_min_rows dòng trở lên dùng IVF-flat (xem IVFFlatIndex),
+      cập nhật incremental mỗi lần commit
+    """
+
+    def __post_init__(self):
+        validate_workspace(self.workspace)
+        self._validate_embedding_func()
+
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        cosine_threshold = kwargs.get("cosine_better_than_threshold")
+        if cosine_threshold is None:
+            raise ValueError("cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs")
+        self.cosine_better_than_threshold = cosine_threshold
+        self._ann_enabled = kwargs.get("ann_enabled", False)
+        self._ann_min_rows = kwargs.get("ann_min_rows", 2000)
+        self._ann_nlist = kwargs.get("ann_nlist", 0)
+        self._ann_target_recall = kwargs.get("ann_target_recall", 0.95)
+        self._ann_recall_k = kwargs.get("ann_recall_k", 10)
+
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            self._folder = os.path.join(working_dir, self.workspace)
+        else:
+            self.workspace = ""
+            self._folder = working_dir
+        os.makedirs(self._folder, exist_ok=True)
+
+        self._max_batch_size = self.global_config["embedding_batch_num"]
+        self._storage_lock = None
+        self.storage_updated = None
+
+        # Tự chuyển đổi lần đầu nếu chỉ có file JSON cũ
+        if not os.path.exists(_meta_path(self._folder, self.namespace)):
+            migrated = migrate_nano_json(self._folder, self.namespace)
+            if migrated is not None:
+                logger.info(f"Migrated {migrated} vectors of {self.namespace} to memmap storage")
+
+        self._snapshot = _Snapshot.load(self._folder, self.namespace, self.embedding_func.embedding_dim)
+        # id -> (record, vector) đã embed nhưng chưa ghi xuống đĩa
+        self._pending_upserts: Dict[str, tuple] = {}
+        self._pending_deletes: set = set()
+
+    async def initialize(self):
+        self.storage_updated = await get_update_flag(self.namespace, workspace=self.workspace)
+        self._storage_lock = get_namespace_lock(self.namespace, workspace=self.workspace)
+
+        # Dữ liệu vừa migrate / vừa vượt ngưỡng chưa có ANN index -> build một lần và lưu lại
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            snapshot = self._snapshot
+            if self._needs_ann(len(snapshot.ids)) and snapshot.ann_index is None:
+                self._commit_locked(
+                    snapshot.ids, snapshot.rows, np.asarray(snapshot.matrix), self._train_ann(snapshot.matrix)
+                )
+                await set_all_update_flags(self.namespace, workspace=self.workspace)
+                self.storage_updated.value = False
+
+    def _reload_if_updated_locked(self):
+        if self.storage_updated is not None and self.storage_updated.value:
+            logger.info(f"[{self.workspace}] Process {os.getpid()} reloading {self.namespace} memmap storage")
+            self._snapshot = _Snapshot.load(self._folder, self.namespace, self.embedding_func.embedding_dim)
+            self.storage_updated.value = False
+
+    async def _get_snapshot(self) -> _Snapshot:
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            return self._snapshot
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        if not data:
+            return
+
+        current_time = int(time.time())
+        records = [
+            (
+                doc_id,
+                {
+                    "__created_at__": current_time,
+                    **{k: v for k, v in value.items() if k in self.meta_fields},
+                },
+            )
+            for doc_id, value in data.items()
+        ]
+        contents = [value["content"] for value in data.values()]
+        vectors = []
+        for start in range(0, len(contents), self._max_batch_size):
+            batch = contents[start:start + self._max_batch_size]
+            vectors.append(await self.embedding_func(batch, context="document"))
+        matrix = _normalize(np.concatenate(vectors).reshape(len(records), -1))
+
+        async with self._storage_lock:
+            for (doc_id, record), vector in zip(records, matrix):
+                self._pending_deletes.discard(doc_id)
+                self._pending_upserts[doc_id] = (record, vector)
+
+    async def delete(self, ids: list[str]):
+        async with self._storage_lock:
+            for doc_id in ids:
+                self._pending_upserts.pop(doc_id, None)
+                self._pending_deletes.add(doc_id)
+
+    async def delete_entity(self, entity_name: str) -> None:
+        await self.delete([compute_mdhash_id(entity_name, prefix="ent-")])
+
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            snapshot = self._snapshot
+            ids = [
+                doc_id
+                for doc_id, row in zip(snapshot.ids, snapshot.rows)
+                if row.get("src_id") == entity_name or row.get("tgt_id") == entity_name
+            ]
+            ids += [
+                doc_id
+                for doc_id, (record, _) in self._pending_upserts.items()
+                if record.get("src_id") == entity_name or record.get("tgt_id") == entity_name
+            ]
+            for doc_id in ids:
+                self._pending_upserts.pop(doc_id, None)
+                self._pending_deletes.add(doc_id)
+        logger.debug(f"[{self.workspace}] Queued {len(ids)} relation deletes for {entity_name}")
+
+    async def index_done_callback(self) -> bool:
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            if not self._pending_upserts and not self._pending_deletes:
+                return True
+
+            snapshot = self._snapshot
+            removed = self._pending_deletes | set(self._pending_upserts)
+            keep = [i for i, doc_id in enumerate(snapshot.ids) if doc_id not in removed]
+            ids = [snapshot.ids[i] for i in keep] + list(self._pending_upserts)
+            rows = [snapshot.rows[i] for i in keep] + [record for record, _ in self._pending_upserts.values()]
+            new_vectors = np.zeros((0, snapshot.embedding_dim), dtype=np.float32)
+            if self._pending_upserts:
+                new_vectors = np.stack([vector for _, vector in self._pending_upserts.values()])
+            matrix = np.concatenate([np.asarray(snapshot.matrix[keep]), new_vectors])
+
+            ann_index = None
+            if self._needs_ann(len(ids)):
+                old = snapshot.ann_index
+                if old is not None and len(ids) <= 2 * old.trained_rows:
+                    # Incremental: giữ centroid, chỉ gán cụm cho các dòng mới
+                    assignments = np.concatenate([old.assignments[keep], old.assign(new_vectors)])
+                    ann_index = IVFFlatIndex(old.centroids, assignments, old.nprobe, old.trained_rows)
+                else:
+                    ann_index = self._train_ann(matrix)
+
+            self._commit_locked(ids, rows, matrix, ann_index)
+            self._pending_upserts.clear()
+            self._pending_deletes.clear()
+
+            await set_all_update_flags(self.namespace, workspace=self.workspace)
+            self.storage_updated.value = False
+            return True
+
+    def _needs_ann(self, rows: int) -> bool:
+        return self._ann_enabled and rows >= self._ann_min_rows
+
+    def _train_ann(self, matrix: np.ndarray) -> IVFFlatIndex:
+        started = time.perf_counter()
+        ann_index = IVFFlatIndex.train(
+            matrix, nlist=self._ann_nlist, target_recall=self._ann_target_recall, k=self._ann_recall_k
+        )
+        logger.info(
+            f"[{self.workspace}] Trained IVF index for {self.namespace}: {matrix.shape[0]} rows, "
+            f"nlist={ann_index.nlist}, nprobe={ann_index.nprobe} ({time.perf_counter() - started:.2f}s)"
+        )
+        return ann_index
+
+    def _commit_locked(self, ids: List[str], rows: List[dict], matrix: np.ndarray, ann_index: Optional[IVFFlatIndex]):
+        snapshot = self._snapshot
+        write_snapshot(self._folder, self.namespace, snapshot.embedding_dim, ids, rows, matrix, ann_index)
+        self._snapshot = _Snapshot.load(self._folder, self.namespace, snapshot.embedding_dim)
+        # Worker khác đang map file cũ vẫn đọc được (inode còn sống tới khi unmap)
+        _remove_quietly(self._folder, *snapshot.files)
+
+    async def drop_pending_index_ops(self) -> None:
+        if self._storage_lock is None:
+            self._pending_upserts.clear()
+            self._pending_deletes.clear()
+            return
+        async with self._storage_lock:
+            self._pending_upserts.clear()
+            self._pending_deletes.clear()
+
+    async def finalize(self):
+        if self._storage_lock is not None and (self._pending_upserts or self._pending_deletes):
+            await self.index_done_callback()
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            async with self._storage_lock:
+                dim = self.embedding_func.embedding_dim
+                self._commit_locked([], [], np.zeros((0, dim), dtype=np.float32), None)
+                self._pending_upserts.clear()
+                self._pending_deletes.clear()
+                await set_all_update_flags(self.namespace, workspace=self.workspace)
+                self.storage_updated.value = False
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def query(self, query: str, top_k: int, query_embedding: list[float] = None) -> list[dict[str, Any]]:
+        if query_embedding is None:
+            query_embedding = (await self.embedding_func(
+                [query], context="query", _priority=DEFAULT_QUERY_PRIORITY
+            ))[0]
+        vector = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+        snapshot = await self._get_snapshot()
+        if not snapshot.ids:
+            return []
+        if snapshot.ann_index is not None:
+            candidates, scores = snapshot.ann_index.search(snapshot.matrix, vector, top_k)
+        else:
+            scores = snapshot.matrix @ vector
+            k = min(top_k, len(scores))
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            candidates = candidates[np.argsort(-scores[candidates])]
+            scores = scores[candidates]
+
+        results = []
+        for i, score in zip(candidates, scores):
+            score = float(score)
+            if score < self.cosine_better_than_threshold:
+                break
+            row = snapshot.rows[i]
+            results.append({
+                **row,
+                "__id__": snapshot.ids[i],
+                "id": snapshot.ids[i],
+                "distance": score,
+                "created_at": row.get("__created_at__"),
+            })
+        return results
+
+    def _lookup_locked(self, doc_id: str) -> tuple:
+        """(record, vector) của doc_id, ưu tiên thay đổi chưa flush"""
+        pending = self._pending_upserts.get(doc_id)
+        if pending is not None:
+            return pending
+        if doc_id in self._pending_deletes:
+            return None, None
+        i = self._snapshot.index.get(doc_id)
+        if i is None:
+            return None, None
+        return self._snapshot.rows[i], self._snapshot.matrix[i]
+
+    @staticmethod
+    def _format_record(doc_id: str, record: dict) -> dict[str, Any]:
+        return {**record, "id": doc_id, "created_at": record.get("__created_at__")}
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            record, _ = self._lookup_locked(id)
+        return self._format_record(id, record) if record is not None else None
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            records = [self._lookup_locked(doc_id)[0] for doc_id in ids]
+        return [
+            self._format_record(doc_id, record) if record is not None else None
+            for doc_id, record in zip(ids, records)
+        ]
+
+    async def get_vectors_by_ids(self, ids: list[str]) -> dict[str, list[float]]:
+        async with self._storage_lock:
+            self._reload_if_updated_locked()
+            vectors = {doc_id: self._lookup_locked(doc_id)[1] for doc_id in ids}
+        return {doc_id: np.asarray(v, dtype=np.float32).tolist() for doc_id, v in vectors.items() if v is not None}
+
+
+def register_memmap_vector_storage():
+    """Đăng ký backend với registry của LightRAG để dùng vector_storage='MemmapVectorDBStorage'"""
+    from lightrag.kg import STORAGES, STORAGE_IMPLEMENTATIONS
+
+    implementations = STORAGE_IMPLEMENTATIONS["VECTOR_STORAGE"]["implementations"]
+    if STORAGE_NAME not in implementations:
+        implementations.append(STORAGE_NAME)
+    STORAGES[STORAGE_NAME] = __name__
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+# (variant_id, scenario_id, context_id)
+PromptKey = Tuple[str, str, str]
+
+
+class SystemPromptCache:
+    """
+    Read-through cache (LRU, trong process) cho system prompt đã compile của conversation.
+    - Key (variant_id, scenario_id, context_id); miss thì builder đọc catalog rồi compile một lần
+    - invalidate theo variant/scenario khi VariantService/ScenarioService ghi, hoặc qua change stream
+    - ttl là lưới an toàn khi process khác ghi catalog mà không có change stream (0 = không hết hạn)
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[PromptKey, Tuple[float, str]]" = OrderedDict()
+        # Tăng mỗi lần invalidate; prompt build từ generation cũ không được lưu
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._watcher: Optional[threading.Thread] = None
+
+    def get(self, key: PromptKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, prompt = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return prompt
+
+    def put(self, key: PromptKey, prompt: str, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic(), prompt)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_build(self, key: PromptKey, builder: Callable[[], Awaitable[str]]) -> str:
+        prompt = self.get(key)
+        if prompt is not None:
+            self.hits += 1
+            return prompt
+        self.misses += 1
+        generation = self.generation
+        prompt = await builder()
+        self.put(key, prompt, generation)
+        return prompt
+
+    def invalidate(self, variant_id: Optional[str] = None, scenario_id: Optional[str] = None):
+        """Không truyền gì -> xoá hết; truyền id -> chỉ xoá các prompt dùng variant/scenario đó"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            if variant_id is None and scenario_id is None:
+                self._entries.clear()
+                return
+            for key in [
+                k for k in self._entries
+                if (variant_id is not None and k[0] == variant_id)
+                or (scenario_id is not None and k[1] == scenario_id)
+            ]:
+                del self._entries[key]
+
+    def watch_changes(self, db):
+        """
+        Theo dõi change stream của variants/scenarios trong thread nền để invalidate
+        khi process khác ghi catalog. Cần MongoDB replica set; không hỗ trợ thì dựa vào ttl.
+        """
+        if self._watcher is not None:
+            return
+
+        def run():
+            try:
+                with db.watch(
+                    [{"$match": {"ns.coll": {"$in": ["variants", "scenarios"]}}}],
+                    full_document=None
+                ) as stream:
+                    print("👀 Watching variants/scenarios changes for system prompt cache")
+                    for change in stream:
+                        document_id = str(change.get("documentKey", {}).get("_id"))
+                        if change["ns"]["coll"] == "variants":
+                            self.invalidate(variant_id=document_id)
+                        else:
+                            self.invalidate(scenario_id=document_id)
+            except Exception as e:
+                print(f"⚠️ Prompt cache change stream unavailable ({e}), relying on TTL")
+
+        self._watcher = threading.Thread(target=run, name="prompt-cache-watch", daemon=True)
+        self._watcher.start()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "watching_changes": self._watcher is not None and self._watcher.is_alive(),
+        }
+
+
+system_prompt_cache = SystemPromptCache(
+    max_entries=settings.PROMPT_CACHE_MAX_ENTRIES,
+    ttl=settings.PROMPT_CACHE_TTL
+)
@@ -0,0 +1,241 @@
+import json
+import os
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.services.lightrag_service import LightRAGService, rag_service
+
+TEXT_EXTENSIONS = (".txt", ".md")
+
+# (file_path, content)
+Document = Tuple[str, str]
+
+
+def doc_id_for(content: str) -> str:
+    """Cùng cách băm với LightRAG -> khớp được với kv_store_doc_status"""
+    from lightrag.utils import compute_mdhash_id
+    return compute_mdhash_id(content.strip(), prefix="doc-")
+
+
+def _document_from_json(line: str, default_path: str) -> Optional[Document]:
+    line = line.strip()
+    if not line:
+        return None
+    record = json.loads(line)
+    content = record.get("text") or record.get("content") or ""
+    if not content.strip():
+        return None
+    return record.get("file_path") or default_path, content
+
+
+def iter_directory(folder: str) -> Iterator[Document]:
+    """Duyệt đệ quy các file .txt/.md theo thứ tự cố định (để checkpoint theo vị trí)"""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(TEXT_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+            if content.strip():
+                yield os.path.relpath(path, folder), content
+
+
+def iter_jsonl(path: str) -> Iterator[Document]:
+    """Mỗi dòng: {"text" | "content": ..., "file_path": ...}"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            document = _document_from_json(line, f"{os.path.basename(path)}:{line_no}")
+            if document:
+                yield document
+
+
+def iter_source(source: str) -> Iterator[Document]:
+    if os.path.isdir(source):
+        return iter_directory(source)
+    if source.endswith(".jsonl"):
+        return iter_jsonl(source)
+    raise ValueError(f"Unsupported ingestion source: {source} (expected a directory or a .jsonl file)")
+
+
+async def aiter_jsonl_stream(chunks: AsyncIterable[bytes], source_name: str = "upload") -> AsyncIterator[Document]:
+    """Đọc JSONL từ body request theo từng chunk, không cần giữ cả file trong RAM"""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            document = _document_from_json(line.decode("utf-8"), f"{source_name}:{line_no}")
+            if document:
+                yield document
+    if buffer.strip():
+        document = _document_from_json(buffer.decode("utf-8"), f"{source_name}:{line_no + 1}")
+        if document:
+            yield document
+
+
+async def _aiter(documents: Iterable[Document]) -> AsyncIterator[Document]:
+    for document in documents:
+        yield document
+
+
+class IngestionCheckpoint:
+    """
+    Lưu tiến độ theo từng nguồn (số tài liệu đã xử lý xong) vào file JSON,
+    ghi bằng atomic rename nên crash giữa chừng vẫn resume được.
+    Position chỉ có nghĩa cho lần chạy còn dở: chạy xong thì complete() xoá về 0,
+    lần sau duyệt lại từ đầu (tài liệu đã processed bị bỏ qua nhờ hash) để file mới
+    sắp xếp trước vị trí cũ vẫn được nạp.
+    """
+
+    def __init__(self, path: str, source_key: str):
+        self.path = path
+        self.source_key = source_key
+        self.position = 0
+        self.failed: List[str] = []
+        self._data: Dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._data = json.load(f)
+            entry = self._data.get(source_key, {})
+            self.position = entry.get("position", 0)
+            self.failed = entry.get("failed", [])
+
+    def save(self, position: int, failed: List[str], report: Dict[str, Any]):
+        self.position = position
+        self.failed = failed
+        self._data[self.source_key] = {
+            "position": position,
+            "failed": failed,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "last_report": report,
+        }
+        self._write()
+
+    def complete(self, report: Dict[str, Any]):
+        """Nguồn đã duyệt hết: bỏ position, chỉ giữ report của lần chạy cuối"""
+        self.save(0, [], report)
+
+    def _write(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.position = 0
+        self.failed = []
+
+
+class RagIngestionPipeline:
+    """
+    Nạp tài liệu hàng loạt vào LightRAG:
+    - Băm nội dung để bỏ qua tài liệu đã 'processed' trong kv_store_doc_status
+    - Gom batch_size tài liệu mỗi lần ainsert; chunk/embedding được LightRAG gom batch
+      và giới hạn concurrency theo RAG_EMBEDDING_BATCH_NUM / RAG_EMBEDDING_MAX_ASYNC / RAG_MAX_PARALLEL_INSERT
+    - Checkpoint sau mỗi batch (khi có checkpoint) để resume sau crash
+    """
+
+    def __init__(self, service: LightRAGService = rag_service, batch_size: Optional[int] = None):
+        self.service = service
+        self.batch_size = batch_size or settings.RAG_INGEST_BATCH_SIZE
+
+    async def ingest_source(self, source: str, checkpoint_path: Optional[str] = None, reset: bool = False) -> Dict[str, Any]:
+        checkpoint_path = checkpoint_path or settings.RAG_INGEST_CHECKPOINT_PATH
+        checkpoint = IngestionCheckpoint(checkpoint_path, os.path.abspath(source)) if checkpoint_path else None
+        if checkpoint and reset:
+            checkpoint.reset()
+        report = await self.ingest(_aiter(iter_source(source)), checkpoint)
+        if checkpoint:
+            await run_in_threadpool(checkpoint.complete, report)
+        return report
+
+    async def ingest(self, documents: AsyncIterable[Document], checkpoint=None, offset: int = 0) -> Dict[str, Any]:
+        """
+        checkpoint: IngestionCheckpoint hoặc object cùng interface (position, failed, save)
+        offset: số tài liệu đầu nguồn mà documents đã tự bỏ qua (nguồn seek thẳng tới checkpoint)
+        """
+        start_position = checkpoint.position if checkpoint else 0
+        stats = {
+            "seen": offset,
+            "skipped_checkpoint": offset,
+            "skipped_processed": 0,
+            "inserted": 0,
+            "failed": 0,
+        }
+        failed: List[str] = list(checkpoint.failed) if checkpoint else []
+        embedding_calls_before = self.service.embedding_calls
+        started = time.perf_counter()
+        position = offset
+        batch: List[Document] = []
+
+        def report() -> Dict[str, Any]:
+            elapsed = time.perf_counter() - started
+            embedding_calls = self.service.embedding_calls - embedding_calls_before
+            return {
+                **stats,
+                "position": position,
+                "elapsed_sec": round(elapsed, 2),
+                "docs_per_sec": round(stats["inserted"] / elapsed, 3) if elapsed else 0.0,
+                "embedding_calls": embedding_calls,
+                "embedding_calls_per_doc": round(embedding_calls / stats["inserted"], 2) if stats["inserted"] else 0.0,
+                "failed_files": failed,
+            }
+
+        async def flush():
+            await self._ingest_batch(batch, stats, failed)
+            batch.clear()
+            if checkpoint:
+                await run_in_threadpool(checkpoint.save, position, failed, report())
+            print(f"📥 Ingest: {position} docs ({stats['inserted']} inserted, {stats['skipped_processed']} skipped)")
+
+        async for document in documents:
+            position += 1
+            stats["seen"] += 1
+            if position <= start_position:
+                stats["skipped_checkpoint"] += 1
+                continue
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                await flush()
+        if batch:
+            await flush()
+        return report()
+
+    async def _ingest_batch(self, batch: List[Document], stats: Dict[str, int], failed: List[str]):
+        # Trùng nội dung trong cùng batch hoặc đã processed trước đó -> bỏ qua
+        unique: Dict[str, Document] = {}
+        for file_path, content in batch:
+            doc_id = doc_id_for(content)
+            if doc_id in unique:
+                stats["skipped_processed"] += 1
+            else:
+                unique[doc_id] = (file_path, content)
+
+        statuses = await self.service.get_doc_statuses(list(unique))
+        pending = {doc_id: doc for doc_id, doc in unique.items() if statuses.get(doc_id) != "processed"}
+        stats["skipped_processed"] += len(unique) - len(pending)
+        if not pending:
+            return
+
+        ids = list(pending)
+        await self.service.insert_documents(
+            [content.strip() for _, content in pending.values()],
+            ids=ids,
+            file_paths=[file_path for file_path, _ in pending.values()],
+        )
+        statuses = await self.service.get_doc_statuses(ids)
+        for doc_id in ids:
+            if statuses.get(doc_id) == "processed":
+                stats["inserted"] += 1
+            else:
+                stats["failed"] += 1
+                failed.append(pending[doc_id][0])
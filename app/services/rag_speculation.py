@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Optional
+from app.core.config import settings
+
+
+class RagSpeculation:
+    """
+    Chạy trước LightRAG retrieval song song với bước phân loại câu hỏi.
+    - Giới hạn số retrieval suy đoán chạy cùng lúc để chi phí bị chặn trên
+    - Huỷ ngay khi biết câu hỏi không phải 'vocab'
+    - Ghi lại thời gian tiết kiệm được / lãng phí để biết speculation có đáng không
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self.started = 0
+        self.skipped = 0
+        self.used = 0
+        self.cancelled = 0
+        self.saved_ms = 0.0
+        self.wasted_ms = 0.0
+
+    def start(self, coro: Awaitable[Any]) -> Optional["SpeculativeTask"]:
+        if self._in_flight >= self.max_in_flight:
+            self.skipped += 1
+            coro.close()
+            return None
+        self._in_flight += 1
+        self.started += 1
+        return SpeculativeTask(self, coro)
+
+    def _done(self):
+        self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "started": self.started,
+            "skipped": self.skipped,
+            "used": self.used,
+            "cancelled": self.cancelled,
+            "saved_ms_total": round(self.saved_ms, 1),
+            "saved_ms_avg": round(self.saved_ms / self.used, 1) if self.used else 0.0,
+            "wasted_ms_total": round(self.wasted_ms, 1),
+        }
+
+
+class SpeculativeTask:
+    def __init__(self, owner: RagSpeculation, coro: Awaitable[Any]):
+        self._owner = owner
+        self._started_at = time.perf_counter()
+        self._finished_at: Optional[float] = None
+        self._task = asyncio.ensure_future(coro)
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, _):
+        self._finished_at = time.perf_counter()
+        self._owner._done()
+
+    async def use(self, decided_at: float) -> Any:
+        """Lấy kết quả retrieval; decided_at là lúc bước phân loại xong"""
+        result = await self._task
+        classify_time = decided_at - self._started_at
+        retrieval_time = self._finished_at - self._started_at
+        # Chạy tuần tự sẽ tốn classify + retrieval, song song chỉ tốn max(...)
+        self._owner.used += 1
+        self._owner.saved_ms += min(classify_time, retrieval_time) * 1000
+        return result
+
+    def cancel(self):
+        ran_for = (self._finished_at or time.perf_counter()) - self._started_at
+        self._owner.cancelled += 1
+        self._owner.wasted_ms += ran_for * 1000
+        if not self._task.done():
+            self._task.cancel()
+        elif not self._task.cancelled():
+            # Tránh warning "exception was never retrieved"
+            self._task.exception()
+
+
+rag_speculation = RagSpeculation(max_in_flight=settings.CHATBOT_SPECULATIVE_RAG_MAX_IN_FLIGHT)
@@ -1,20 +1,24 @@
 from app.repositories.scenario_repository import ScenarioRepository
 from app.schemas.scenario_response import ScenarioResponse
 from app.schemas.request.scenario_request import ScenarioModel
+from app.services.prompt_cache import system_prompt_cache
 
 class ScenarioService:
     def __init__(self):
         self.repository = ScenarioRepository()
 
-    def get_all_scenarios(self):
-        scenarios = self.repository.find_all()
+    async def get_all_scenarios(self):
+        scenarios = await self.repository.find_all()
         return [self.to_response(scenario) for scenario in scenarios]
     
-    def save(self, scenario: ScenarioModel):
-        return self.to_response(self.repository.save(scenario))
+    async def save(self, scenario: ScenarioModel):
+        saved = await self.repository.save(scenario)
+        # System prompt compile từ scenario này (mọi context) không còn đúng
+        system_prompt_cache.invalidate(scenario_id=str(saved.get('_id')))
+        return self.to_response(saved)
     
-    def find_scenarios_by_variant(self, variant_id: str):
-        return self.to_response(self.repository.find_all_by_variant(variant_id=variant_id))
+    async def find_scenarios_by_variant(self, variant_id: str):
+        return self.to_response(await self.repository.find_all_by_variant(variant_id=variant_id))
 
     def to_response(self, scenario):
         return ScenarioResponse(
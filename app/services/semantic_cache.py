@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import numpy as np
+from app.core.config import settings
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SemanticQueryCache:
+    """
+    Cache kết quả RAG theo embedding của câu hỏi.
+    Câu hỏi gần giống nhau (cosine >= threshold, cùng mode) dùng lại kết quả đã có.
+    Mỗi mode có một LRU riêng; gọi invalidate() khi knowledge graph thay đổi.
+    """
+
+    def __init__(self, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # mode -> OrderedDict[normalized question -> (unit vector, result)]
+        self._entries: Dict[str, "OrderedDict[str, tuple]"] = {}
+        # Tăng mỗi lần invalidate; kết quả tính từ generation cũ sẽ không được lưu
+        self.generation = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_exact(self, mode: str, question: str) -> Optional[Any]:
+        key = _normalize_text(question)
+        with self._lock:
+            entries = self._entries.get(mode)
+            if entries and key in entries:
+                entries.move_to_end(key)
+                self.exact_hits += 1
+                return entries[key][1]
+        return None
+
+    def get_similar(self, mode: str, embedding: np.ndarray) -> Optional[Any]:
+        vector = self._unit(embedding)
+        with self._lock:
+            entries = self._entries.get(mode)
+            if not entries:
+                self.misses += 1
+                return None
+            keys = list(entries.keys())
+            matrix = np.stack([entries[k][0] for k in keys])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                entries.move_to_end(keys[best])
+                self.semantic_hits += 1
+                return entries[keys[best]][1]
+            self.misses += 1
+            return None
+
+    def put(self, mode: str, question: str, embedding: np.ndarray, result: Any, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            entries = self._entries.setdefault(mode, OrderedDict())
+            entries[_normalize_text(question)] = (self._unit(embedding), result)
+            entries.move_to_end(_normalize_text(question))
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def _unit(self, embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "entries_by_mode": {mode: len(e) for mode, e in self._entries.items()},
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+rag_query_cache = SemanticQueryCache(
+    threshold=settings.RAG_SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.RAG_SEMANTIC_CACHE_MAX_ENTRIES,
+)
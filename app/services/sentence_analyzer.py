@@ -97,11 +97,13 @@ from pydantic import BaseModel, Field
 from enum import Enum
 import json
 from app.core.ai_provider import get_gemini_provider
-from dotenv import load_dotenv
-import os
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL', '')
+from app.enums.enum_llm_priority import LLMPriority
+from app.core.config import settings
+GEMINI_API_KEY = settings.GEMINI_API_KEY
+GEMINI_MODEL = settings.GEMINI_MODEL
+
+# Cùng một danh sách câu thì kết quả phân tích ngữ pháp giống nhau
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600
 
 # ============================================================================
 # ENUMS - Error Types
@@ -211,6 +213,27 @@ class SentenceAnalyzer:
         
         # Fallback sang rule-based
         return self._analyze_with_rules(sentences)
+
+    async def aanalyze(self, sentences: List[str]) -> List[SentenceAnalysis]:
+        """
+        Bản async của analyze, gọi AI qua client async nên không block event loop
+        
+        Args:
+            sentences: List các câu cần phân tích
+            
+        Returns:
+            List[SentenceAnalysis]: Kết quả phân tích từng câu
+        """
+        if not sentences:
+            return []
+        
+        if self.use_ai and self._is_ai_available():
+            try:
+                return await self._aanalyze_with_ai(sentences)
+            except Exception as e:
+                print(f"AI analysis failed: {e}, falling back to rules")
+        
+        return self._analyze_with_rules(sentences)
     
     def analyze_single(self, sentence: str) -> SentenceAnalysis:
         """
@@ -280,8 +303,34 @@ class SentenceAnalyzer:
             history=history,
             system_instruction=system_instruction,
             response_schema=AnalysisResult,
+            cache_ttl=ANALYSIS_CACHE_TTL,
+        )
+        
+        return self._to_sentence_analyses(sentences, response)
+
+    async def _aanalyze_with_ai(self, sentences: List[str]) -> List[SentenceAnalysis]:
+        """Bản async của _analyze_with_ai"""
+        system_instruction = self._get_ai_system_prompt()
+        user_content = json.dumps({"sentences": sentences}, ensure_ascii=False)
+        
+        history = [{"role": "user", "content": user_content}]
+        
+        response = await self.client.agenerate_chat_response(
+            history=history,
+            system_instruction=system_instruction,
+            response_schema=AnalysisResult,
+            cache_ttl=ANALYSIS_CACHE_TTL,
+            priority=LLMPriority.WRITING,
         )
         
+        return self._to_sentence_analyses(sentences, response)
+
+    def _to_sentence_analyses(
+        self,
+        sentences: List[str],
+        response: AnalysisResult
+    ) -> List[SentenceAnalysis]:
+        """Chuyển kết quả AI sang List[SentenceAnalysis]"""
         # Parse response
         if not response or not hasattr(response, 'results'):
             raise ValueError("Invalid AI response format")
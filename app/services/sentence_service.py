@@ -5,43 +5,43 @@ class SentenceService:
     def __init__(self):
         self.repository = SentenceRepository()
 
-    def get_all_sentences(self):
-        sentences = self.repository.find_all()
+    async def get_all_sentences(self):
+        sentences = await self.repository.find_all()
         return [self._to_response(sen) for sen in sentences]
     
-    def get_sentences_by_level(self, level: str):
-        sentences = self.repository.find_by_level(level=level)
+    async def get_sentences_by_level(self, level: str):
+        sentences = await self.repository.find_by_level(level=level)
         return [self._to_response(sen) for sen in sentences]
     
-    def get_sentence_by_id(self, sentence_id: str):
-        sentence = self.repository.find_by_id(sentence_id=sentence_id)
+    async def get_sentence_by_id(self, sentence_id: str):
+        sentence = await self.repository.find_by_id(sentence_id=sentence_id)
         return self._to_response(sentence)
     
-    def get_sentences_by_topic(self, topic: str):
-        sentences = self.repository.find_by_topic(topic=topic)
+    async def get_sentences_by_topic(self, topic: str):
+        sentences = await self.repository.find_by_topic(topic=topic)
         return [self._to_response(sen) for sen in sentences]
     
-    def create_sentence(self, sentence_data: dict):
-        return self.repository.save(sentence_data)
+    async def create_sentence(self, sentence_data: dict):
+        return await self.repository.save(sentence_data)
     
-    def get_topics(self):
-        return self.repository.find_topics()
+    async def get_topics(self):
+        return await self.repository.find_topics()
     
-    def get_levels(self):
-        return self.repository.find_levels()
+    async def get_levels(self):
+        return await self.repository.find_levels()
     
-    def get_sets(self):
-        return self.repository.find_sets()
+    async def get_sets(self):
+        return await self.repository.find_sets()
     
-    def get_sentences_by_topic_and_level(self, topic: str, level: str):
-        sentences = self.repository.find_sentences_by_topic_and_level(topic=topic, level=level)
+    async def get_sentences_by_topic_and_level(self, topic: str, level: str):
+        sentences = await self.repository.find_sentences_by_topic_and_level(topic=topic, level=level)
         return [self._to_response(sen) for sen in sentences]
     
-    def get_topics_by_level(self, level: str):
-        return self.repository.get_topics_by_level(level=level)
+    async def get_topics_by_level(self, level: str):
+        return await self.repository.get_topics_by_level(level=level)
     
-    def get_levels_by_topic(self, topic: str):
-        return self.repository.get_levels_by_topic(topic=topic)
+    async def get_levels_by_topic(self, topic: str):
+        return await self.repository.get_levels_by_topic(topic=topic)
     
     def _to_response(self, sen):
         return SentenceResponse(
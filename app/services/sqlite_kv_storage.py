@@ -0,0 +1,324 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, final
+
+from lightrag.base import BaseKVStorage
+from lightrag.utils import logger, validate_workspace
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    id TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    cache_type TEXT,
+    chunk_id TEXT,
+    size INTEGER NOT NULL,
+    create_time INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_kv_accessed_at ON kv (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_kv_chunk_id ON kv (chunk_id);
+-- Tổng size giữ sẵn trong kv_meta (trigger cập nhật theo từng dòng ghi/xoá) để flush không phải SUM cả bảng
+CREATE TABLE IF NOT EXISTS kv_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS kv_size_insert AFTER INSERT ON kv BEGIN
+    UPDATE kv_meta SET value = value + NEW.size WHERE key = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS kv_size_delete AFTER DELETE ON kv BEGIN
+    UPDATE kv_meta SET value = value - OLD.size WHERE key = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS kv_size_update AFTER UPDATE OF size ON kv BEGIN
+    UPDATE kv_meta SET value = value + NEW.size - OLD.size WHERE key = 'total_size';
+END;
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    # WAL: ghi nối tiếp vào log, reader không bị chặn, nhiều process dùng chung được
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # INSERT OR REPLACE xoá dòng cũ: chỉ kích hoạt trigger DELETE khi bật recursive_triggers
+    conn.execute("PRAGMA recursive_triggers=ON")
+    conn.executescript(_SCHEMA)
+    with conn:
+        if conn.execute("SELECT 1 FROM kv_meta WHERE key = 'total_size'").fetchone() is None:
+            # File tạo trước khi có kv_meta: tính tổng một lần
+            conn.execute("INSERT INTO kv_meta SELECT 'total_size', COALESCE(SUM(size), 0) FROM kv")
+    return conn
+
+
+def connect_reader(db_path: str) -> sqlite3.Connection:
+    """Connection chỉ đọc: với WAL, reader đọc snapshot đã commit, không chờ transaction ghi đang chạy"""
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def total_size(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT value FROM kv_meta WHERE key = 'total_size'").fetchone()[0]
+
+
+def _row(key: str, value: Dict[str, Any], now: float) -> tuple:
+    encoded = json.dumps(value, ensure_ascii=False)
+    return (
+        key,
+        encoded,
+        value.get("cache_type"),
+        value.get("chunk_id"),
+        len(encoded),
+        int(value.get("create_time") or now),
+        now,
+    )
+
+
+def import_json(conn: sqlite3.Connection, json_path: str) -> int:
+    """Nạp file kv_store_*.json cũ vào SQLite (một lần khi chuyển backend)"""
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_row(key, {**value, "_id": key}, now) for key, value in data.items()],
+        )
+    return len(data)
+
+
+def evict_to_size(conn: sqlite3.Connection, max_bytes: int, batch: int = 500) -> int:
+    """
+    Xoá các entry lâu không dùng nhất cho tới khi tổng kích thước <= max_bytes.
+    Chi phí theo số entry bị xoá, không theo kích thước cache.
+    """
+    total = total_size(conn)
+    if total <= max_bytes:
+        return 0
+    removed = 0
+    with conn:
+        while total > max_bytes:
+            rows = conn.execute("SELECT id, size FROM kv ORDER BY accessed_at LIMIT ?", (batch,)).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if total <= max_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM kv WHERE id = ?", victims)
+            removed += len(victims)
+    return removed
+
+
+def compact(
+    conn: sqlite3.Connection,
+    live_chunk_ids: Optional[Iterable[str]] = None,
+    max_age_days: Optional[float] = None,
+    cache_types: Iterable[str] = ("query", "keywords"),
+) -> Dict[str, int]:
+    """
+    Dọn cache:
+    - Entry 'extract'/'summary' gắn với chunk không còn trong text_chunks (tài liệu đã xoá / nạp lại)
+    - Entry thuộc cache_types (mặc định query/keywords) không được dùng trong max_age_days ngày
+    Sau đó VACUUM để trả lại dung lượng file.
+    """
+    stats = {"stale_extract": 0, "expired": 0}
+    with conn:
+        if live_chunk_ids is not None:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS live_chunks (id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM live_chunks")
+            conn.executemany("INSERT OR IGNORE INTO live_chunks VALUES (?)", ((c,) for c in live_chunk_ids))
+            stats["stale_extract"] = conn.execute(
+                "DELETE FROM kv WHERE chunk_id IS NOT NULL AND chunk_id NOT IN (SELECT id FROM live_chunks)"
+            ).rowcount
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            types = list(cache_types)
+            stats["expired"] = conn.execute(
+                f"DELETE FROM kv WHERE accessed_at < ? AND cache_type IN ({','.join('?' * len(types))})",
+                (cutoff, *types),
+            ).rowcount
+    conn.execute("VACUUM")
+    stats["remaining"] = conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+    return stats
+
+
+@final
+@dataclass
+class SqliteKVStorage(BaseKVStorage):
+    """
+    KV storage của LightRAG trên SQLite (WAL), dùng cho llm_response_cache thay vì một file JSON lớn:
+    - upsert chỉ ghi vào buffer, index_done_callback ghi đúng phần thay đổi trong một transaction
+      -> mỗi lần flush tốn O(delta) thay vì ghi lại toàn bộ cache
+    - Tra cứu theo primary key, không phải load cả cache vào RAM
+    - Giới hạn dung lượng (max_bytes): vượt ngưỡng thì bỏ entry lâu không dùng nhất;
+      tổng dung lượng đọc từ kv_meta nên kiểm tra ngưỡng mỗi lần flush là O(1)
+    - Đọc qua connection riêng trong thread: tra cache không chặn event loop và không chờ flush / evict
+    """
+
+    max_bytes: int = 256 * 1024 * 1024
+
+    def __post_init__(self):
+        validate_workspace(self.workspace)
+        working_dir = self.global_config["working_dir"]
+        folder = os.path.join(working_dir, self.workspace) if self.workspace else working_dir
+        os.makedirs(folder, exist_ok=True)
+        self._db_path = os.path.join(folder, f"kv_store_{self.namespace}.sqlite3")
+        self._json_path = os.path.join(folder, f"kv_store_{self.namespace}.json")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_deletes: set = set()
+        # Buffer đang được flush: reader vẫn thấy cho tới khi transaction commit
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+        self._flushing_deletes: set = set()
+        self._touched: set = set()
+
+    async def initialize(self):
+        if self._conn is not None:
+            return
+        is_new = not os.path.exists(self._db_path)
+        self._conn = connect(self._db_path)
+        self._read_conn = connect_reader(self._db_path)
+        if is_new and os.path.exists(self._json_path):
+            count = import_json(self._conn, self._json_path)
+            logger.info(f"[{self.workspace}] Imported {count} {self.namespace} records from JSON into SQLite")
+
+    async def finalize(self):
+        if self._conn is None:
+            return
+        await self.index_done_callback()
+        self._read_conn.close()
+        self._read_conn = None
+        self._conn.close()
+        self._conn = None
+
+    def _select(self, ids: list[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._read_lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = self._read_conn.execute(
+                    f"SELECT id, value FROM kv WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        return found
+
+    async def _read(self, ids: list[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for key in ids:
+            if key in self._pending:
+                found[key] = self._pending[key]
+            elif key in self._pending_deletes:
+                continue
+            elif key in self._flushing:
+                found[key] = self._flushing[key]
+            elif key not in self._flushing_deletes:
+                missing.append(key)
+        if missing:
+            found.update(await asyncio.to_thread(self._select, missing))
+        self._touched.update(found)
+        return found
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        return (await self.get_by_ids([id]))[0]
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        found = await self._read(ids)
+        results = []
+        for key in ids:
+            value = found.get(key)
+            if value is not None:
+                value = {"create_time": 0, "update_time": 0, **value, "_id": key}
+            results.append(value)
+        return results
+
+    async def filter_keys(self, keys: set[str]) -> set[str]:
+        return set(keys) - set(await self._read(list(keys)))
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        if not data:
+            return
+        current_time = int(time.time())
+        existing = await self._read(list(data))
+        for key, value in data.items():
+            value["create_time"] = existing.get(key, {}).get("create_time", current_time)
+            value["update_time"] = current_time
+            value["_id"] = key
+            self._pending_deletes.discard(key)
+            self._pending[key] = value
+
+    async def delete(self, ids: list[str]) -> None:
+        for key in ids:
+            self._pending.pop(key, None)
+            self._pending_deletes.add(key)
+
+    async def is_empty(self) -> bool:
+        if self._pending:
+            return False
+        return await asyncio.to_thread(self._select_empty)
+
+    def _select_empty(self) -> bool:
+        with self._read_lock:
+            return self._read_conn.execute("SELECT 1 FROM kv LIMIT 1").fetchone() is None
+
+    def _flush(self, pending: Dict[str, Dict[str, Any]], deletes: set, touched: set) -> int:
+        now = time.time()
+        with self._lock, self._conn:
+            if deletes:
+                self._conn.executemany("DELETE FROM kv WHERE id = ?", ((key,) for key in deletes))
+            if pending:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [_row(key, value, now) for key, value in pending.items()],
+                )
+            if touched:
+                self._conn.executemany("UPDATE kv SET accessed_at = ? WHERE id = ?", ((now, key) for key in touched))
+            return evict_to_size(self._conn, self.max_bytes)
+
+    async def index_done_callback(self) -> None:
+        if not (self._pending or self._pending_deletes or self._touched):
+            return
+        pending, deletes, touched = self._pending, self._pending_deletes, self._touched - set(self._pending)
+        self._pending, self._pending_deletes, self._touched = {}, set(), set()
+        self._flushing, self._flushing_deletes = pending, deletes
+        try:
+            evicted = await asyncio.to_thread(self._flush, pending, deletes, touched)
+        except Exception:
+            # Ghi lỗi: trả lại buffer để lần flush sau thử lại
+            self._pending = {**pending, **self._pending}
+            self._pending_deletes |= deletes
+            raise
+        finally:
+            self._flushing, self._flushing_deletes = {}, set()
+        if evicted:
+            logger.info(f"[{self.workspace}] Evicted {evicted} {self.namespace} entries (size bound {self.max_bytes} bytes)")
+
+    async def drop_pending_index_ops(self) -> None:
+        self._pending.clear()
+        self._pending_deletes.clear()
+
+    async def drop(self) -> dict[str, str]:
+        try:
+            self._pending.clear()
+            self._pending_deletes.clear()
+            self._touched.clear()
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM kv")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._read_lock:
+            count = self._read_conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+            total = total_size(self._read_conn)
+        return {"entries": count, "bytes": total, "max_bytes": self.max_bytes, "pending": len(self._pending)}
@@ -1,4 +1,4 @@
-from app.repositories.exam_repository import ExamRepository
+from app.repositories.exam_repository import ExamRepository, EXAM_PARTS
 from app.schemas.request.submit_exam_request import SubmitExamRequest
 from app.utils.calculate_toeic_score import calculate_toeic_score
 from bson import ObjectId
@@ -10,13 +10,8 @@ class SubmitExamService:
     def __init__(self):
         self.repository = ExamRepository()
 
-    def submit_exam(self, request: SubmitExamRequest):            
-        try:
-            exam = self.repository.find_by_id(request.exam_id)
-        except:
-            raise HTTPException(status_code=404, detail="Exam not found")
-
-        FULL_PARTS_SET = {"Part1", "Part2", "Part3", "Part4", "Part5", "Part6", "Part7"}
+    async def submit_exam(self, request: SubmitExamRequest):            
+        FULL_PARTS_SET = set(EXAM_PARTS)
         
         user_parts = set(request.parts)
         
@@ -27,6 +22,12 @@ class SubmitExamService:
             parts_to_grade = user_parts
             is_full_test = FULL_PARTS_SET.issubset(parts_to_grade)
 
+        # Chỉ lấy questions của các part cần chấm, không kéo group_content (audio, ảnh, đoạn văn)
+        # exam_id không hợp lệ -> None; lỗi Mongo (timeout, mất kết nối) để nổi lên thành 5xx, không phải 404
+        exam = await self.repository.find_questions(request.exam_id, parts_to_grade)
+        if not exam:
+            raise HTTPException(status_code=404, detail="Exam not found")
+
         answer_key_map = {}
         total_questions_scope = 0
         
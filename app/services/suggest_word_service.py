@@ -1,16 +1,19 @@
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL', '')
+from app.core.config import settings
 from app.core.ai_provider import get_gemini_provider
+from app.enums.enum_llm_priority import LLMPriority
+
+GEMINI_API_KEY = settings.GEMINI_API_KEY
+GEMINI_MODEL = settings.GEMINI_MODEL
+
+# TTL cache (giây) cho các lookup từ vựng, kết quả gần như không đổi theo thời gian
+SUGGEST_WORDS_CACHE_TTL = 7 * 24 * 3600
+TRANSLATE_WORD_CACHE_TTL = 30 * 24 * 3600
 
 class SuggestWordService:
     def __init__(self):
         self.client = get_gemini_provider(GEMINI_API_KEY, GEMINI_MODEL)
 
-    def suggest_words(self, word: str) -> str:
+    async def suggest_words(self, word: str) -> str:
         prompt = f"""
             You are a JSON API.
 
@@ -31,9 +34,9 @@ class SuggestWordService:
 
             Word: "{word}"
         """
-        return self.client.generate_text(prompt)
+        return await self.client.agenerate_text(prompt, cache_ttl=SUGGEST_WORDS_CACHE_TTL)
     
-    def translate_word(self, word: str) -> str:
+    async def translate_word(self, word: str) -> str:
         prompt = f"""
             You are a JSON API.
 
@@ -52,9 +55,9 @@ class SuggestWordService:
 
             Translate the word "{word}" into Vietnamese.
         """
-        return self.client.generate_text(prompt)
+        return await self.client.agenerate_text(prompt, cache_ttl=TRANSLATE_WORD_CACHE_TTL)
 
-    def generate_flashcards_prompt(self, texts: list[str]) -> str:
+    async def generate_flashcards_prompt(self, texts: list[str]) -> str:
         joined_texts = "\n".join(f"- {t}" for t in texts)
 
         prompt = f"""
@@ -98,9 +101,9 @@ class SuggestWordService:
         """.strip()
 
         print("Flashcard Prompt:\n", prompt)  # Debug log
-        return self.client.generate_text(prompt)
+        return await self.client.agenerate_text(prompt, priority=LLMPriority.FLASHCARD)
 
-    def score_writing_prompt(self, title: str, description: str, content: str) -> str:
+    async def score_writing_prompt(self, title: str, description: str, content: str) -> str:
         prompt = f"""
         You are an English writing assessment API.
 
@@ -147,4 +150,4 @@ class SuggestWordService:
         {content}
         \"\"\"
         """
-        return self.client.generate_text(prompt)
+        return await self.client.agenerate_text(prompt, priority=LLMPriority.WRITING)
@@ -1,17 +1,20 @@
 from app.repositories.variant_repository import VariantRepository
 from app.schemas.variant_response import VariantResponse
 from app.schemas.request.variant_request import VariantRequest
+from app.services.prompt_cache import system_prompt_cache
 
 class VariantService:
     def __init__(self):
         self.repository = VariantRepository()
 
-    def get_all_variants(self):
-        variants = self.repository.find_all()
+    async def get_all_variants(self):
+        variants = await self.repository.find_all()
         return [self.to_response(variant) for variant in variants]
     
-    def save(self, request: VariantRequest):
-        variant = self.repository.save(request=request)
+    async def save(self, request: VariantRequest):
+        variant = await self.repository.save(request=request)
+        # System prompt compile từ variant này không còn đúng
+        system_prompt_cache.invalidate(variant_id=str(variant.get('_id')))
         return self.to_response(variant=variant)
 
     def to_response(self, variant):
@@ -0,0 +1,71 @@
+import json
+import re
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JsonStringFieldStreamer:
+    """
+    Đọc JSON đang được stream từng chunk và trả ra dần giá trị của một field string,
+    để phần text hiển thị cho user có thể gửi đi trước khi cả object JSON hoàn tất.
+    """
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._buf = ""
+        self._pos = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Thêm chunk mới, trả về phần text vừa giải mã được của field"""
+        self._buf += chunk
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = self._key.search(self._buf)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        buf, i = self._buf, self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != '\\':
+                out.append(ch)
+                i += 1
+                continue
+            # Escape sequence có thể bị cắt giữa 2 chunk -> đợi chunk sau
+            if i + 1 >= len(buf):
+                break
+            code = buf[i + 1]
+            if code == 'u':
+                if i + 6 > len(buf):
+                    break
+                cp = int(buf[i + 2:i + 6], 16)
+                if 0xD800 <= cp < 0xDC00:
+                    # Surrogate pair (emoji...) cần đủ cả \uXXXX thứ hai
+                    if i + 12 > len(buf):
+                        break
+                    low = int(buf[i + 8:i + 12], 16)
+                    out.append(chr(0x10000 + ((cp - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                else:
+                    out.append(chr(cp))
+                    i += 6
+            else:
+                out.append(_ESCAPES.get(code, code))
+                i += 2
+        self._pos = i
+        return "".join(out)
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    def parse(self) -> dict:
+        return json.loads(self._buf)
@@ -0,0 +1,7 @@
+import json
+from typing import Any
+
+def sse_event(event: str, data: Any) -> str:
+    """Đóng gói một event theo định dạng Server-Sent Events"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
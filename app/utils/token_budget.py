@@ -0,0 +1,32 @@
+from typing import Dict, List, Tuple
+
+# Ước lượng ~4 ký tự / token (tiếng Anh), đủ để giới hạn prompt mà không cần tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    # + vài token cho role / phân cách
+    return estimate_tokens(message.get("content", "")) + 4
+
+
+def trim_history(history: List[Dict[str, str]], budget: int) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Giữ các tin nhắn mới nhất vừa trong budget token (tin nhắn cuối luôn được giữ).
+    Trả về (history đã cắt, số token bị bỏ).
+    """
+    kept: List[Dict[str, str]] = []
+    used = 0
+    dropped = 0
+    for index, message in enumerate(reversed(history)):
+        tokens = message_tokens(message)
+        if index == 0 or (not dropped and used + tokens <= budget):
+            kept.append(message)
+            used += tokens
+        else:
+            dropped += tokens
+    kept.reverse()
+    return kept, dropped
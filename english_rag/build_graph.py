@@ -93,41 +93,8 @@ def main():
 
     rag = asyncio.run(initialize_rag())
 
-    # DATASET_DIR = "./reading_topic"
-    # files = [f for f in os.listdir(DATASET_DIR) if f.endswith(".txt")]
-    # files = files[:3]
-    # print(f"📂 Tìm thấy {len(files)} tài liệu. Bắt đầu nạp...")
-    # for filename in files:
-    #     file_path = os.path.join(DATASET_DIR, filename)
-    #     if not os.path.exists(file_path): continue
-    #     print(f"⏳ Đang nạp: {filename} ...")
-    #     try:
-    #         with open(file_path, "r", encoding="utf-8") as f:
-    #             content = f.read()
-    #         rag.insert(content)
-    #         print(f"✅ Xong: {filename}")
-    #     except Exception as e:
-
-    #         print(f"❌ Lỗi file {filename}: {e}")
-
-    # DATASET_DIR = "./reading_output"
-    # files = [f for f in os.listdir(DATASET_DIR) if f.endswith(".txt")]
-    # files = files[:3]
-    # print(f"📂 Tìm thấy {len(files)} tài liệu để truy vấn.")
-    # for filename in files:
-    #     file_path = os.path.join(DATASET_DIR, filename)
-    #     if not os.path.exists(file_path): continue
-    #     print(f"⏳ Đang nạp: {filename} ...")
-    #     try:
-    #         with open(file_path, "r", encoding="utf-8") as f:
-    #             content = f.read()
-    #         rag.insert(content)
-    #         print(f"✅ Xong: {filename}")
-    #     except Exception as e:
-
-    #         print(f"❌ Lỗi file {filename}: {e}")
-
-    # print("📚 Nạp tài liệu hoàn tất.")
+    # Nạp tài liệu: dùng CLI ingest theo batch, có checkpoint + bỏ qua tài liệu đã nạp
+    #   python -m scripts.ingest_rag reading_topic reading_output
 
 
     query = "gợi ý tôi khi nói về môi trường thì nói về các mục nào"
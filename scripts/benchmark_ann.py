@@ -0,0 +1,93 @@
+"""
+So sánh recall@k và độ trễ của IVF-flat index với tìm kiếm vét cạn trên vector của LightRAG.
+
+Chạy từ thư mục gốc project:
+    python -m scripts.benchmark_ann --namespace entities --k 10
+    python -m scripts.benchmark_ann --scale 50000   # nhân bản corpus để thử ở quy mô lớn hơn
+
+Query được tạo bằng cách thêm nhiễu vào vector có sẵn (không cần gọi embedding API).
+"""
+import argparse
+import base64
+import json
+import os
+import time
+
+import numpy as np
+
+from app.services.ivf_index import IVFFlatIndex
+
+
+def load_matrix(working_dir: str, namespace: str) -> np.ndarray:
+    meta_path = os.path.join(working_dir, f"vdb_{namespace}.meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        return np.load(os.path.join(working_dir, meta["matrix_file"]))
+    with open(os.path.join(working_dir, f"vdb_{namespace}.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    matrix = np.frombuffer(base64.b64decode(data["matrix"]), dtype=np.float32).reshape(-1, data["embedding_dim"])
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def perturb(rng, vectors: np.ndarray, noise: float) -> np.ndarray:
+    noisy = vectors + rng.normal(0, noise / np.sqrt(vectors.shape[1]), vectors.shape).astype(np.float32)
+    return (noisy / np.linalg.norm(noisy, axis=1, keepdims=True)).astype(np.float32)
+
+
+def percentile_ms(samples, q) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IVF-flat vs exact search")
+    parser.add_argument("--working-dir", default="./rag_storage_new")
+    parser.add_argument("--namespace", default="entities")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=0, help="Tổng số vector sau khi nhân bản corpus (0 = giữ nguyên)")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--nlist", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    matrix = load_matrix(args.working_dir, args.namespace).astype(np.float32)
+    if args.scale > matrix.shape[0]:
+        extra = matrix[rng.integers(0, matrix.shape[0], args.scale - matrix.shape[0])]
+        matrix = np.concatenate([matrix, perturb(rng, extra, 0.6)])
+    print(f"Corpus: {args.namespace}, {matrix.shape[0]} vectors x {matrix.shape[1]} dim, k={args.k}")
+
+    queries = perturb(rng, matrix[rng.integers(0, matrix.shape[0], args.queries)], 0.5)
+
+    exact_ids, exact_times = [], []
+    for q in queries:
+        started = time.perf_counter()
+        scores = matrix @ q
+        top = np.argpartition(-scores, args.k - 1)[:args.k]
+        exact_times.append(time.perf_counter() - started)
+        exact_ids.append(set(top.tolist()))
+    print(f"{'exact':>12}  recall=1.000  p50={percentile_ms(exact_times, 50):.3f}ms  p95={percentile_ms(exact_times, 95):.3f}ms")
+
+    started = time.perf_counter()
+    index = IVFFlatIndex.train(matrix, nlist=args.nlist, target_recall=args.target_recall, k=args.k)
+    print(f"IVF build: nlist={index.nlist}, calibrated nprobe={index.nprobe} ({time.perf_counter() - started:.2f}s)")
+
+    probes = sorted({p for p in (1, 2, 4, 8, 16, 32, index.nprobe) if p <= index.nlist})
+    for nprobe in probes:
+        hits, times = 0, []
+        for q, truth in zip(queries, exact_ids):
+            started = time.perf_counter()
+            rows, _ = index.search(matrix, q, args.k, nprobe)
+            times.append(time.perf_counter() - started)
+            hits += len(truth & set(rows.tolist()))
+        recall = hits / (args.k * len(queries))
+        label = f"nprobe={nprobe}" + ("*" if nprobe == index.nprobe else "")
+        speedup = np.median(exact_times) / np.median(times)
+        print(
+            f"{label:>12}  recall={recall:.3f}  p50={percentile_ms(times, 50):.3f}ms  "
+            f"p95={percentile_ms(times, 95):.3f}ms  speedup={speedup:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+So sánh độ trễ đọc context mỗi lượt chat: get_session (toàn bộ lịch sử) vs get_session_window ($slice N tin cuối)
+theo độ dài session. Kỳ vọng: get_session_window gần như không đổi khi session dài ra.
+
+Dữ liệu giả được ghi vào collection tạm (mặc định chat_sessions_bench) rồi xoá khi xong.
+
+Chạy từ thư mục gốc project (cần MONGO_URL):
+    python -m scripts.benchmark_chat_window
+    python -m scripts.benchmark_chat_window --lengths 10 100 1000 5000 --runs 50 --window 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from app.db.mongodb import async_db
+from app.repositories.chat_repository import ChatRepository
+
+
+def make_session(length: int) -> dict:
+    now = datetime.now()
+    messages = []
+    for i in range(length):
+        message = {
+            "role": "user" if i % 2 == 0 else "model",
+            "content": f"Message {i}: " + "I would like to order a coffee with oat milk, please. " * 3,
+            "timestamp": now,
+        }
+        if i % 2 == 0:
+            message["analysis"] = {
+                "has_error": True,
+                "topic": "Articles",
+                "corrected": "I would like to order a coffee.",
+                "explanation": "Use 'a' before a singular countable noun. " * 4,
+            }
+        messages.append(message)
+    return {
+        "user_id": 1,
+        "variant_id": "bench",
+        "scenario_id": "bench",
+        "context_id": "bench",
+        "created_at": now,
+        "updated_at": now,
+        "messages": messages,
+    }
+
+
+async def measure(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def run(args):
+    repository = ChatRepository()
+    repository.collection = async_db[args.collection]
+    await repository.collection.drop()
+    try:
+        print(f"{'messages':>9} | {'full (ms)':>10} | {'window (ms)':>11} | speedup")
+        for length in args.lengths:
+            session_id = str((await repository.create_new_session(make_session(length))).inserted_id)
+            # Warm-up để loại chi phí kết nối lần đầu
+            await repository.get_session(session_id)
+            full_ms = await measure(lambda: repository.get_session(session_id), args.runs)
+            window_ms = await measure(lambda: repository.get_session_window(session_id, args.window), args.runs)
+            print(f"{length:>9} | {full_ms:>10.2f} | {window_ms:>11.2f} | {full_ms / window_ms:.1f}x")
+    finally:
+        await repository.collection.drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full session load vs $slice window")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 500, 1000, 5000])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--collection", default="chat_sessions_bench")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+So sánh payload (bytes BSON) và độ trễ giữa đọc nguyên document exam và đọc theo projection
+của ExamRepository: danh sách exam (summary), lọc theo part (part-only), chấm bài (question-only).
+
+Chỉ đọc collection toeic_exams hiện có, không ghi gì.
+
+Chạy từ thư mục gốc project (cần MONGO_URL):
+    python -m scripts.benchmark_exam_projection
+    python -m scripts.benchmark_exam_projection --part Part5 --runs 50
+"""
+import argparse
+import statistics
+import time
+
+import bson
+
+from app.db.mongodb import db
+from app.repositories.exam_repository import ExamRepository, SUMMARY_PROJECTION
+
+
+def measure(fn, runs: int):
+    timings = []
+    documents = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        documents = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    size = sum(len(bson.encode(doc)) for doc in documents)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full exam documents vs projected shapes")
+    parser.add_argument("--part", default="Part1")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    collection = db[ExamRepository.COLLECTION]
+    first = collection.find_one({}, {"_id": 1})
+    if first is None:
+        print("❌ toeic_exams is empty")
+        return
+    exam_id = first["_id"]
+
+    cases = [
+        (
+            "list (summary)",
+            lambda: list(collection.find()),
+            lambda: list(collection.find({}, SUMMARY_PROJECTION)),
+        ),
+        (
+            f"by part ({args.part})",
+            lambda: list(collection.find({"part_names": args.part})),
+            lambda: list(collection.find({"part_names": args.part}, {**SUMMARY_PROJECTION, f"parts.{args.part}": 1})),
+        ),
+        (
+            f"submit ({args.part} questions)",
+            lambda: [collection.find_one({"_id": exam_id})],
+            lambda: [collection.find_one({"_id": exam_id}, {f"parts.{args.part}.questions": 1})],
+        ),
+    ]
+
+    print(f"{'query':<28} {'full ms':>9} {'proj ms':>9} {'full KB':>10} {'proj KB':>10} {'smaller':>9}")
+    for name, full, projected in cases:
+        full_ms, full_size = measure(full, args.runs)
+        projected_ms, projected_size = measure(projected, args.runs)
+        ratio = full_size / projected_size if projected_size else 0.0
+        print(
+            f"{name:<28} {full_ms:>9.2f} {projected_ms:>9.2f} "
+            f"{full_size / 1024:>10.1f} {projected_size / 1024:>10.1f} {ratio:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Dọn LLM response cache của LightRAG (kv_store_llm_response_cache.sqlite3):
+- Bỏ entry 'extract' của chunk không còn trong kv_store_text_chunks.json
+- Tuỳ chọn bỏ cache query/keywords lâu không dùng (--max-age-days)
+- Tuỳ chọn ép về giới hạn dung lượng (--max-mb), rồi VACUUM
+
+Chưa có file .sqlite3 thì nạp từ kv_store_llm_response_cache.json trước.
+
+Chạy từ thư mục gốc project:
+    python -m scripts.compact_llm_cache --working-dir ./rag_storage_new
+    python -m scripts.compact_llm_cache --max-age-days 30 --max-mb 128
+"""
+import argparse
+import json
+import os
+
+from app.services.sqlite_kv_storage import compact, connect, evict_to_size, import_json
+
+NAMESPACE = "llm_response_cache"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the LightRAG LLM response cache")
+    parser.add_argument("--working-dir", default="./rag_storage_new")
+    parser.add_argument("--max-age-days", type=float, default=None, help="Bỏ cache query/keywords không dùng quá N ngày")
+    parser.add_argument("--max-mb", type=float, default=None, help="Giới hạn dung lượng sau khi dọn")
+    args = parser.parse_args()
+
+    db_path = os.path.join(args.working_dir, f"kv_store_{NAMESPACE}.sqlite3")
+    json_path = os.path.join(args.working_dir, f"kv_store_{NAMESPACE}.json")
+    chunks_path = os.path.join(args.working_dir, "kv_store_text_chunks.json")
+
+    is_new = not os.path.exists(db_path)
+    conn = connect(db_path)
+    if is_new and os.path.exists(json_path):
+        print(f"📦 Imported {import_json(conn, json_path)} entries from {json_path}")
+
+    live_chunk_ids = None
+    if os.path.exists(chunks_path):
+        with open(chunks_path, encoding="utf-8") as f:
+            live_chunk_ids = list(json.load(f))
+    else:
+        print(f"⚠️ {chunks_path} not found, keeping extraction entries")
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_before = os.path.getsize(db_path)
+    stats = compact(conn, live_chunk_ids=live_chunk_ids, max_age_days=args.max_age_days)
+    if args.max_mb is not None:
+        stats["evicted"] = evict_to_size(conn, int(args.max_mb * 1024 * 1024))
+        conn.execute("VACUUM")
+        stats["remaining"] = conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+    print(json.dumps(stats, indent=2))
+    print(f"✅ {db_path}: {size_before / 1024:.0f} KB -> {os.path.getsize(db_path) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
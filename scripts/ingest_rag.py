@@ -0,0 +1,42 @@
+"""
+Nạp tài liệu hàng loạt vào LightRAG (rag_storage_new), có checkpoint để resume.
+
+Chạy từ thư mục gốc project:
+    python -m scripts.ingest_rag reading_topic reading_output
+    python -m scripts.ingest_rag data/packs.jsonl --batch-size 16
+    python -m scripts.ingest_rag reading_topic --reset   # bỏ checkpoint, chạy lại từ đầu
+
+Nguồn là thư mục (.txt/.md, đệ quy) hoặc file .jsonl ({"text": ..., "file_path": ...} mỗi dòng).
+Tài liệu đã 'processed' trong kv_store_doc_status.json luôn được bỏ qua.
+"""
+import argparse
+import asyncio
+import json
+
+from app.services.lightrag_service import rag_service
+from app.services.rag_ingestion import RagIngestionPipeline
+
+
+async def run(args):
+    await rag_service.initialize()
+    pipeline = RagIngestionPipeline(batch_size=args.batch_size)
+    try:
+        for source in args.sources:
+            print(f"📂 {source}")
+            report = await pipeline.ingest_source(source, checkpoint_path=args.checkpoint, reset=args.reset)
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+    finally:
+        await rag_service.rag_instance.finalize_storages()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched, resumable LightRAG ingestion")
+    parser.add_argument("sources", nargs="+", help="Thư mục hoặc file .jsonl")
+    parser.add_argument("--batch-size", type=int, default=None, help="Số tài liệu mỗi lần ainsert")
+    parser.add_argument("--checkpoint", default=None, help="File checkpoint (mặc định RAG_INGEST_CHECKPOINT_PATH)")
+    parser.add_argument("--reset", action="store_true", help="Bỏ qua checkpoint cũ")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Load test các endpoint đọc Mongo (exam, sentence) để đo RPS duy trì được trên mỗi worker.
+Mỗi "user" ảo gửi request liên tục (closed loop) trong --duration giây, xoay vòng qua --paths.
+
+So sánh repository sync (def endpoint + threadpool) với async (AsyncMongoClient): chạy server 1 worker
+ở từng phiên bản rồi chạy script này với cùng tham số:
+    uvicorn app.main:app --workers 1 --port 8000
+    python -m scripts.load_test_api
+    python -m scripts.load_test_api --base-url http://localhost:8000 --concurrency 200 --duration 30
+    python -m scripts.load_test_api --paths /exams/ /sentences/level/Beginner
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_PATHS = ["/exams/", "/sentences/", "/dashboard/topics", "/dashboard/sets"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def user(client: httpx.AsyncClient, paths: List[str], offset: int, deadline: float,
+               latencies: Dict[str, List[float]], errors: Dict[str, int]):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies[path].append((time.perf_counter() - started) * 1000)
+        else:
+            errors[path] += 1
+
+
+async def run(base_url: str, paths: List[str], concurrency: int, duration: float, warmup: float):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        if warmup > 0:
+            print(f"🔥 Warm-up {warmup:.0f}s...")
+            await asyncio.gather(*(
+                user(client, paths, n, time.perf_counter() + warmup,
+                     {p: [] for p in paths}, {p: 0 for p in paths})
+                for n in range(concurrency)
+            ))
+
+        latencies: Dict[str, List[float]] = {p: [] for p in paths}
+        errors: Dict[str, int] = {p: 0 for p in paths}
+        print(f"🚀 {concurrency} concurrent users x {duration:.0f}s against {base_url}")
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            user(client, paths, n, started + duration, latencies, errors)
+            for n in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    print(f"\n{'path':<32} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    all_latencies: List[float] = []
+    for path in paths:
+        values = latencies[path]
+        all_latencies.extend(values)
+        print(
+            f"{path:<32} {len(values):>9} {errors[path]:>7} {len(values) / elapsed:>9.1f} "
+            f"{(statistics.median(values) if values else 0):>9.1f} "
+            f"{percentile(values, 95):>9.1f} {percentile(values, 99):>9.1f}"
+        )
+    print(
+        f"{'TOTAL':<32} {len(all_latencies):>9} {sum(errors.values()):>7} {len(all_latencies) / elapsed:>9.1f} "
+        f"{(statistics.median(all_latencies) if all_latencies else 0):>9.1f} "
+        f"{percentile(all_latencies, 95):>9.1f} {percentile(all_latencies, 99):>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test exam/sentence endpoints (RPS + latency percentiles)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.paths, args.concurrency, args.duration, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
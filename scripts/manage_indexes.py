@@ -0,0 +1,60 @@
+"""
+Quản lý index Mongo theo registry khai báo trong các repository (INDEXES / QUERIES / BACKFILLS):
+- Mặc định: backfill field phục vụ index + tạo index còn thiếu (giống lúc app startup)
+- --check: explain các query đăng ký, exit code 1 nếu có query bị COLLSCAN (dùng trong CI / sau deploy)
+- --report: số document, dung lượng data và từng index của mỗi collection
+
+Chạy từ thư mục gốc project (cần MONGO_URL):
+    python -m scripts.manage_indexes
+    python -m scripts.manage_indexes --check --report
+    python -m scripts.manage_indexes --no-ensure --report
+"""
+import argparse
+import sys
+
+from app.db.indexes import ensure_indexes, explain_queries, index_report
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ensure, verify and report MongoDB indexes")
+    parser.add_argument("--no-ensure", action="store_true", help="Không tạo index / backfill")
+    parser.add_argument("--check", action="store_true", help="Explain query đăng ký, lỗi nếu COLLSCAN")
+    parser.add_argument("--report", action="store_true", help="In dung lượng index của từng collection")
+    args = parser.parse_args()
+
+    if not args.no_ensure:
+        for collection, names in ensure_indexes().items():
+            print(f"✅ {collection}: {', '.join(names)}")
+
+    scans = 0
+    if args.check:
+        print()
+        for result in explain_queries():
+            scans += result["collscan"]
+            mark = "❌" if result["collscan"] else "✅"
+            print(f"{mark} {result['collection']} {result['filter']} -> {' > '.join(result['stages'])}")
+
+    if args.report:
+        print(f"\n{'collection':<24} {'documents':>10} {'data':>10} {'indexes':>10}")
+        for row in index_report():
+            print(
+                f"{row['collection']:<24} {row['documents']:>10} "
+                f"{format_bytes(row['data_size']):>10} {format_bytes(row['total_index_size']):>10}"
+            )
+            for name, size in row["index_sizes"].items():
+                print(f"    {name:<36} {format_bytes(size):>10}")
+
+    if scans:
+        print(f"\n❌ {scans} registered queries use COLLSCAN")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
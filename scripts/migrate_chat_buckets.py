@@ -0,0 +1,49 @@
+"""
+Chuyển lịch sử chat của các session cũ (mảng messages nhúng trong chat_sessions)
+sang collection chat_messages dạng bucket.
+
+An toàn khi app đang chạy: session nào có tin nhắn mới chen vào giữa chừng sẽ được migrate lại,
+session đã migrate thì bỏ qua (chạy lại nhiều lần được).
+
+Chạy từ thư mục gốc project:
+    python -m scripts.migrate_chat_buckets
+    python -m scripts.migrate_chat_buckets --dry-run
+"""
+import argparse
+import asyncio
+import time
+
+from app.repositories.chat_repository import ChatRepository
+
+
+async def run(args):
+    repository = ChatRepository()
+    await repository.ensure_indexes()
+    session_ids = await repository.find_legacy_session_ids()
+    print(f"📂 {len(session_ids)} legacy sessions (bucket size {repository.bucket_size})")
+    if args.dry_run:
+        return
+
+    started = time.perf_counter()
+    migrated = 0
+    total_messages = 0
+    for session_id in session_ids:
+        try:
+            count = await repository.migrate_session(session_id)
+        except Exception as e:
+            print(f"❌ {session_id}: {e}")
+            continue
+        if count is not None:
+            migrated += 1
+            total_messages += count
+    print(f"✅ Migrated {migrated} sessions, {total_messages} messages in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate embedded chat messages to bucketed chat_messages")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ đếm số session cần migrate")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
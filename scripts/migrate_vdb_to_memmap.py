@@ -0,0 +1,34 @@
+"""
+Chuyển vector storage của LightRAG từ vdb_*.json (NanoVectorDB) sang định dạng memmap
+(vdb_<namespace>.<id>.npy + vdb_<namespace>.meta.json).
+
+Chạy từ thư mục gốc project:
+    python -m scripts.migrate_vdb_to_memmap --working-dir ./rag_storage_new
+"""
+import argparse
+import os
+import time
+
+from app.services.memmap_vector_storage import migrate_nano_json
+
+NAMESPACES = ("entities", "relationships", "chunks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate LightRAG vdb_*.json files to memmap storage")
+    parser.add_argument("--working-dir", default="./rag_storage_new")
+    parser.add_argument("--remove-json", action="store_true", help="Xoá file JSON gốc sau khi chuyển xong")
+    args = parser.parse_args()
+
+    for namespace in NAMESPACES:
+        source = os.path.join(args.working_dir, f"vdb_{namespace}.json")
+        started = time.perf_counter()
+        count = migrate_nano_json(args.working_dir, namespace, remove_source=args.remove_json)
+        if count is None:
+            print(f"- {namespace}: không có {source}, bỏ qua")
+            continue
+        print(f"- {namespace}: {count} vectors ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Đo cold start của một worker: thời gian import từng module và các constructor singleton khi import app.main.
+
+Chạy từ thư mục gốc project:
+    python -m scripts.profile_startup
+    python -m scripts.profile_startup --top 40
+
+Khi chạy server, đặt STARTUP_PROFILE=1 để in cùng report sau lifespan startup
+(xem thêm GET /metrics/startup).
+"""
+import argparse
+import os
+import sys
+import time
+
+# Phải đặt trước khi import package app (hook import được cài trong app/__init__.py)
+os.environ["STARTUP_PROFILE"] = "1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of app.main")
+    parser.add_argument("--top", type=int, default=25, help="Số module chậm nhất hiển thị")
+    args = parser.parse_args()
+
+    if "app" in sys.modules:
+        raise SystemExit("app đã được import trước khi bật profile")
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    from app.core import startup_profile
+
+    startup_profile.mark_ready()
+    startup_profile.print_report(args.top)
+    print(f"✅ import app.main: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+
+# Settings bắt buộc; test không kết nối Mongo / Gemini thật
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("GEMINI_MODEL", "test")
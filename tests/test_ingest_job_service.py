@@ -0,0 +1,64 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.services import ingest_job_service as module
+from app.services.ingest_job_service import IngestJobService
+from app.services.rag_ingestion import RagIngestionPipeline
+
+
+class FakeRagService:
+    def __init__(self):
+        self.statuses = {}
+        self.inserted = []
+        self.embedding_calls = 0
+
+    async def get_doc_statuses(self, ids):
+        return {doc_id: self.statuses[doc_id] for doc_id in ids if doc_id in self.statuses}
+
+    async def insert_documents(self, contents, ids, file_paths):
+        for doc_id, file_path in zip(ids, file_paths):
+            self.statuses[doc_id] = "processed"
+            self.inserted.append(file_path)
+
+
+class FakeJobRepository:
+    """Giả lập IngestJobRepository trong bộ nhớ (một job)"""
+
+    def __init__(self, total: int):
+        self.documents = [(f"doc{i}.txt", f"content {i}") for i in range(total)]
+        self.reads = []
+        self.progress = []
+        self.finished = None
+
+    def read_documents(self, job_id, start, limit):
+        self.reads.append(start)
+        return self.documents[start:start + limit]
+
+    def heartbeat(self, job_id, worker_id):
+        pass
+
+    def save_progress(self, job_id, worker_id, position, failed_files, report):
+        self.progress.append(position)
+
+    def finish_job(self, job_id, worker_id, status, report=None, error=None):
+        self.finished = (status, report, error)
+
+
+def test_reclaimed_job_reads_from_checkpoint_position(monkeypatch):
+    service = FakeRagService()
+    monkeypatch.setattr(module, "RagIngestionPipeline", lambda: RagIngestionPipeline(service=service, batch_size=10))
+    monkeypatch.setattr(module, "_READ_CHUNK", 100)
+    repository = FakeJobRepository(total=250)
+    job = {"_id": ObjectId(), "attempts": 2, "total_documents": 250, "position": 200, "failed_files": []}
+
+    asyncio.run(IngestJobService(repository=repository)._run_job(job))
+
+    # Không đọc lại các trang đã xong trước checkpoint
+    assert repository.reads == [200]
+    assert service.inserted == [f"doc{i}.txt" for i in range(200, 250)]
+    status, report, error = repository.finished
+    assert error is None
+    assert report["position"] == 250
+    assert report["skipped_checkpoint"] == 200
+    assert report["inserted"] == 50
@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.intent_classifier import IntentClassifier
+
+
+@pytest.mark.parametrize("question", [
+    "hi, how do I say sorry politely?",
+    "hi there, I want to learn words for travel",
+    "hey what is the difference between affect and effect",
+])
+def test_greeting_does_not_override_task_question(question):
+    category, confidence = IntentClassifier().predict(question)
+    # Không được chốt 'chat' tại chỗ rồi bỏ qua RAG / LLM
+    assert not (category == "chat" and confidence >= settings.INTENT_CONFIDENCE_THRESHOLD)
+
+
+@pytest.mark.parametrize("question", ["hi", "thanks a lot!", "xin chào"])
+def test_greeting_only_message_is_chat(question):
+    category, confidence = IntentClassifier().predict(question)
+    assert category == "chat"
+    assert confidence >= settings.INTENT_CONFIDENCE_THRESHOLD
+
+
+def test_record_comparison_appends_log(tmp_path):
+    log_path = tmp_path / "intent" / "log.jsonl"
+    classifier = IntentClassifier(log_path=str(log_path))
+    asyncio.run(classifier.record_comparison("hi", "chat", 0.9, "chat"))
+    asyncio.run(classifier.record_comparison("grammar?", "chat", 0.1, "grammar"))
+
+    lines = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert [line["llm"] for line in lines] == ["chat", "grammar"]
+    assert classifier.stats()["agreement_rate"] == 0.5
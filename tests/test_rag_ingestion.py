@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.services.rag_ingestion import RagIngestionPipeline
+
+
+class FakeRagService:
+    """Giả lập LightRAGService: chỉ giữ doc status theo doc_id"""
+
+    def __init__(self):
+        self.statuses = {}
+        self.inserted = []
+        self.embedding_calls = 0
+
+    async def get_doc_statuses(self, ids):
+        return {doc_id: self.statuses[doc_id] for doc_id in ids if doc_id in self.statuses}
+
+    async def insert_documents(self, contents, ids, file_paths):
+        for doc_id, file_path in zip(ids, file_paths):
+            self.statuses[doc_id] = "processed"
+            self.inserted.append(file_path)
+
+
+def _write(folder, name, text):
+    (folder / name).write_text(text, encoding="utf-8")
+
+
+def test_new_file_sorted_before_old_checkpoint_is_ingested(tmp_path):
+    source = tmp_path / "docs"
+    source.mkdir()
+    for name in ("b.txt", "c.txt", "d.txt"):
+        _write(source, name, f"content of {name}")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    service = FakeRagService()
+    pipeline = RagIngestionPipeline(service=service, batch_size=2)
+
+    first = asyncio.run(pipeline.ingest_source(str(source), checkpoint_path=checkpoint))
+    assert first["inserted"] == 3
+
+    _write(source, "a.txt", "content of a.txt")
+    second = asyncio.run(pipeline.ingest_source(str(source), checkpoint_path=checkpoint))
+
+    assert second["inserted"] == 1
+    assert second["skipped_checkpoint"] == 0
+    assert second["skipped_processed"] == 3
+    assert service.inserted[-1] == "a.txt"
+
+
+def test_interrupted_run_resumes_from_checkpoint(tmp_path):
+    source = tmp_path / "docs"
+    source.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt", "d.txt"):
+        _write(source, name, f"content of {name}")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    service = FakeRagService()
+    insert = service.insert_documents
+    calls = 0
+
+    async def crash_on_second_batch(contents, ids, file_paths):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("crash")
+        await insert(contents, ids, file_paths)
+
+    service.insert_documents = crash_on_second_batch
+    pipeline = RagIngestionPipeline(service=service, batch_size=2)
+    with pytest.raises(RuntimeError, match="crash"):
+        asyncio.run(pipeline.ingest_source(str(source), checkpoint_path=checkpoint))
+
+    service.insert_documents = insert
+    report = asyncio.run(pipeline.ingest_source(str(source), checkpoint_path=checkpoint))
+    assert report["skipped_checkpoint"] == 2
+    assert report["inserted"] == 2